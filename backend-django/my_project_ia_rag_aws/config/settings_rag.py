@@ -29,6 +29,56 @@ MAX_TOKENS = 500
 TEMPERATURE = 0.5
 TOP_P = 0.9
 
+# Modelos por nível (escolhido por consulta, ver rag/router.choose_tier):
+# "rapido" para perguntas curtas e simples com poucos produtos, "forte"
+# para comparações e pedidos complexos. Preços em US$ por 1 mil tokens,
+# usados só nas métricas de custo (/api/rag/metrics/)
+BEDROCK_MODEL_TIERS = {
+    'rapido': {
+        'model_id': os.getenv('BEDROCK_FAST_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0'),
+        'max_tokens': 250,
+        'custo_entrada_1k': 0.00025,
+        'custo_saida_1k': 0.00125,
+    },
+    'forte': {
+        'model_id': BEDROCK_MODEL_ID,
+        'max_tokens': MAX_TOKENS,
+        'custo_entrada_1k': 0.003,
+        'custo_saida_1k': 0.015,
+    },
+}
+BEDROCK_DEFAULT_TIER = 'forte'
+
+# Sem roteamento por complexidade, todas as consultas usam BEDROCK_DEFAULT_TIER
+RAG_MODEL_ROUTING = os.getenv('RAG_MODEL_ROUTING', '1') == '1'
+RAG_FAST_TIER_MAX_WORDS = 10      # Consultas mais longas usam o nível forte
+RAG_FAST_TIER_MAX_PRODUCTS = 3    # Mais produtos no contexto → nível forte
+
+# Máximo aceito em max_tokens= de /rag/query/
+RAG_MAX_TOKENS_LIMIT = 1000
+
+# Cliente compartilhado (pool de conexões, retries e timeouts)
+# Endpoint do Bedrock Runtime; vazio = AWS. Em testes de carga, aponte para
+# o servidor local (python manage.py fake_bedrock → http://127.0.0.1:8200)
+BEDROCK_ENDPOINT_URL = os.getenv('BEDROCK_ENDPOINT_URL') or None
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', '50'))
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv('BEDROCK_CONNECT_TIMEOUT', '3'))
+BEDROCK_READ_TIMEOUT = float(os.getenv('BEDROCK_READ_TIMEOUT', '30'))  # Nas requisições: no máximo RAG_REQUEST_DEADLINE
+BEDROCK_RETRY_MODE = os.getenv('BEDROCK_RETRY_MODE', 'adaptive')
+BEDROCK_MAX_ATTEMPTS = int(os.getenv('BEDROCK_MAX_ATTEMPTS', '3'))  # Total de tentativas (inclui a primeira)
+
+# Pré-aquecimento das conexões no início de cada worker (gunicorn.conf.py)
+BEDROCK_PREWARM = os.getenv('BEDROCK_PREWARM', '1') == '1'
+BEDROCK_PREWARM_CONNECTIONS = int(os.getenv('BEDROCK_PREWARM_CONNECTIONS', '2'))
+# Tempo máximo do pré-aquecimento: conexões que não abrirem até lá ficam
+# para a primeira requisição (o worker não espera os retries do boto3)
+BEDROCK_PREWARM_TIMEOUT = float(os.getenv('BEDROCK_PREWARM_TIMEOUT', '10'))
+
+# Aquecimento completo do worker (índice, clientes, busca fictícia e, com
+# BEDROCK_PREWARM, conexões) em segundo plano, logo que o worker sobe;
+# /api/ready/ só responde 200 depois dele
+RAG_WARMUP = os.getenv('RAG_WARMUP', '1') == '1'
+
 # ==============================================
 # APLICAÇÃO CONFIGURAÇÕES
 # ==============================================
@@ -43,10 +93,164 @@ HISTORICO_MAX = 10
 CATALOGO_PKL = str(DATA_DIR / 'catalogo.pkl')
 VECTORS_PKL = str(DATA_DIR / 'vectors.pkl')
 
+# Índice versionado (blue/green): cada build em um diretório próprio,
+# ativado pela troca atômica do arquivo CURRENT
+RAG_INDEX_DIR = DATA_DIR / 'index'
+RAG_INDEX_KEEP_VERSIONS = 3          # Versões antigas mantidas para rollback
+RAG_INDEX_VERIFY_CHECKSUMS = True    # Confere SHA-256 do manifest ao carregar
+RAG_INDEX_RELOAD_INTERVAL = 5        # Segundos entre verificações de nova versão
+RAG_EMBEDDING_CHUNK_SIZE = 256       # Embeddings por bloco gravado no checkpoint do build
+
+# Dimensão dos embeddings do BEDROCK_EMBEDDING_MODEL (Titan v2)
+RAG_EMBEDDING_DIMS = 1024
+
 # Limites de busca
 RAG_DEFAULT_LIMIT = 5
 RAG_MAX_LIMIT = 20
 
-# Threshold de similaridade (0.0 a 1.0)
-RAG_SIMILARITY_THRESHOLD = 0.3
- 
\ No newline at end of file
+# Campos dos produtos nas respostas de /rag/query/ e /rag/search/ (fields=).
+# Perfis nomeados ou lista de campos separados por vírgula; None = todos
+# os campos do catálogo. O perfil compacto cobre o que o chat exibe
+RAG_RESULT_FIELD_PROFILES = {
+    'compacto': (
+        'id', 'nome', 'categoria', 'preco', 'preco_promocional', 'marca',
+        'cor', 'estoque', 'avaliacao', 'score', 'score_rerank',
+    ),
+    'completo': None,
+}
+RAG_RESULT_DEFAULT_PROFILE = os.getenv('RAG_RESULT_DEFAULT_PROFILE', 'compacto')
+
+# Threshold de similaridade (0.0 a 1.0): candidatos abaixo dele são
+# descartados; sem nenhum acima, /rag/query/ responde sem chamar o LLM
+RAG_SIMILARITY_THRESHOLD = float(os.getenv('RAG_SIMILARITY_THRESHOLD', '0.3'))
+
+# Corte por salto de score: ordenados por similaridade, os candidatos
+# após uma queda maior que este valor entre dois vizinhos são descartados
+# (0 desativa)
+RAG_SCORE_GAP_CUTOFF = float(os.getenv('RAG_SCORE_GAP_CUTOFF', '0.1'))
+
+# Re-ranking dos candidatos da busca vetorial (ver rag/reranker.py)
+RAG_RERANK_ENABLED = os.getenv('RAG_RERANK_ENABLED', '1') == '1'
+RAG_RERANK_CANDIDATES = 30       # Candidatos buscados antes de reordenar/diversificar com MMR (>= limit)
+RAG_RERANK_WEIGHTS = {
+    'similaridade': 1.0,         # Similaridade do cosseno
+    'avaliacao': 0.10,           # Nota média / 5
+    'popularidade': 0.05,        # log(nº de avaliações), saturando em RAG_RERANK_REVIEWS_CAP
+    'desconto': 0.10,            # Desconto relativo do preço promocional
+}
+RAG_RERANK_REVIEWS_CAP = 1000
+RAG_RERANK_OUT_OF_STOCK_PENALTY = 0.25   # Subtraído de produtos sem estoque
+
+# ==============================================
+# BACKEND VETORIAL
+# ==============================================
+# 'memory'   → índice versionado em arquivos (RAG_INDEX_DIR), carregado em
+#              memória por worker (padrão)
+# 'pgvector' → tabela produto_embeddings no PostgreSQL com índice HNSW,
+#              compartilhada por todos os servidores
+# 'sharded'  → índice versionado dividido em shards buscados em paralelo
+#              (processos locais ou shard_server; ver BUSCA DISTRIBUÍDA)
+RAG_VECTOR_BACKEND = os.getenv('RAG_VECTOR_BACKEND', 'memory')
+
+# Candidatos explorados pelo HNSW por consulta (recall x latência)
+RAG_PGVECTOR_EF_SEARCH = int(os.getenv('RAG_PGVECTOR_EF_SEARCH', '100'))
+
+# Continua a varredura do HNSW quando os filtros descartam candidatos.
+# Só é aplicado com pgvector >= 0.8 (a versão da extensão é verificada;
+# ver PgVectorStore.iterative_scan). Vazio para desativar
+RAG_PGVECTOR_ITERATIVE_SCAN = os.getenv('RAG_PGVECTOR_ITERATIVE_SCAN', 'relaxed_order')
+
+# ==============================================
+# BUSCA DISTRIBUÍDA (SHARDS)
+# ==============================================
+# Com RAG_VECTOR_BACKEND='sharded' as linhas do índice são divididas em
+# RAG_SHARDS fatias contíguas, cada uma buscada em um processo próprio;
+# o coordenador junta os top-k de cada shard.
+RAG_SHARDS = int(os.getenv('RAG_SHARDS', '4'))
+
+# URLs de shard_server separadas por vírgula (uma por shard, na ordem).
+# Vazio = shards em processos locais
+RAG_SHARD_URLS = [u for u in os.getenv('RAG_SHARD_URLS', '').split(',') if u.strip()]
+
+# Espera máxima pelos shards em cada busca (segundos). Shards atrasados
+# são ignorados e a busca responde com os demais
+RAG_SHARD_TIMEOUT = float(os.getenv('RAG_SHARD_TIMEOUT', '0.5'))
+
+# Espera máxima para os shards carregarem uma nova versão (segundos)
+RAG_SHARD_STARTUP_TIMEOUT = float(os.getenv('RAG_SHARD_STARTUP_TIMEOUT', '60'))
+
+# ==============================================
+# AUTOCOMPLETE
+# ==============================================
+# Sugestões de /api/rag/autocomplete/ (nomes, marcas e categorias do
+# catálogo), montadas em memória a cada carga do índice
+RAG_AUTOCOMPLETE_LIMIT = 8       # Sugestões por padrão
+RAG_AUTOCOMPLETE_MAX_LIMIT = 20  # Máximo aceito em limit=
+
+# Prefixos que casam com mais entradas que isto (os curtos) têm o top
+# guardado por versão do índice depois da primeira consulta
+RAG_AUTOCOMPLETE_MEMO_MIN_MATCHES = 2000
+
+# ==============================================
+# ROTEAMENTO DE CONSULTAS (TEMPLATE x LLM)
+# ==============================================
+# Consultas diretas ("preço da Bota X", "tem mochila em estoque?") são
+# respondidas por template a partir dos produtos encontrados, sem chamar
+# o LLM (ver rag/router.py). Perguntas abertas continuam no LLM.
+RAG_ROUTER_ENABLED = os.getenv('RAG_ROUTER_ENABLED', '1') == '1'
+
+# Similaridade mínima do melhor produto para responder por template
+RAG_ROUTER_MIN_SCORE = float(os.getenv('RAG_ROUTER_MIN_SCORE', '0.4'))
+
+# Consultas com mais palavras que isto vão sempre para o LLM
+RAG_ROUTER_MAX_WORDS = 12
+
+# Fração das palavras do nome do produto que precisa aparecer na consulta
+# para a resposta tratar só dele ("preço da Bota Couro Masculina Premium")
+RAG_ROUTER_NAME_MATCH = 0.6
+
+# Amostras de latência guardadas por métrica em /api/rag/metrics/ (percentis)
+RAG_METRICS_WINDOW = 1000
+
+# ==============================================
+# LATÊNCIA E RESILIÊNCIA
+# ==============================================
+# Orçamento total de uma requisição RAG (segundos)
+RAG_REQUEST_DEADLINE = float(os.getenv('RAG_REQUEST_DEADLINE', '12'))
+
+# Tempo mínimo restante para iniciar cada etapa (segundos)
+RAG_EMBEDDING_MIN_BUDGET = 0.2
+RAG_GENERATION_MIN_BUDGET = 2.0
+
+# Threads usadas para impor o prazo às chamadas do Bedrock
+RAG_BEDROCK_EXECUTOR_WORKERS = int(os.getenv('RAG_BEDROCK_EXECUTOR_WORKERS', '32'))
+
+# Circuit breaker: falhas seguidas para abrir e tempo (s) até testar de novo
+RAG_BREAKER_FAILURE_THRESHOLD = 5
+RAG_BREAKER_RESET_TIMEOUT = 30
+
+# ==============================================
+# COALESCÊNCIA DE REQUISIÇÕES (SINGLE-FLIGHT)
+# ==============================================
+# Requisições idênticas simultâneas aguardam a primeira e compartilham o resultado
+RAG_COALESCE_ENABLED = os.getenv('RAG_COALESCE_ENABLED', '1') == '1'
+
+# Alias de cache Django compartilhado entre workers (Redis/Memcached).
+# Vazio = coalescência apenas dentro do worker
+RAG_COALESCE_CACHE_ALIAS = os.getenv('RAG_COALESCE_CACHE_ALIAS', '')
+
+# Tempos em segundos
+RAG_COALESCE_WAIT_TIMEOUT = 30     # Espera máxima de uma requisição duplicada
+RAG_COALESCE_LOCK_TTL = 60         # Validade do lock entre workers
+RAG_COALESCE_RESULT_TTL = 5        # Tempo que o resultado fica disponível para as duplicadas
+RAG_COALESCE_POLL_INTERVAL = 0.05  # Intervalo de verificação entre workers
+
+# ==============================================
+# CACHE DA API DE PRODUTOS
+# ==============================================
+# Alias de cache Django para as páginas de /api/produtos/. As chaves
+# incluem a versão do catálogo, lida do banco (ver caching.catalog_state),
+# então cache local por worker continua correto; um backend compartilhado
+# (Redis/Memcached) só evita recalcular a mesma página em cada worker.
+PRODUTOS_CACHE_ALIAS = os.getenv('PRODUTOS_CACHE_ALIAS', 'default')
+PRODUTOS_CACHE_TTL = int(os.getenv('PRODUTOS_CACHE_TTL', '300'))  # segundos
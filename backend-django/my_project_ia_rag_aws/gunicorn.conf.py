@@ -0,0 +1,38 @@
+"""
+Configuração do Gunicorn.
+
+Carregado automaticamente quando o gunicorn é iniciado neste diretório
+(veja o comando em docker-compose.yml). Os parâmetros passados na linha
+de comando (--workers, --timeout, ...) continuam tendo precedência.
+"""
+
+
+def post_worker_init(worker):
+    """
+    Inicia o aquecimento do worker (índice, clientes e Bedrock).
+
+    Roda em segundo plano: carregar o índice e abrir as conexões com o
+    Bedrock pode passar do --timeout, e o arbiter mataria o worker antes
+    de ele aceitar requisições. O load balancer deve usar /api/ready/,
+    que responde 503 até o aquecimento terminar.
+    """
+    import threading
+    from config.settings_rag import RAG_WARMUP, BEDROCK_PREWARM
+
+    if RAG_WARMUP:
+        from meu_app_rag.rag.warmup import start_warmup
+
+        start_warmup()
+        worker.log.info("Aquecimento do worker iniciado em segundo plano (ver /api/ready/)")
+        return
+
+    if not BEDROCK_PREWARM:
+        return
+
+    from meu_app_rag.rag.bedrock_client import prewarm_bedrock_client
+
+    def prewarm():
+        aquecidas = prewarm_bedrock_client()
+        worker.log.info(f"Bedrock: {aquecidas} conexão(ões) pré-aquecida(s)")
+
+    threading.Thread(target=prewarm, name="bedrock-prewarm", daemon=True).start()
@@ -1,6 +1,18 @@
+import os
 from django.apps import AppConfig
 
 
 class MeuAppRagConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meu_app_rag'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registra os receivers)
+
+        # runserver: aquece o processo que atende (filho do autoreloader) em
+        # segundo plano. No gunicorn o aquecimento é feito em post_worker_init,
+        # e os demais comandos do manage.py não precisam do índice.
+        from config.settings_rag import RAG_WARMUP
+        if RAG_WARMUP and os.environ.get('RUN_MAIN') == 'true':
+            from .rag.warmup import start_warmup
+            start_warmup()
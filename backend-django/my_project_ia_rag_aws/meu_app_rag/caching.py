@@ -0,0 +1,111 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from django.core.cache import caches
+from django.db.models import Max
+
+from .models import CatalogoEstado, Produto
+from config.settings_rag import PRODUTOS_CACHE_ALIAS, PRODUTOS_CACHE_TTL
+
+EPOCH = datetime.fromtimestamp(0, dt_timezone.utc)
+
+
+def _cache():
+    return caches[PRODUTOS_CACHE_ALIAS]
+
+
+def catalog_state() -> dict:
+    """
+    Estado atual do catálogo usado para ETag/Last-Modified das coleções.
+
+    Derivado do banco a cada requisição, então é o mesmo em todos os
+    workers e não depende de cache compartilhado: Max(data_atualizacao),
+    que muda em toda inserção/atualização (inclusive no upsert do
+    import_produtos), e CatalogoEstado.alterado_em, que registra exclusões
+    e atualizações em massa. Ambos são lidos por índice/chave primária.
+
+    Returns:
+        dict: {'versao': hash do estado (muda a cada alteração),
+               'last_modified': momento da última alteração}
+    """
+    maximo = Produto.objects.aggregate(m=Max('data_atualizacao'))['m'] or EPOCH
+    alterado = CatalogoEstado.objects.filter(pk=1).values_list('alterado_em', flat=True).first() or EPOCH
+    versao = hashlib.sha1(f'{maximo.isoformat()}|{alterado.isoformat()}'.encode('utf-8')).hexdigest()[:16]
+    return {'versao': versao, 'last_modified': max(maximo, alterado)}
+
+
+def invalidate_catalog():
+    """
+    Marca o catálogo como alterado.
+
+    Chamado pelo signal de exclusão de Produto. Operações que mudam linhas
+    sem tocar data_atualizacao (QuerySet.update, SQL direto) devem chamar
+    esta função diretamente; saves e bulk_create já atualizam a coluna.
+    """
+    CatalogoEstado.touch()
+
+
+def _memo(request, nome, fn):
+    """Calcula o valor uma única vez por requisição (ETag e Last-Modified usam o mesmo)"""
+    attr = f'_produtos_{nome}'
+    if not hasattr(request, attr):
+        setattr(request, attr, fn())
+    return getattr(request, attr)
+
+
+def _params_hash(request) -> str:
+    """Hash dos parâmetros da query string (ordem irrelevante)"""
+    itens = sorted(request.query_params.lists())
+    return hashlib.sha1(repr(itens).encode('utf-8')).hexdigest()[:16]
+
+
+# ----------------------------------------------
+# Coleção (/api/produtos/)
+# ----------------------------------------------
+def _request_state(request) -> dict:
+    return _memo(request, 'estado', catalog_state)
+
+
+def list_etag(request, *args, **kwargs) -> str:
+    return f'W/"{_request_state(request)["versao"]}-{_params_hash(request)}"'
+
+
+def list_last_modified(request, *args, **kwargs):
+    return _request_state(request)['last_modified']
+
+
+def list_cache_key(request) -> str:
+    # Host incluído porque os links next/previous da página são absolutos
+    host = hashlib.sha1(request.build_absolute_uri('/').encode('utf-8')).hexdigest()[:8]
+    return f'produtos:list:{_request_state(request)["versao"]}:{host}:{_params_hash(request)}'
+
+
+def get_cached_list(request):
+    """Página serializada em cache para os mesmos filtros/cursor, ou None"""
+    return _cache().get(list_cache_key(request))
+
+
+def set_cached_list(request, dados):
+    _cache().set(list_cache_key(request), dados, PRODUTOS_CACHE_TTL)
+
+
+# ----------------------------------------------
+# Detalhe (/api/produtos/{id}/)
+# ----------------------------------------------
+def _data_atualizacao(request, pk):
+    def buscar():
+        try:
+            return Produto.objects.filter(pk=pk).values_list('data_atualizacao', flat=True).first()
+        except (ValueError, TypeError):
+            return None
+    return _memo(request, f'atualizado_{pk}', buscar)
+
+
+def detail_etag(request, pk=None, *args, **kwargs):
+    atualizado = _data_atualizacao(request, pk)
+    if atualizado is None:
+        return None
+    return f'"{pk}-{atualizado.timestamp():.6f}"'
+
+
+def detail_last_modified(request, pk=None, *args, **kwargs):
+    return _data_atualizacao(request, pk)
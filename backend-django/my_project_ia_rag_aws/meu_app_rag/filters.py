@@ -0,0 +1,97 @@
+from decimal import Decimal, InvalidOperation
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ValidationError
+
+from .models import Produto
+
+VALORES_VERDADEIROS = {'1', 'true', 'sim', 'yes', 'on'}
+VALORES_FALSOS = {'0', 'false', 'nao', 'não', 'no', 'off'}
+
+
+class ProdutoFilter:
+    """
+    Filtros da listagem de produtos.
+
+    Todos os filtros de texto comparam igualdade nas colunas normalizadas
+    (categoria_slug, marca_slug, cor_slug), que são cobertas pelos índices
+    declarados em Produto.Meta — ao contrário de `icontains`, que força
+    varredura completa da tabela. "Calçados", "calcados" e "CALÇADOS"
+    resultam no mesmo filtro.
+    """
+
+    parameters = [
+        OpenApiParameter(name='categoria', description='Filtrar por categoria (sem diferenciar acento/caixa)', required=False, type=str),
+        OpenApiParameter(name='marca', description='Filtrar por marca', required=False, type=str),
+        OpenApiParameter(name='cor', description='Filtrar por cor', required=False, type=str),
+        OpenApiParameter(name='preco_min', description='Preço mínimo', required=False, type=float),
+        OpenApiParameter(name='preco_max', description='Preço máximo', required=False, type=float),
+        OpenApiParameter(name='em_estoque', description='Apenas produtos com estoque (true/false)', required=False, type=bool),
+        OpenApiParameter(name='em_promocao', description='Apenas produtos em promoção (true/false)', required=False, type=bool),
+        OpenApiParameter(name='avaliacao_min', description='Avaliação mínima (0 a 5)', required=False, type=float),
+    ]
+
+    def __init__(self, params):
+        self.params = params
+
+    def _decimal(self, nome):
+        valor = self.params.get(nome)
+        if valor in (None, ''):
+            return None
+        try:
+            return Decimal(valor)
+        except InvalidOperation:
+            raise ValidationError({nome: 'Informe um número válido.'})
+
+    def _bool(self, nome):
+        valor = self.params.get(nome)
+        if valor in (None, ''):
+            return None
+        valor = valor.strip().lower()
+        if valor in VALORES_VERDADEIROS:
+            return True
+        if valor in VALORES_FALSOS:
+            return False
+        raise ValidationError({nome: 'Use true ou false.'})
+
+    def filter_queryset(self, queryset):
+        """
+        Aplica os filtros da query string.
+
+        Args:
+            queryset: QuerySet de Produto
+
+        Returns:
+            QuerySet: QuerySet filtrado
+
+        Raises:
+            ValidationError: Parâmetro com valor inválido (HTTP 400)
+        """
+        for origem, destino in Produto.SLUG_FIELDS.items():
+            valor = self.params.get(origem)
+            if valor:
+                queryset = queryset.filter(**{destino: Produto.normalize_slug(valor)})
+
+        preco_min = self._decimal('preco_min')
+        preco_max = self._decimal('preco_max')
+        avaliacao_min = self._decimal('avaliacao_min')
+        em_estoque = self._bool('em_estoque')
+        em_promocao = self._bool('em_promocao')
+
+        if preco_min is not None:
+            queryset = queryset.filter(preco__gte=preco_min)
+        if preco_max is not None:
+            queryset = queryset.filter(preco__lte=preco_max)
+        if avaliacao_min is not None:
+            queryset = queryset.filter(avaliacao__gte=avaliacao_min)
+
+        if em_estoque is True:
+            queryset = queryset.filter(estoque__gt=0)
+        elif em_estoque is False:
+            queryset = queryset.filter(estoque=0)
+
+        if em_promocao is True:
+            queryset = queryset.filter(preco_promocional__isnull=False)
+        elif em_promocao is False:
+            queryset = queryset.filter(preco_promocional__isnull=True)
+
+        return queryset
@@ -0,0 +1,142 @@
+import re
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from .models import Produto
+from .rag.index_store import CATALOGO_CAMPOS, catalogo_item
+
+# Busca por palavras-chave sem embedding (índice criado na migração 0006):
+# FTS5 com ranking BM25 no SQLite, tsvector + GIN no PostgreSQL.
+
+# Pesos do BM25 por coluna da tabela produtos_fts
+# (nome, marca, categoria, descricao, especificacoes)
+BM25_PESOS = (10.0, 5.0, 3.0, 1.0, 1.0)
+
+MARCA_INICIO = '<mark>'
+MARCA_FIM = '</mark>'
+TRECHO_PALAVRAS = 12
+
+PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+
+def fts5_query(texto: str):
+    """
+    Converte o texto do usuário em uma expressão MATCH do FTS5.
+
+    Cada palavra vira um termo entre aspas (operadores e aspas do usuário
+    não chegam ao FTS5, então não há erro de sintaxe) e todas precisam
+    aparecer. A última palavra casa por prefixo, para buscas enquanto o
+    usuário digita.
+
+    Returns:
+        str ou None: Expressão MATCH (None se não houver palavras)
+    """
+    palavras = PALAVRA.findall(texto or '')
+    if not palavras:
+        return None
+    termos = [f'"{p}"' for p in palavras]
+    termos[-1] += '*'
+    return ' '.join(termos)
+
+
+def _filtros_sql(filtros):
+    """Condições SQL (sobre o alias p = produtos) dos filtros da busca"""
+    condicoes, params = [], []
+    if filtros.get('categoria'):
+        condicoes.append('p.categoria_slug = %s')
+        params.append(Produto.normalize_slug(filtros['categoria']))
+    if filtros.get('preco_min') is not None:
+        condicoes.append('p.preco >= %s')
+        params.append(filtros['preco_min'])
+    if filtros.get('preco_max') is not None:
+        condicoes.append('p.preco <= %s')
+        params.append(filtros['preco_max'])
+    if filtros.get('em_estoque') is True:
+        condicoes.append('p.estoque > 0')
+    elif filtros.get('em_estoque') is False:
+        condicoes.append('p.estoque = 0')
+    return ''.join(f' AND {c}' for c in condicoes), params
+
+
+def _buscar_sqlite(cursor, texto, limit, filtros):
+    match = fts5_query(texto)
+    if match is None:
+        return []
+
+    where, params = _filtros_sql(filtros)
+    pesos = ', '.join(str(p) for p in BM25_PESOS)
+    cursor.execute(
+        f"SELECT p.id, bm25(produtos_fts, {pesos}) AS rank, "
+        f"snippet(produtos_fts, -1, %s, %s, '…', {TRECHO_PALAVRAS}) "
+        f"FROM produtos_fts JOIN produtos p ON p.id = produtos_fts.rowid "
+        f"WHERE produtos_fts MATCH %s{where} "
+        f"ORDER BY rank LIMIT %s",
+        [MARCA_INICIO, MARCA_FIM, match, *params, limit],
+    )
+    # bm25() do SQLite é negativo: quanto menor, mais relevante
+    return [(pid, -rank, trecho) for pid, rank, trecho in cursor.fetchall()]
+
+
+def _buscar_postgres(cursor, texto, limit, filtros):
+    if not PALAVRA.search(texto or ''):
+        return []
+
+    where, params = _filtros_sql(filtros)
+    opcoes = (
+        f'StartSel={MARCA_INICIO}, StopSel={MARCA_FIM}, '
+        f'MaxWords={TRECHO_PALAVRAS}, MinWords=4, FragmentDelimiter=…'
+    )
+    # O PostgreSQL não tem BM25: ts_rank_cd usa os pesos A-D da coluna busca
+    cursor.execute(
+        f"SELECT p.id, ts_rank_cd(p.busca, q) AS rank, "
+        f"ts_headline('portuguese', concat_ws(' ', p.nome, p.descricao, p.especificacoes), q, %s) "
+        f"FROM produtos p, websearch_to_tsquery('portuguese', %s) q "
+        f"WHERE p.busca @@ q{where} "
+        f"ORDER BY rank DESC LIMIT %s",
+        [opcoes, texto, *params, limit],
+    )
+    return [(pid, float(rank), trecho) for pid, rank, trecho in cursor.fetchall()]
+
+
+def search(texto: str, limit: int = 10, filtros: dict = None, using: str = DEFAULT_DB_ALIAS):
+    """
+    Busca textual de produtos, ordenada por relevância.
+
+    Args:
+        texto: Palavras-chave
+        limit: Número máximo de resultados
+        filtros: categoria, preco_min, preco_max, em_estoque (como na busca vetorial)
+        using: Alias do banco
+
+    Returns:
+        list: Produtos no formato do catálogo, com "score" (maior = mais
+        relevante) e "trecho" (snippet com os termos entre <mark>)
+
+    Raises:
+        NotImplementedError: Banco sem suporte (nem SQLite nem PostgreSQL)
+    """
+    conexao = connections[using]
+    buscar = {'sqlite': _buscar_sqlite, 'postgresql': _buscar_postgres}.get(conexao.vendor)
+    if buscar is None:
+        raise NotImplementedError(f'Busca textual não suportada em {conexao.vendor}')
+
+    with conexao.cursor() as cursor:
+        encontrados = buscar(cursor, texto, limit, filtros or {})
+    if not encontrados:
+        return []
+
+    linhas = {
+        row['id']: row
+        for row in Produto.objects.using(using)
+        .filter(pk__in=[pid for pid, _, _ in encontrados])
+        .values(*CATALOGO_CAMPOS)
+    }
+
+    resultados = []
+    for pid, score, trecho in encontrados:
+        if pid not in linhas:
+            continue  # Removido entre as duas consultas
+        produto = catalogo_item(linhas[pid])
+        produto['score'] = round(score, 6)
+        produto['trecho'] = trecho
+        resultados.append(produto)
+    return resultados
@@ -0,0 +1,325 @@
+import gc
+import json
+import math
+import os
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from meu_app_rag.rag.embeddings import Embeddings
+from meu_app_rag.rag.index_store import IndexStore
+from meu_app_rag.rag.reranker import FeatureReranker
+from meu_app_rag.rag.retriever import ProductRetriever
+from meu_app_rag.rag.vector_store import InMemoryVectorStore, ShardedVectorStore, PgVectorStore
+from meu_app_rag.rag.warmup import process_memory
+from config.settings_rag import BEDROCK_EMBEDDING_MODEL, RAG_PGVECTOR_EF_SEARCH
+
+# Parâmetros aceitos em --config (nome:chave=valor,chave=valor)
+PARAMETROS = {
+    'versao': str,        # Versão do IndexStore (padrão: a ativa)
+    'backend': str,       # memory, sharded ou pgvector
+    'shards': int,        # Processos do backend sharded
+    'ef_search': int,     # Candidatos do HNSW (pgvector)
+    'rerank': int,        # 1/0: re-ranking por avaliação, desconto e estoque
+    'candidatos': int,    # Candidatos antes do re-ranking/MMR
+    'threshold': float,   # Similaridade mínima
+    'gap': float,         # Maior salto de score entre vizinhos (0 desativa)
+    'mmr': float,         # λ do MMR (ausente = sem MMR)
+}
+
+EXEMPLO = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'consultas_avaliacao.jsonl')
+
+
+def recall_at_k(ids, relevantes: dict, k: int) -> float:
+    """Fração dos produtos relevantes que aparecem no top-k"""
+    return len(set(ids[:k]) & relevantes.keys()) / len(relevantes)
+
+
+def reciprocal_rank(ids, relevantes: dict) -> float:
+    """1 / posição do primeiro produto relevante (0 se nenhum aparece)"""
+    for posicao, pid in enumerate(ids, 1):
+        if pid in relevantes:
+            return 1 / posicao
+    return 0.0
+
+
+def ndcg_at_k(ids, relevantes: dict, k: int) -> float:
+    """nDCG@k com ganho 2^grau - 1 (graus de relevância do arquivo de consultas)"""
+    dcg = sum(
+        (2 ** relevantes.get(pid, 0) - 1) / math.log2(posicao + 1)
+        for posicao, pid in enumerate(ids[:k], 1)
+    )
+    ideal = sorted(relevantes.values(), reverse=True)[:k]
+    idcg = sum((2 ** grau - 1) / math.log2(posicao + 1) for posicao, grau in enumerate(ideal, 1))
+    return dcg / idcg if idcg else 0.0
+
+
+class QueryEmbeddings:
+    """
+    Embeddings das consultas, calculados uma vez por modelo.
+
+    Substitui ProductRetriever.embedding durante a avaliação: a latência
+    medida é só a da busca, e as configurações comparam os mesmos vetores.
+    """
+
+    def __init__(self, model_id: str, vetores: dict = None):
+        self.embeddings = Embeddings(batch=True)
+        self.embeddings.model_id = model_id
+        self.vetores = vetores if vetores is not None else {}
+
+    def embed(self, text: str, deadline=None):
+        if text not in self.vetores:
+            self.vetores[text] = np.asarray(self.embeddings.embed(text), dtype=np.float32)
+        return self.vetores[text]
+
+
+class Command(BaseCommand):
+    help = (
+        'Avalia a busca com consultas rotuladas (consulta → produtos relevantes): '
+        'recall@k, MRR, nDCG, latência p50/p95 e memória de uma ou mais configurações'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'consultas',
+            nargs='?',
+            default=EXEMPLO,
+            help='Arquivo JSONL: {"query": ..., "relevantes": [ids] ou {id: grau}, "filtros": {...}} '
+                 '(padrão: scripts/consultas_avaliacao.jsonl)',
+        )
+        parser.add_argument(
+            '--config',
+            action='append',
+            default=[],
+            help=f'Configuração a avaliar, repetível: nome:chave=valor,... '
+                 f'(chaves: {", ".join(PARAMETROS)}). Sem --config, avalia os settings atuais',
+        )
+        parser.add_argument('--k', default='5,10', help='Cortes do recall/nDCG, separados por vírgula')
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções medidas de cada consulta')
+        parser.add_argument(
+            '--min-recall',
+            type=float,
+            default=None,
+            help='Piso de recall no maior k: indica a configuração mais rápida (p95) que o atinge '
+                 'e falha se nenhuma atingir (uso em CI)',
+        )
+        parser.add_argument(
+            '--cache',
+            default=None,
+            help='Arquivo JSON com os embeddings das consultas (reaproveitado entre execuções, sem Bedrock)',
+        )
+        parser.add_argument('--json', dest='saida_json', default=None, help='Grava os resultados neste arquivo')
+
+    def handle(self, *args, **options):
+        try:
+            ks = sorted({int(k) for k in options['k'].split(',') if k.strip()})
+        except ValueError:
+            raise CommandError('--k deve ser uma lista de inteiros, ex.: 5,10')
+        if not ks or ks[0] < 1:
+            raise CommandError('--k deve conter valores >= 1')
+
+        consultas = self.carregar_consultas(options['consultas'])
+        configuracoes = [self.parse_config(texto) for texto in options['config']] or [('padrao', {})]
+        self.embeddings = self.carregar_cache(options['cache'])
+        self.index_store = IndexStore()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== AVALIAÇÃO DA BUSCA ({len(consultas)} consultas, top-{ks[-1]}, '
+            f'{options["repeat"]} execução(ões) medidas) ===\n'
+        ))
+        colunas = [f'recall@{k}' for k in ks] + ['MRR'] + [f'nDCG@{k}' for k in ks]
+        self.stdout.write(
+            f'{"configuração":<22}' + ''.join(f'{c:>10}' for c in colunas)
+            + f'{"p50 (ms)":>10}{"p95 (ms)":>10}{"memória":>11}'
+        )
+
+        resultados = []
+        for nome, config in configuracoes:
+            resultado = self.avaliar(nome, config, consultas, ks, options['repeat'])
+            resultados.append(resultado)
+
+            valores = [resultado['recall'][k] for k in ks] + [resultado['mrr']] + [resultado['ndcg'][k] for k in ks]
+            self.stdout.write(
+                f'{nome:<22}' + ''.join(f'{v:>10.3f}' for v in valores)
+                + f'{resultado["p50_ms"]:>10.2f}{resultado["p95_ms"]:>10.2f}'
+                + f'{resultado["memoria_bytes"] / 2**20:>8.1f} MB'
+            )
+
+        if options['cache']:
+            self.gravar_cache(options['cache'])
+        if options['saida_json']:
+            with open(options['saida_json'], 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f'\n💾 Resultados gravados em {options["saida_json"]}')
+
+        if options['min_recall'] is not None:
+            self.recomendar(resultados, ks[-1], options['min_recall'])
+
+    def carregar_consultas(self, path):
+        """Lê o JSONL de consultas rotuladas (relevantes: lista de ids ou {id: grau})"""
+        if not os.path.exists(path):
+            raise CommandError(f'Arquivo de consultas não encontrado: {path}')
+
+        consultas = []
+        with open(path, encoding='utf-8') as f:
+            for numero, linha in enumerate(f, 1):
+                if not linha.strip() or linha.lstrip().startswith('#'):
+                    continue
+                try:
+                    item = json.loads(linha)
+                    relevantes = item['relevantes']
+                    if isinstance(relevantes, dict):
+                        relevantes = {int(pid): float(grau) for pid, grau in relevantes.items()}
+                    else:
+                        relevantes = {int(pid): 1.0 for pid in relevantes}
+                    if not item['query'].strip() or not relevantes:
+                        raise ValueError('query e relevantes não podem ser vazios')
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    raise CommandError(f'{path}:{numero}: linha inválida ({e})')
+
+                consultas.append({
+                    'query': item['query'],
+                    'relevantes': relevantes,
+                    'filtros': item.get('filtros') or None,
+                })
+
+        if not consultas:
+            raise CommandError(f'Nenhuma consulta em {path}')
+        return consultas
+
+    def parse_config(self, texto):
+        """'nome:chave=valor,chave=valor' → (nome, {chave: valor})"""
+        if ':' in texto:
+            nome, _, parametros = texto.partition(':')
+        else:
+            # Só o nome (settings atuais) ou só os parâmetros (o nome é o próprio texto)
+            nome, parametros = texto, texto if '=' in texto else ''
+        config = {}
+        for par in filter(None, (p.strip() for p in parametros.split(','))):
+            chave, sep, valor = par.partition('=')
+            if not sep or chave not in PARAMETROS:
+                raise CommandError(f'Parâmetro inválido em --config {texto!r}: {par!r} (use {", ".join(PARAMETROS)})')
+            try:
+                config[chave] = PARAMETROS[chave](valor)
+            except ValueError:
+                raise CommandError(f'Valor inválido em --config {texto!r}: {par!r}')
+
+        backend = config.get('backend', 'memory')
+        if backend not in ('memory', 'sharded', 'pgvector'):
+            raise CommandError(f'backend inválido em --config {texto!r}: use memory, sharded ou pgvector')
+        return nome or 'padrao', config
+
+    def construir(self, config):
+        """Backend vetorial e retriever da configuração"""
+        backend = config.get('backend', 'memory')
+        if backend == 'pgvector':
+            store = PgVectorStore(ef_search=config.get('ef_search', RAG_PGVECTOR_EF_SEARCH))
+            model_id = BEDROCK_EMBEDDING_MODEL
+        else:
+            if backend == 'sharded':
+                store = ShardedVectorStore(
+                    self.index_store, shards=config.get('shards'), urls=[], timeout=60,
+                    version=config.get('versao'),
+                )
+            else:
+                store = InMemoryVectorStore(self.index_store, version=config.get('versao'))
+            # Consultas embutidas com o mesmo modelo da versão avaliada
+            model_id = (store.snapshot.manifest or {}).get('model_id') or BEDROCK_EMBEDDING_MODEL
+
+        retriever = ProductRetriever(vector_store=store)
+        if model_id not in self.embeddings:
+            self.embeddings[model_id] = QueryEmbeddings(model_id)
+        retriever.embedding = self.embeddings[model_id]
+
+        if 'rerank' in config:
+            retriever.reranker = FeatureReranker() if config['rerank'] else None
+        if 'candidatos' in config:
+            retriever.candidatos = config['candidatos']
+        if 'threshold' in config:
+            retriever.threshold = config['threshold']
+        if 'gap' in config:
+            retriever.max_gap = config['gap']
+        return store, retriever
+
+    def avaliar(self, nome, config, consultas, ks, repeat):
+        """Executa as consultas em uma configuração e calcula as métricas"""
+        gc.collect()
+        memoria_antes = process_memory()['rss_bytes'] or 0
+        try:
+            store, retriever = self.construir(config)
+        except Exception as e:
+            raise CommandError(f'Falha ao montar a configuração {nome!r}: {e}')
+        memoria_depois = process_memory()['rss_bytes'] or 0
+
+        limit = ks[-1]
+        mmr_lambda = config.get('mmr')
+
+        def buscar(consulta):
+            produtos = retriever.retrieve(
+                consulta['query'], limit=limit, filtros=consulta['filtros'], mmr_lambda=mmr_lambda
+            )
+            return [produto['id'] for produto in produtos]
+
+        try:
+            # Passada sem medir: embeddings das consultas, caches e JIT do BLAS
+            ranking = [buscar(consulta) for consulta in consultas]
+
+            latencias = []
+            for _ in range(max(1, repeat)):
+                for consulta in consultas:
+                    inicio = time.perf_counter()
+                    buscar(consulta)
+                    latencias.append(time.perf_counter() - inicio)
+            descricao = store.describe()
+        finally:
+            if hasattr(store, 'close'):
+                store.close()
+
+        latencias = np.asarray(latencias) * 1000
+        return {
+            'configuracao': nome,
+            'parametros': config,
+            'versao': descricao.get('versao'),
+            'recall': {k: float(np.mean([recall_at_k(ids, c['relevantes'], k) for ids, c in zip(ranking, consultas)])) for k in ks},
+            'mrr': float(np.mean([reciprocal_rank(ids, c['relevantes']) for ids, c in zip(ranking, consultas)])),
+            'ndcg': {k: float(np.mean([ndcg_at_k(ids, c['relevantes'], k) for ids, c in zip(ranking, consultas)])) for k in ks},
+            'p50_ms': float(np.percentile(latencias, 50)),
+            'p95_ms': float(np.percentile(latencias, 95)),
+            # Vetores do índice (no sharded, mapeados em memória e compartilhados
+            # com os shards) ou, sem essa informação, o crescimento do RSS
+            'memoria_bytes': descricao.get('vetores_bytes') or max(0, memoria_depois - memoria_antes),
+            'rss_delta_bytes': max(0, memoria_depois - memoria_antes),
+        }
+
+    def recomendar(self, resultados, k, piso):
+        """Indica a configuração mais rápida (p95) com recall@k >= piso"""
+        aprovadas = [r for r in resultados if r['recall'][k] >= piso]
+        if not aprovadas:
+            raise CommandError(f'Nenhuma configuração atingiu recall@{k} >= {piso}')
+
+        melhor = min(aprovadas, key=lambda r: r['p95_ms'])
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Mais rápida com recall@{k} >= {piso}: {melhor["configuracao"]} '
+            f'(recall {melhor["recall"][k]:.3f}, p95 {melhor["p95_ms"]:.2f} ms)'
+        ))
+
+    def carregar_cache(self, path):
+        """{model_id: QueryEmbeddings} a partir do arquivo de cache (se existir)"""
+        if not path or not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            dados = json.load(f)
+        return {
+            model_id: QueryEmbeddings(model_id, {
+                texto: np.asarray(vetor, dtype=np.float32) for texto, vetor in vetores.items()
+            })
+            for model_id, vetores in dados.items()
+        }
+
+    def gravar_cache(self, path):
+        dados = {
+            model_id: {texto: vetor.tolist() for texto, vetor in cache.vetores.items()}
+            for model_id, cache in self.embeddings.items()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dados, f)
@@ -0,0 +1,125 @@
+import time
+import shutil
+import tempfile
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from meu_app_rag.rag.index_store import IndexStore
+from meu_app_rag.rag.vector_store import InMemoryVectorStore, ShardedVectorStore
+
+CATEGORIAS = ['calcados', 'roupas', 'eletronicos', 'casa', 'esportes', 'beleza', 'livros', 'brinquedos']
+
+
+class Command(BaseCommand):
+    help = 'Compara a latência da busca vetorial em memória com 1/2/4/8 shards (índice sintético)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shards',
+            default='1,2,4,8',
+            help='Números de shards a comparar, separados por vírgula',
+        )
+        parser.add_argument('--products', type=int, default=200_000, help='Produtos do índice sintético')
+        parser.add_argument('--dims', type=int, default=1024, help='Dimensão dos vetores')
+        parser.add_argument('--queries', type=int, default=200, help='Buscas medidas por configuração')
+        parser.add_argument('--limit', type=int, default=30, help='Top-k de cada busca')
+        parser.add_argument(
+            '--filtros',
+            action='store_true',
+            help='Aplica filtro de categoria e preço em metade das buscas',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            configuracoes = [int(n) for n in options['shards'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError('--shards deve ser uma lista de inteiros, ex.: 1,2,4,8')
+        if not configuracoes or min(configuracoes) < 1:
+            raise CommandError('--shards deve conter valores >= 1')
+
+        rng = np.random.default_rng(options['seed'])
+        raiz = tempfile.mkdtemp(prefix='rag-bench-shards-')
+
+        try:
+            store = self.construir_indice(raiz, options['products'], options['dims'], rng)
+
+            consultas = rng.standard_normal((options['queries'], options['dims'])).astype(np.float32)
+            filtros = [
+                {'categoria': CATEGORIAS[i % len(CATEGORIAS)], 'preco_max': 500.0}
+                if options['filtros'] and i % 2 else None
+                for i in range(len(consultas))
+            ]
+
+            self.stdout.write(self.style.SUCCESS(
+                f'\n=== BENCHMARK DE SHARDS ({options["products"]} produtos, {options["dims"]} dims, '
+                f'top-{options["limit"]}, {len(consultas)} buscas) ===\n'
+            ))
+            self.stdout.write(f'{"configuração":<16}{"p50 (ms)":>10}{"p95 (ms)":>10}{"QPS":>9}{"recall":>9}')
+
+            base = InMemoryVectorStore(store)
+            referencia = self.medir('memória', base, consultas, filtros, options['limit'])
+
+            for n in configuracoes:
+                sharded = ShardedVectorStore(store, shards=n, urls=[], timeout=60)
+                try:
+                    self.medir(f'{n} shard(s)', sharded, consultas, filtros, options['limit'], referencia)
+                finally:
+                    sharded.close()
+        finally:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+    def construir_indice(self, raiz, produtos, dims, rng):
+        """Publica um índice com produtos e vetores aleatórios em um IndexStore temporário"""
+        self.stdout.write(f'🏗️ Gerando índice sintético em {raiz}...')
+        store = IndexStore(raiz)
+        build = store.new_build()
+
+        bloco = 10_000
+        for inicio in range(0, produtos, bloco):
+            build.append_catalogo([
+                {
+                    'id': pid,
+                    'nome': f'Produto {pid}',
+                    'categoria': CATEGORIAS[pid % len(CATEGORIAS)],
+                    'preco': float(rng.uniform(10, 1000)),
+                    'estoque': int(rng.integers(0, 50)),
+                }
+                for pid in range(inicio + 1, min(inicio + bloco, produtos) + 1)
+            ])
+        build.finish_catalogo()
+
+        vetores = rng.standard_normal((produtos, dims)).astype(np.float32)
+        build.write_vectors(np.arange(1, produtos + 1), vetores)
+        del vetores
+
+        store.publish(build, model_id='sintetico')
+        return store
+
+    def medir(self, nome, vector_store, consultas, filtros, limit, referencia=None):
+        """Executa as buscas em sequência e imprime p50/p95/QPS e o recall contra a referência"""
+        # Aquecimento (page cache, BLAS, processos dos shards)
+        for q in consultas[:5]:
+            vector_store.search(q, limit)
+
+        tempos, resultados = [], []
+        inicio = time.perf_counter()
+        for q, f in zip(consultas, filtros):
+            t0 = time.perf_counter()
+            produtos = vector_store.search(q, limit, filtros=f)
+            tempos.append(time.perf_counter() - t0)
+            resultados.append([p['id'] for p in produtos])
+        total = time.perf_counter() - inicio
+
+        recall = ''
+        if referencia is not None:
+            acertos = sum(len(set(r) & set(ref)) for r, ref in zip(resultados, referencia))
+            esperados = sum(len(ref) for ref in referencia) or 1
+            recall = f'{acertos / esperados:.3f}'
+
+        ms = np.array(tempos) * 1000
+        self.stdout.write(
+            f'{nome:<16}{np.percentile(ms, 50):>10.2f}{np.percentile(ms, 95):>10.2f}'
+            f'{len(consultas) / total:>9.1f}{recall:>9}'
+        )
+        return resultados
@@ -0,0 +1,91 @@
+import re
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from meu_app_rag.models import Produto
+from meu_app_rag.filters import ProdutoFilter
+from meu_app_rag.pagination import ProdutoCursorPagination
+
+
+class Command(BaseCommand):
+    help = 'Mostra o plano de execução (EXPLAIN) dos filtros de produtos e verifica o uso de índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--categoria',
+            help='Categoria usada nos cenários (padrão: a primeira do banco)',
+        )
+        parser.add_argument(
+            '--verbose-plan',
+            action='store_true',
+            help='Exibe o plano completo de cada cenário',
+        )
+
+    def cenarios(self, categoria):
+        """Combinações de filtros mais comuns na listagem"""
+        return [
+            ('categoria', {'categoria': categoria}),
+            ('categoria + preço', {'categoria': categoria, 'preco_min': '50', 'preco_max': '300'}),
+            ('categoria + em estoque', {'categoria': categoria, 'em_estoque': 'true'}),
+            ('marca', {'marca': 'x'}),
+            ('cor', {'cor': 'preto'}),
+        ]
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+
+        categoria = options.get('categoria') or (
+            Produto.objects.exclude(categoria='').values_list('categoria', flat=True).first()
+            or 'calcados'
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== PLANO DOS FILTROS ({vendor}) — categoria="{categoria}" ===\n'
+        ))
+
+        falhas = 0
+        ordering = ProdutoCursorPagination.ordering
+
+        for nome, params in self.cenarios(categoria):
+            queryset = ProdutoFilter(params).filter_queryset(Produto.objects.all())
+            queryset = queryset.order_by(*ordering)[:ProdutoCursorPagination.page_size]
+            plano = self.explain(queryset, vendor)
+            indices = self.indices_usados(plano, vendor)
+
+            if indices:
+                self.stdout.write(self.style.SUCCESS(f'✔ {nome}: {", ".join(indices)}'))
+            else:
+                falhas += 1
+                self.stdout.write(self.style.ERROR(f'✖ {nome}: varredura completa da tabela'))
+
+            if options.get('verbose_plan') or not indices:
+                for linha in plano.splitlines():
+                    self.stdout.write(f'    {linha}')
+
+        if falhas:
+            self.stdout.write(self.style.WARNING(f'\n⚠️ {falhas} cenário(s) sem índice.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✅ Todos os cenários usam índices.'))
+
+    def explain(self, queryset, vendor):
+        """
+        Executa EXPLAIN para o queryset.
+
+        No PostgreSQL desliga seq scan dentro de uma transação para verificar
+        se o índice é utilizável mesmo com tabelas pequenas (onde o planner
+        prefere varrer a tabela).
+        """
+        if vendor == 'postgresql':
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def indices_usados(self, plano, vendor):
+        """Extrai os nomes dos índices citados no plano"""
+        if vendor == 'postgresql':
+            padrao = r'Index(?: Only)? Scan(?: Backward)? using (\w+)|Bitmap Index Scan on (\w+)'
+        else:
+            padrao = r'USING (?:COVERING )?INDEX (\w+)()'
+        return sorted({a or b for a, b in re.findall(padrao, plano)})
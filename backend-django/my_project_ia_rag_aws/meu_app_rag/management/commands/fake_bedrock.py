@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+
+from meu_app_rag.rag.fake_bedrock import FakeBedrock, serve
+from meu_app_rag.rag.index_store import IndexStore
+
+
+class Command(BaseCommand):
+    help = (
+        'Bedrock Runtime local para testes de carga (embeddings e Claude, com latência, '
+        'throttling e streaming de tokens). Use com BEDROCK_ENDPOINT_URL=http://host:porta'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8200)
+        parser.add_argument('--embedding-ms', type=float, default=40, help='Latência de um embedding')
+        parser.add_argument('--latencia-ms', type=float, default=400, help='Tempo até o primeiro token da geração')
+        parser.add_argument('--token-ms', type=float, default=15, help='Tempo por token de saída')
+        parser.add_argument('--tokens-saida', type=int, default=150, help='Tokens por resposta (limitado por max_tokens)')
+        parser.add_argument('--jitter', type=float, default=0.2, help='Variação das latências (fração, ±)')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fração das chamadas respondidas com 429')
+        parser.add_argument(
+            '--max-concorrencia',
+            type=int,
+            default=0,
+            help='Chamadas simultâneas acima disso recebem 429 (0 = sem limite)',
+        )
+        parser.add_argument(
+            '--sem-indice',
+            action='store_true',
+            help='Embeddings pseudoaleatórios em vez de derivados do índice ativo',
+        )
+
+    def handle(self, *args, **options):
+        snapshot = None
+        if not options['sem_indice']:
+            try:
+                snapshot = IndexStore().load()
+            except Exception as e:
+                self.stderr.write(f'⚠️ Aviso: índice indisponível ({e}); embeddings pseudoaleatórios')
+
+        fake = FakeBedrock(
+            embedding_ms=options['embedding_ms'],
+            latencia_ms=options['latencia_ms'],
+            token_ms=options['token_ms'],
+            tokens_saida=options['tokens_saida'],
+            jitter=options['jitter'],
+            throttle_rate=options['throttle_rate'],
+            max_concorrencia=options['max_concorrencia'],
+            snapshot=snapshot,
+        )
+        server = serve(fake, options['host'], options['port'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Bedrock simulado em http://{options["host"]}:{options["port"]} '
+            f'(geração ~{options["latencia_ms"]:.0f} ms + {options["token_ms"]:.0f} ms/token, '
+            f'throttling {options["throttle_rate"]:.0%}, {fake.dims} dimensões)'
+        ))
+        self.stdout.write(
+            f'   No Django: BEDROCK_ENDPOINT_URL=http://{options["host"]}:{options["port"]} '
+            f'(credenciais AWS quaisquer, ex.: AWS_ACCESS_KEY_ID=fake)'
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
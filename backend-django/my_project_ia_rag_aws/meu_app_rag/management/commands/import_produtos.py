@@ -0,0 +1,271 @@
+import os
+import csv
+import json
+import time
+from itertools import islice
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from meu_app_rag.models import Produto
+from meu_app_rag.serializers import ProdutoImportSerializer
+
+# Campos sobrescritos quando o produto (chave_importacao) já existe
+CAMPOS_ATUALIZAVEIS = [
+    f.name for f in Produto._meta.concrete_fields
+    if f.name not in ('id', 'chave_importacao', 'data_cadastro')
+]
+
+
+def chave_da_linha(dados):
+    """Chave de importação da linha: coluna `chave` ou, na falta dela, o nome"""
+    for campo in ('chave', 'nome'):
+        valor = dados.get(campo)
+        if isinstance(valor, (str, int)) and str(valor).strip():
+            return str(valor).strip()
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa produtos de arquivos JSONL/CSV em blocos, com upsert pela chave '
+        '(coluna "chave" ou, na falta dela, o nome)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo .jsonl ou .csv')
+        parser.add_argument(
+            '--format',
+            choices=['jsonl', 'csv'],
+            help='Formato do arquivo (padrão: pela extensão)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Linhas validadas e gravadas por transação',
+        )
+        parser.add_argument(
+            '--max-errors',
+            type=int,
+            default=0,
+            help='Interrompe após N linhas inválidas (0 = sem limite)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas valida e conta, sem gravar no banco',
+        )
+        parser.add_argument(
+            '--reembed',
+            action='store_true',
+            help='Ao final, gera embeddings apenas dos produtos novos/alterados (popular_embeddings --incremental)',
+        )
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo']
+        if not os.path.isfile(arquivo):
+            raise CommandError(f'Arquivo não encontrado: {arquivo}')
+
+        formato = options.get('format') or (
+            'csv' if arquivo.lower().endswith('.csv') else 'jsonl'
+        )
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== IMPORTAÇÃO DE PRODUTOS ({formato}{", dry-run" if dry_run else ""}) ===\n'
+        ))
+
+        self.stats = {
+            'lidas': 0, 'invalidas': 0,
+            'criadas': 0, 'atualizadas': 0, 'inalteradas': 0,
+        }
+        inicio = time.perf_counter()
+
+        with open(arquivo, newline='', encoding='utf-8-sig') as f:
+            linhas = self.ler_csv(f) if formato == 'csv' else self.ler_jsonl(f)
+
+            while True:
+                bloco = list(islice(linhas, chunk_size))
+                if not bloco:
+                    break
+
+                self.processar_bloco(bloco, dry_run)
+
+                decorrido = time.perf_counter() - inicio
+                self.stdout.write(
+                    f'  {self.stats["lidas"]} linhas — '
+                    f'{self.stats["lidas"] / decorrido:.0f} linhas/s'
+                )
+
+                if options['max_errors'] and self.stats['invalidas'] >= options['max_errors']:
+                    raise CommandError(
+                        f'Limite de {options["max_errors"]} linhas inválidas atingido.'
+                    )
+
+        decorrido = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Importação concluída em {decorrido:.2f}s '
+            f'({self.stats["lidas"] / decorrido if decorrido else 0:.0f} linhas/s)\n'
+            f'  - Lidas: {self.stats["lidas"]}\n'
+            f'  - Criadas: {self.stats["criadas"]}\n'
+            f'  - Atualizadas: {self.stats["atualizadas"]}\n'
+            f'  - Inalteradas: {self.stats["inalteradas"]}\n'
+            f'  - Inválidas: {self.stats["invalidas"]}\n'
+        ))
+
+        alterados = self.stats['criadas'] + self.stats['atualizadas']
+        if options['reembed'] and alterados and not dry_run:
+            self.stdout.write('\n🧠 Atualizando embeddings dos produtos alterados...')
+            call_command(
+                'popular_embeddings',
+                incremental=True,
+                stdout=self.stdout,
+                stderr=self.stderr,
+            )
+
+    def ler_jsonl(self, f):
+        """Gera (número da linha, dados, erro) de um arquivo JSONL"""
+        for numero, linha in enumerate(f, 1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            try:
+                dados = json.loads(linha)
+            except json.JSONDecodeError as e:
+                yield numero, None, f'JSON inválido: {e}'
+                continue
+            if not isinstance(dados, dict):
+                yield numero, None, 'Cada linha deve ser um objeto JSON'
+                continue
+            yield numero, dados, None
+
+    def ler_csv(self, f):
+        """Gera (número da linha, dados, erro) de um CSV com cabeçalho"""
+        reader = csv.DictReader(f)
+        for dados in reader:
+            # Células vazias = campo não informado
+            dados = {
+                k.strip(): v.strip() for k, v in dados.items()
+                if k and v is not None and v.strip() != ''
+            }
+            yield reader.line_num, dados, None
+
+    def processar_bloco(self, bloco, dry_run):
+        """Valida um bloco de linhas e grava os produtos novos/alterados em uma transação"""
+        # chave -> nome da linha
+        chaves = {
+            chave_da_linha(dados): dados.get('nome')
+            for _, dados, erro in bloco if erro is None
+        }
+        chaves.pop(None, None)
+        existentes = {
+            row['chave_importacao']: row
+            for row in Produto.objects.filter(chave_importacao__in=chaves).values()
+        }
+        adotados = self.produtos_sem_chave({
+            chave: nome for chave, nome in chaves.items() if chave not in existentes
+        })
+        existentes.update(adotados)
+
+        validos = {}
+        for numero, dados, erro in bloco:
+            self.stats['lidas'] += 1
+
+            if erro is None:
+                # Produto existente: só os campos presentes na linha são obrigatórios
+                parcial = chave_da_linha(dados) in existentes
+                serializer = ProdutoImportSerializer(data=dados, partial=parcial)
+                if serializer.is_valid():
+                    validado = dict(serializer.validated_data)
+                    chave = validado.pop('chave', None) or validado['nome']
+                    # A mesma chave repetida no bloco: a última linha vence
+                    validos[chave] = (numero, validado)
+                    continue
+                erro = '; '.join(
+                    f'{campo}: {" ".join(str(m) for m in mensagens)}'
+                    for campo, mensagens in serializer.errors.items()
+                )
+
+            self.registrar_erro(numero, erro)
+
+        produtos = []
+        for chave, (numero, dados) in validos.items():
+            atual = existentes.get(chave)
+
+            if atual is None:
+                mesclado = dict(dados, chave_importacao=chave)
+                contador = 'criadas'
+            else:
+                if all(atual.get(campo) == valor for campo, valor in dados.items()):
+                    self.stats['inalteradas'] += 1
+                    continue
+                # Campos ausentes na linha mantêm o valor atual
+                mesclado = {campo: atual[campo] for campo in CAMPOS_ATUALIZAVEIS}
+                mesclado.update(dados, chave_importacao=chave)
+                contador = 'atualizadas'
+
+            preco_promocional = mesclado.get('preco_promocional')
+            if preco_promocional and preco_promocional >= mesclado['preco']:
+                self.registrar_erro(numero, 'Preço promocional deve ser menor que o preço normal')
+                continue
+
+            produto = Produto(**mesclado)
+            produto.fill_slugs()
+            produtos.append(produto)
+            self.stats[contador] += 1
+
+        if dry_run or not (produtos or adotados):
+            return
+
+        with transaction.atomic():
+            # Produtos da API/admin reconhecidos pelo nome passam a ter a chave,
+            # para que o upsert abaixo os atualize em vez de duplicá-los
+            Produto.objects.bulk_update(
+                [Produto(pk=row['id'], chave_importacao=chave) for chave, row in adotados.items()],
+                ['chave_importacao'],
+            )
+            if produtos:
+                Produto.objects.bulk_create(
+                    produtos,
+                    update_conflicts=True,
+                    unique_fields=['chave_importacao'],
+                    update_fields=CAMPOS_ATUALIZAVEIS,
+                )
+
+    def produtos_sem_chave(self, pendentes):
+        """
+        Produtos sem chave de importação (criados pela API/admin) com o mesmo
+        nome de uma linha cuja chave ainda não existe no banco.
+
+        Só nomes sem ambiguidade (um produto e uma chave por nome); nos
+        demais casos o arquivo cria um produto novo.
+
+        Args:
+            pendentes: dict chave -> nome da linha
+
+        Returns:
+            dict: chave -> linha de `.values()` do produto
+        """
+        por_nome = {}
+        for chave, nome in pendentes.items():
+            if isinstance(nome, str) and nome.strip():
+                por_nome.setdefault(nome.strip(), []).append(chave)
+        if not por_nome:
+            return {}
+
+        encontrados = {}
+        for row in Produto.objects.filter(chave_importacao__isnull=True, nome__in=por_nome).values():
+            encontrados[row['nome']] = None if row['nome'] in encontrados else row
+
+        return {
+            por_nome[nome][0]: row
+            for nome, row in encontrados.items()
+            if row is not None and len(por_nome[nome]) == 1
+        }
+
+    def registrar_erro(self, numero, erro):
+        self.stats['invalidas'] += 1
+        self.stdout.write(self.style.ERROR(f'  ✖ Linha {numero}: {erro}'))
@@ -0,0 +1,111 @@
+import os
+import re
+import sys
+import subprocess
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Módulos medidos por padrão: o que todo processo carrega (urls → views)
+# e o pipeline RAG, importado sob demanda
+MODULOS_PADRAO = [
+    'meu_app_rag.urls',
+    'meu_app_rag.rag.retriever',
+    'meu_app_rag.rag.generator',
+]
+
+MARCADOR = '--import-report--'
+
+SCRIPT = f'''
+import sys, django
+django.setup()
+sys.stderr.write("{MARCADOR}\\n")
+sys.stderr.flush()
+# __import__ passa pelo import em C, que é o que o -X importtime mede
+__import__(sys.argv[1])
+'''
+
+LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = 'Mostra o custo de import de cada módulo (python -X importtime), descontado o django.setup()'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'modulos',
+            nargs='*',
+            help=f'Módulos a medir (padrão: {", ".join(MODULOS_PADRAO)})',
+        )
+        parser.add_argument('--top', type=int, default=10, help='Dependências mais caras listadas por módulo')
+        parser.add_argument('--repeat', type=int, default=3, help='Execuções por módulo (vale a mais rápida)')
+        parser.add_argument(
+            '--max-ms',
+            type=float,
+            default=0,
+            help='Falha se algum módulo passar deste tempo (0 = sem limite), para uso em CI',
+        )
+
+    def handle(self, *args, **options):
+        modulos = options['modulos'] or MODULOS_PADRAO
+
+        self.stdout.write(self.style.SUCCESS('\n=== TEMPO DE IMPORT (após django.setup()) ===\n'))
+
+        acima = []
+        for modulo in modulos:
+            execucoes = [self.medir(modulo) for _ in range(max(1, options['repeat']))]
+            total, dependencias = min(execucoes, key=lambda e: e[0])
+
+            if total == 0:
+                self.stdout.write(f'{modulo:<48} já carregado pelo django.setup()')
+                continue
+
+            estilo = self.style.ERROR if options['max_ms'] and total > options['max_ms'] else self.style.SUCCESS
+            self.stdout.write(estilo(f'{modulo:<48}{total:>10.1f} ms'))
+            for nome, nivel, cumulativo in dependencias[:options['top']]:
+                self.stdout.write(f'  {"  " * (nivel - 1)}{nome:<{46 - 2 * (nivel - 1)}}{cumulativo:>10.1f} ms')
+            self.stdout.write('')
+
+            if options['max_ms'] and total > options['max_ms']:
+                acima.append(f'{modulo} ({total:.0f} ms)')
+
+        if acima:
+            raise CommandError(f'Acima de {options["max_ms"]:.0f} ms: {", ".join(acima)}')
+
+    def medir(self, modulo):
+        """
+        Importa o módulo em um processo novo com -X importtime.
+
+        Returns:
+            tuple: (ms do módulo, [(dependência, nível, ms cumulativo)] das
+            mais caras para as mais baratas)
+        """
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        resultado = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT, modulo],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if resultado.returncode != 0:
+            erro = resultado.stderr.strip().splitlines()[-1:] or ['?']
+            raise CommandError(f'Falha ao importar {modulo}: {erro[0]}')
+
+        # Só conta o que foi importado depois do django.setup()
+        saida = resultado.stderr.split(MARCADOR, 1)[-1].splitlines()
+
+        total = 0.0
+        dependencias = []
+        for linha in saida:
+            m = LINHA.match(linha)
+            if not m:
+                continue
+            cumulativo = int(m.group(2)) / 1000
+            nivel = len(m.group(3)) // 2
+            if m.group(4) == modulo:
+                total = cumulativo
+            elif nivel > 0:
+                dependencias.append((m.group(4), nivel, cumulativo))
+
+        dependencias.sort(key=lambda d: d[2], reverse=True)
+        return total, dependencias
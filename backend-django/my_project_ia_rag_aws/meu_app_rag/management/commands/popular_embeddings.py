@@ -1,13 +1,20 @@
 import os
-import pickle
-import numpy as np
+import time
 from unidecode import unidecode
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connection
 
 from meu_app_rag.models import Produto
 from meu_app_rag.rag.embeddings import Embeddings
-from config.settings_rag import CATALOGO_PKL, VECTORS_PKL, DATA_DIR
+from meu_app_rag.rag.index_store import IndexStore, CATALOGO_CAMPOS, catalogo_item
+from meu_app_rag.rag.resilience import CircuitOpenError
+from meu_app_rag.rag.vector_store import PgVectorStore
+from config.settings_rag import (
+    DATA_DIR,
+    BEDROCK_EMBEDDING_MODEL,
+    RAG_EMBEDDING_CHUNK_SIZE,
+    RAG_VECTOR_BACKEND,
+)
 
 
 class Command(BaseCommand):
@@ -17,7 +24,38 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Força regeneração mesmo se arquivos existirem',
+            help='Força regeneração mesmo se já existir um índice ativo',
+        )
+        parser.add_argument(
+            '--no-activate',
+            action='store_true',
+            help='Publica a nova versão sem ativá-la (ative depois com --activate)',
+        )
+        parser.add_argument(
+            '--activate',
+            metavar='VERSAO',
+            help='Apenas ativa uma versão já publicada (rollback/promoção)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Retoma o último build interrompido, pulando produtos já processados',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=RAG_EMBEDDING_CHUNK_SIZE,
+            help='Embeddings por bloco gravado no checkpoint',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Reaproveita os vetores da versão ativa e gera apenas os de produtos novos ou alterados',
+        )
+        parser.add_argument(
+            '--allow-partial',
+            action='store_true',
+            help='Publica o índice mesmo se alguns produtos falharem',
         )
 
     def handle(self, *args, **options):
@@ -28,37 +66,229 @@ class Command(BaseCommand):
         # Criar diretório se não existir
         os.makedirs(DATA_DIR, exist_ok=True)
         
-        # Verificar se arquivos já existem
-        if os.path.exists(CATALOGO_PKL) and os.path.exists(VECTORS_PKL) and not force:
+        store = IndexStore()
+        
+        # Apenas trocar a versão ativa
+        if options.get('activate'):
+            store.activate(options['activate'])
             self.stdout.write(
-                self.style.WARNING(
-                    'Arquivos já existem. Use --force para regenerar.'
-                )
+                self.style.SUCCESS(f'✔ Versão ativa: {options["activate"]}')
             )
+            self.sincronizar_pgvector(store, options['activate'], options['chunk_size'])
             return
         
-        # 1. Exportar catálogo
-        self.stdout.write('\n📦 Exportando catálogo...')
-        self.exportar_catalogo()
+        build = None
+        reaproveitar = None
+        
+        # Retomar build interrompido
+        if options.get('resume'):
+            pendentes = store.resumable_builds()
+            if pendentes:
+                build = store.open_build(pendentes[-1])
+                self.stdout.write(f'\n↻ Retomando build {build.version}')
+            else:
+                self.stdout.write(
+                    self.style.WARNING('Nenhum build interrompido encontrado; iniciando um novo.')
+                )
+        
+        if build is None:
+            # Verificar se já existe índice ativo
+            atual = store.current_version()
+            incremental = options.get('incremental')
+            if atual and not force and not options.get('resume') and not incremental:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f'Índice já existe (versão {atual}). Use --force para regenerar.'
+                    )
+                )
+                return
+            
+            # Cada build é gravado em um diretório próprio (staging)
+            build = store.new_build()
+            
+            # Vetores da versão ativa que continuam válidos
+            if incremental:
+                reaproveitar = self.embeddings_reaproveitaveis(store)
+        
+        # 1. Exportar catálogo e 2. gerar embeddings, em streaming: cada bloco
+        #    lido do banco é gravado no catálogo e segue direto para o
+        #    pipeline (checkpoint em blocos; o build fica em staging se o
+        #    processo for interrompido)
+        self.stdout.write('\n📦 Exportando catálogo e 🧠 gerando embeddings...')
+        try:
+            produtos = self.exportar_catalogo(build, options['chunk_size'])
+            falhas = self.gerar_embeddings(build, produtos, options['chunk_size'], reaproveitar)
+        except BaseException:
+            self.stderr.write(
+                f'\n✖ Build interrompido. Progresso salvo em {build.path}\n'
+                'Execute novamente com --resume para continuar.'
+            )
+            raise
         
-        # 2. Gerar embeddings
-        self.stdout.write('\n🧠 Gerando embeddings...')
-        self.gerar_embeddings()
+        if falhas and not options.get('allow_partial'):
+            # Status != 0: cron, CI e import_produtos --reembed não podem
+            # tratar um build incompleto como sucesso
+            raise CommandError(
+                f'✖ {falhas} produto(s) sem embedding. Build mantido em {build.path}\n'
+                'Execute novamente com --resume (ou use --allow-partial para publicar assim).'
+            )
+        
+        # Montar índice final a partir do checkpoint (vazio se não houver
+        # produtos, para evitar erro no retriever). Só depois da checagem de
+        # falhas: o checkpoint é consumido e o --resume depende dele
+        salvos = build.assemble(options['chunk_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✔ {salvos}/{self.contagem["exportados"]} embeddings salvos')
+        )
+        
+        # 3. Publicar (manifest + troca atômica da versão ativa)
+        ativar = not options.get('no_activate')
+        manifest = store.publish(build, model_id=BEDROCK_EMBEDDING_MODEL, activate=ativar)
+        if ativar:
+            self.sincronizar_pgvector(store, manifest['version'], options['chunk_size'])
         
         self.stdout.write(
             self.style.SUCCESS(
                 '\n✅ Processo concluído!\n'
-                'Arquivos gerados:\n'
-                f'  - {CATALOGO_PKL}\n'
-                f'  - {VECTORS_PKL}\n'
+                f'Versão: {manifest["version"]}'
+                f'{" (ativa)" if ativar else " (não ativada)"}\n'
+                f'  - Produtos: {manifest["product_count"]}\n'
+                f'  - Dimensões: {manifest["dims"]}\n'
+                f'  - Diretório: {store.version_path(manifest["version"])}\n'
             )
         )
 
-    def exportar_catalogo(self):
-        """Exporta produtos do banco para arquivo pickle"""
-        produtos = Produto.objects.all()
+    def exportar_catalogo(self, build, chunk_size=RAG_EMBEDDING_CHUNK_SIZE):
+        """
+        Exporta os produtos do banco para o catálogo do build, em streaming.
+        
+        Produtos já exportados por um build retomado são relidos do
+        catálogo parcial; os demais são buscados em páginas de `chunk_size`
+        por id (`.values().iterator()`), gravados no catálogo e só então
+        repassados ao chamador. O catálogo nunca fica inteiro em memória e
+        nenhum cursor fica aberto enquanto os embeddings são gerados.
         
-        if not produtos.exists():
+        Yields:
+            dict: Produto exportado
+        """
+        ultimo_id = None
+        for produto in build.iter_catalogo():
+            ultimo_id = produto['id']
+            yield produto
+        
+        if build.has_catalogo():
+            return
+        
+        queryset = Produto.objects.order_by('id').values(*CATALOGO_CAMPOS)
+        
+        while True:
+            pagina = queryset if ultimo_id is None else queryset.filter(id__gt=ultimo_id)
+            bloco = [
+                catalogo_item(row)
+                for row in pagina[:chunk_size].iterator(chunk_size=chunk_size)
+            ]
+            if not bloco:
+                break
+            
+            build.append_catalogo(bloco)
+            ultimo_id = bloco[-1]['id']
+            yield from bloco
+        
+        build.finish_catalogo()
+
+    def sincronizar_pgvector(self, store, version, chunk_size):
+        """Copia a versão ativada para produto_embeddings quando RAG_VECTOR_BACKEND='pgvector'"""
+        if RAG_VECTOR_BACKEND != 'pgvector':
+            return
+        
+        self.stdout.write('\n🐘 Sincronizando embeddings com o pgvector...')
+        total = PgVectorStore().sync(store.load(version), chunk_size)
+        self.stdout.write(self.style.SUCCESS(f'✔ {total} embeddings sincronizados (versão {version})'))
+
+    def texto_embedding(self, produto):
+        """Texto descritivo do produto usado para gerar o embedding"""
+        texto_partes = [
+            produto.get('nome', ''),
+            produto.get('descricao', ''),
+            f"Categoria: {produto.get('categoria', '')}",
+            f"Marca: {produto.get('marca', '')}" if produto.get('marca') else '',
+        ]
+        
+        texto = '. '.join(filter(None, texto_partes))
+        return unidecode(texto.lower())
+
+    def embeddings_reaproveitaveis(self, store):
+        """
+        Prepara o reaproveitamento dos vetores da versão ativa.
+        
+        Returns:
+            callable ou None: Função produto -> vetor da versão ativa (ou
+            None se o texto de embedding mudou ou o produto é novo)
+        """
+        atual = store.current_version()
+        if atual is None:
+            self.stdout.write(
+                self.style.WARNING('  Nenhuma versão ativa: gerando todos os embeddings.')
+            )
+            return None
+        
+        anterior = store.load(atual)
+        if anterior.manifest.get('model_id') != BEDROCK_EMBEDDING_MODEL:
+            self.stdout.write(
+                self.style.WARNING('  Modelo de embeddings mudou: gerando todos os embeddings.')
+            )
+            return None
+        
+        self.stdout.write(f'  ↻ Reaproveitando embeddings inalterados da versão {atual}')
+        posicao = {pid: i for i, pid in enumerate(anterior.product_ids)}
+        
+        def vetor_anterior(produto):
+            i = posicao.get(produto['id'])
+            antigo = anterior.catalogo.get(produto['id'])
+            if i is None or antigo is None:
+                return None
+            if self.texto_embedding(antigo) != self.texto_embedding(produto):
+                return None
+            return anterior.product_vectors[i]
+        
+        return vetor_anterior
+
+    def gerar_embeddings(self, build, produtos, chunk_size=RAG_EMBEDDING_CHUNK_SIZE, reaproveitar=None):
+        """
+        Gera embeddings para os produtos do build ainda não processados.
+        
+        Os vetores são gravados no checkpoint a cada `chunk_size` produtos;
+        o índice final é montado a partir dele depois (build.assemble).
+        
+        Args:
+            build: Build em andamento
+            produtos: Iterável de produtos do catálogo (ver exportar_catalogo)
+            chunk_size: Embeddings por bloco do checkpoint
+            reaproveitar: Função opcional produto -> vetor já existente
+        
+        Returns:
+            int: Número de produtos que falharam
+        """
+        emb = Embeddings(batch=True)
+        
+        ja_gerados = build.embedded_ids()
+        if ja_gerados:
+            self.stdout.write(f'  ↻ {len(ja_gerados)} embeddings já gerados serão reaproveitados')
+        
+        self.contagem = {'exportados': 0, 'reaproveitados': 0}
+        ids = []
+        vectors = []
+        
+        try:
+            falhas = self._gerar_blocos(
+                build, emb, produtos, ja_gerados, ids, vectors, chunk_size, reaproveitar
+            )
+        finally:
+            # Preservar o bloco parcial mesmo em caso de interrupção
+            build.append_chunk(ids, vectors)
+        
+        total = self.contagem['exportados']
+        if not total:
             self.stdout.write(
                 self.style.WARNING(
                     '⚠️ Nenhum produto encontrado no banco!\n'
@@ -66,90 +296,64 @@ class Command(BaseCommand):
                     'E adicione produtos via admin ou API.'
                 )
             )
-            catalogo = {}
         else:
-            catalogo = {}
-            for p in produtos:
-                catalogo[p.id] = {
-                    'id': p.id,
-                    'nome': p.nome,
-                    'categoria': p.categoria,
-                    'subcategoria': p.subcategoria,
-                    'preco': float(p.preco) if p.preco else 0,
-                    'preco_promocional': float(p.preco_promocional) if p.preco_promocional else None,
-                    'marca': p.marca,
-                    'cor': p.cor,
-                    'tamanho': p.tamanho,
-                    'material': p.material,
-                    'estoque': p.estoque,
-                    'descricao': p.descricao,
-                    'especificacoes': p.especificacoes,
-                    'avaliacao': float(p.avaliacao) if p.avaliacao else None,
-                    'num_avaliacoes': p.num_avaliacoes,
-                    'peso': float(p.peso) if p.peso else None,
-                    'dimensoes': p.dimensoes,
-                }
-        
-        with open(CATALOGO_PKL, 'wb') as f:
-            pickle.dump(catalogo, f)
+            self.stdout.write(self.style.SUCCESS(f'\n✔ {total} produtos exportados'))
         
-        self.stdout.write(
-            self.style.SUCCESS(f'✔ {len(catalogo)} produtos exportados')
-        )
-
-    def gerar_embeddings(self):
-        """Gera embeddings para todos os produtos"""
-        # Carregar catálogo
-        with open(CATALOGO_PKL, 'rb') as f:
-            catalogo = pickle.load(f)
-        
-        if not catalogo:
-            self.stdout.write(
-                self.style.WARNING('⚠️ Catálogo vazio, nenhum embedding gerado.')
-            )
-            # Salvar arquivo vazio para evitar erro no retriever
-            with open(VECTORS_PKL, 'wb') as f:
-                pickle.dump({'ids': [], 'vectors': []}, f)
-            return
+        if self.contagem['reaproveitados']:
+            self.stdout.write(f'  ↻ {self.contagem["reaproveitados"]} embeddings reaproveitados')
         
-        emb = Embeddings()
-        
-        ids = []
-        vectors = []
+        return falhas
+
+    def _gerar_blocos(self, build, emb, produtos, ja_gerados, ids, vectors, chunk_size, reaproveitar):
+        """Gera os embeddings pendentes, gravando um bloco a cada chunk_size"""
+        falhas = 0
         
-        total = len(catalogo)
-        for idx, (pid, produto) in enumerate(catalogo.items(), 1):
-            # Criar texto descritivo para embedding
-            texto_partes = [
-                produto.get('nome', ''),
-                produto.get('descricao', ''),
-                f"Categoria: {produto.get('categoria', '')}",
-                f"Marca: {produto.get('marca', '')}" if produto.get('marca') else '',
-            ]
+        for idx, produto in enumerate(produtos, 1):
+            self.contagem['exportados'] = idx
+            pid = produto['id']
+            if pid in ja_gerados:
+                continue
             
-            texto = '. '.join(filter(None, texto_partes))
-            texto_norm = unidecode(texto.lower())
-            
-            try:
-                vetor = emb.embed(texto_norm)
+            vetor = reaproveitar(produto) if reaproveitar else None
+            if vetor is not None:
                 ids.append(pid)
                 vectors.append(vetor)
+                self.contagem['reaproveitados'] += 1
+            else:
+                # Criar texto descritivo para embedding
+                texto_norm = self.texto_embedding(produto)
                 
+                try:
+                    vetor = self._embed_aguardando_circuito(emb, texto_norm)
+                    ids.append(pid)
+                    vectors.append(vetor)
+                    
+                    self.stdout.write(
+                        f'  [{idx}] ✔ Embedding gerado para ID={pid}: {produto.get("nome", "")[:50]}'
+                    )
+                except Exception as e:
+                    falhas += 1
+                    self.stdout.write(
+                        self.style.ERROR(f'  ✖ Erro ao gerar embedding para ID={pid}: {e}')
+                    )
+            
+            if len(ids) >= chunk_size:
+                build.append_chunk(ids, vectors)
+                ids.clear()
+                vectors.clear()
+        
+        return falhas
+
+    def _embed_aguardando_circuito(self, emb, texto, tentativas=3):
+        """Gera o embedding esperando o circuit breaker fechar em vez de pular o produto"""
+        for tentativa in range(tentativas):
+            try:
+                return emb.embed(texto)
+            except CircuitOpenError:
+                if tentativa == tentativas - 1:
+                    raise
+                espera = emb.breaker.reset_timeout
                 self.stdout.write(
-                    f'  [{idx}/{total}] ✔ Embedding gerado para ID={pid}: {produto.get("nome", "")[:50]}'
-                )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'  ✖ Erro ao gerar embedding para ID={pid}: {e}')
+                    self.style.WARNING(f'  ⏸ Bedrock indisponível, aguardando {espera:.0f}s...')
                 )
-        
-        # Salvar vetores
-        with open(VECTORS_PKL, 'wb') as f:
-            pickle.dump({
-                'ids': ids,
-                'vectors': np.array(vectors)
-            }, f)
-        
-        self.stdout.write(
-            self.style.SUCCESS(f'\n✔ {len(vectors)} embeddings salvos')
-        )
\ No newline at end of file
+                time.sleep(espera)
\ No newline at end of file
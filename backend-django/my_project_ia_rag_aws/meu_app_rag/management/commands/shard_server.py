@@ -0,0 +1,101 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand, CommandError
+
+from meu_app_rag.rag.index_store import IndexStore
+from meu_app_rag.rag.sharding import ShardIndex
+from config.settings_rag import RAG_INDEX_RELOAD_INTERVAL
+
+
+class Command(BaseCommand):
+    help = 'Serve um shard do índice vetorial por HTTP (RAG_VECTOR_BACKEND=sharded com RAG_SHARD_URLS)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard', type=int, required=True, help='Número do shard (0 a shards-1)')
+        parser.add_argument('--shards', type=int, required=True, help='Total de shards')
+        parser.add_argument('--host', default='0.0.0.0')
+        parser.add_argument('--port', type=int, default=8100)
+
+    def handle(self, *args, **options):
+        shard, shards = options['shard'], options['shards']
+        if shards < 1 or not 0 <= shard < shards:
+            raise CommandError('Use 0 <= --shard < --shards')
+
+        store = IndexStore()
+        estado = {'indice': self.carregar(store, shard, shards)}
+
+        # Acompanha a versão ativa (CURRENT), como os workers do Django
+        def acompanhar():
+            while True:
+                time.sleep(RAG_INDEX_RELOAD_INTERVAL)
+                version = store.current_version()
+                if version and version != estado['indice'].version:
+                    try:
+                        estado['indice'] = self.carregar(store, shard, shards, version)
+                    except Exception as e:
+                        self.stderr.write(f'⚠️ Falha ao carregar a versão {version}: {e}')
+
+        threading.Thread(target=acompanhar, daemon=True).start()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def responder(self, status, dados):
+                corpo = json.dumps(dados).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_GET(self):
+                if self.path != '/health':
+                    return self.responder(404, {'error': 'not found'})
+                indice = estado['indice']
+                self.responder(200, {
+                    'version': indice.version,
+                    'shard': indice.shard,
+                    'shards': indice.shards,
+                    'linhas': len(indice),
+                })
+
+            def do_POST(self):
+                if self.path != '/search':
+                    return self.responder(404, {'error': 'not found'})
+                try:
+                    tamanho = int(self.headers.get('Content-Length', 0))
+                    pedido = json.loads(self.rfile.read(tamanho))
+                    version, linhas, scores = estado['indice'].search(
+                        pedido['query'], int(pedido.get('k', 5)), pedido.get('filtros') or None
+                    )
+                except (ValueError, KeyError, TypeError) as e:
+                    return self.responder(400, {'error': str(e)})
+                self.responder(200, {'version': version, 'rows': linhas, 'scores': scores})
+
+            def log_message(self, format, *args):
+                pass  # Uma linha por busca polui o log
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        server.daemon_threads = True
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 Shard {shard}/{shards} ({len(estado["indice"])} linhas, versão '
+            f'{estado["indice"].version}) em http://{options["host"]}:{options["port"]}'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def carregar(self, store, shard, shards, version=None):
+        version = version or store.current_version()
+        if version is None:
+            raise CommandError(
+                '❌ Nenhuma versão de índice ativa. Execute: python manage.py popular_embeddings'
+            )
+        indice = ShardIndex(store.version_path(version), shard, shards)
+        self.stdout.write(f'📦 Versão {version}: linhas {indice.start}–{indice.stop}')
+        return indice
@@ -0,0 +1,357 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from meu_app_rag.rag.fake_bedrock import FakeBedrock, serve
+from meu_app_rag.rag.index_store import IndexStore
+
+# Parâmetros aceitos em --servidor (nome:chave=valor,...), repassados ao gunicorn
+PARAMETROS_SERVIDOR = {
+    'workers': int,
+    'threads': int,
+    'worker_class': str,   # sync, gthread, gevent, uvicorn.workers.UvicornWorker...
+    'timeout': int,
+}
+
+EXEMPLO = os.path.join(os.path.dirname(__file__), '..', '..', 'scripts', 'consultas_avaliacao.jsonl')
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga: repete consultas em /api/rag/query/ e /api/rag/search/ a uma taxa fixa '
+        '(RPS) e mede vazão, latência p50/p95/p99 e erros, em um servidor já no ar (--url) ou '
+        'em configurações do gunicorn iniciadas pelo comando (--servidor) com o Bedrock simulado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'consultas',
+            nargs='?',
+            default=EXEMPLO,
+            help='Arquivo JSONL com {"query": ..., "filtros": {...}} (padrão: scripts/consultas_avaliacao.jsonl)',
+        )
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Servidor a testar (sem --servidor)')
+        parser.add_argument(
+            '--servidor',
+            action='append',
+            default=[],
+            help=f'Configuração do gunicorn a subir e testar, repetível: nome:chave=valor,... '
+                 f'(chaves: {", ".join(PARAMETROS_SERVIDOR)})',
+        )
+        parser.add_argument(
+            '--bedrock-url',
+            default=None,
+            help='Bedrock dos servidores iniciados (padrão: um fake_bedrock dentro deste comando)',
+        )
+        parser.add_argument('--rps', type=float, default=10, help='Requisições por segundo (taxa fixa)')
+        parser.add_argument('--duracao', type=float, default=30, help='Segundos de medição')
+        parser.add_argument('--aquecimento', type=float, default=3, help='Segundos iniciais descartados')
+        parser.add_argument(
+            '--endpoints',
+            default='search=3,query=1',
+            help='Mistura de endpoints com pesos: search, query (ex.: search=3,query=1)',
+        )
+        parser.add_argument('--concorrencia', type=int, default=64, help='Requisições simultâneas no gerador')
+        parser.add_argument('--timeout', type=float, default=30, help='Timeout de cada requisição (s)')
+        parser.add_argument('--json', dest='saida_json', default=None, help='Grava os resultados neste arquivo')
+
+    def handle(self, *args, **options):
+        if options['rps'] <= 0 or options['duracao'] <= 0:
+            raise CommandError('--rps e --duracao devem ser positivos')
+
+        consultas = self.carregar_consultas(options['consultas'])
+        mistura = self.parse_endpoints(options['endpoints'])
+        servidores = [self.parse_servidor(texto) for texto in options['servidor']]
+
+        resultados = []
+        if not servidores:
+            self.stdout.write(f'🎯 Servidor: {options["url"]}')
+            resultados.append(self.executar(options['url'], 'servidor', consultas, mistura, options))
+        else:
+            fake = None
+            bedrock_url = options['bedrock_url']
+            if not bedrock_url:
+                fake = self.iniciar_fake_bedrock()
+                bedrock_url = f'http://127.0.0.1:{fake.server_address[1]}'
+            try:
+                for nome, config in servidores:
+                    with self.gunicorn(nome, config, bedrock_url) as url:
+                        resultados.append(self.executar(url, nome, consultas, mistura, options))
+            finally:
+                if fake is not None:
+                    fake.shutdown()
+                    fake.server_close()
+
+        self.tabela(resultados)
+        if options['saida_json']:
+            with open(options['saida_json'], 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f'\n💾 Resultados gravados em {options["saida_json"]}')
+
+    def carregar_consultas(self, path):
+        if not os.path.exists(path):
+            raise CommandError(f'Arquivo de consultas não encontrado: {path}')
+
+        consultas = []
+        with open(path, encoding='utf-8') as f:
+            for numero, linha in enumerate(f, 1):
+                if not linha.strip() or linha.lstrip().startswith('#'):
+                    continue
+                try:
+                    item = json.loads(linha)
+                    consultas.append({'query': item['query'], 'filtros': item.get('filtros') or {}})
+                except (ValueError, KeyError, TypeError) as e:
+                    raise CommandError(f'{path}:{numero}: linha inválida ({e})')
+
+        if not consultas:
+            raise CommandError(f'Nenhuma consulta em {path}')
+        return consultas
+
+    def parse_endpoints(self, texto):
+        """'search=3,query=1' → ['search', 'search', 'search', 'query'] (ciclo da mistura)"""
+        mistura = []
+        for par in filter(None, (p.strip() for p in texto.split(','))):
+            nome, _, peso = par.partition('=')
+            if nome not in ('search', 'query'):
+                raise CommandError(f'Endpoint inválido em --endpoints: {nome!r} (use search, query)')
+            try:
+                mistura += [nome] * int(peso or 1)
+            except ValueError:
+                raise CommandError(f'Peso inválido em --endpoints: {par!r}')
+        if not mistura:
+            raise CommandError('--endpoints não pode ser vazio')
+        return mistura
+
+    def parse_servidor(self, texto):
+        if ':' in texto:
+            nome, _, parametros = texto.partition(':')
+        else:
+            nome, parametros = texto, texto if '=' in texto else ''
+        config = {}
+        for par in filter(None, (p.strip() for p in parametros.split(','))):
+            chave, sep, valor = par.partition('=')
+            if not sep or chave not in PARAMETROS_SERVIDOR:
+                raise CommandError(
+                    f'Parâmetro inválido em --servidor {texto!r}: {par!r} (use {", ".join(PARAMETROS_SERVIDOR)})'
+                )
+            try:
+                config[chave] = PARAMETROS_SERVIDOR[chave](valor)
+            except ValueError:
+                raise CommandError(f'Valor inválido em --servidor {texto!r}: {par!r}')
+        return nome, config
+
+    def iniciar_fake_bedrock(self):
+        """fake_bedrock em segundo plano neste processo, com as latências padrão"""
+        try:
+            snapshot = IndexStore().load()
+        except Exception as e:
+            self.stderr.write(f'⚠️ Aviso: índice indisponível ({e}); embeddings pseudoaleatórios')
+            snapshot = None
+
+        server = serve(FakeBedrock(snapshot=snapshot), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.stdout.write(f'🤖 Bedrock simulado em http://127.0.0.1:{server.server_address[1]}')
+        return server
+
+    def gunicorn(self, nome, config, bedrock_url):
+        """Context manager: sobe o gunicorn com a configuração e espera /api/ready/"""
+        comando = self
+
+        class Servidor:
+            def __enter__(self):
+                porta = porta_livre()
+                self.url = f'http://127.0.0.1:{porta}'
+                self.log = tempfile.TemporaryFile()
+                argumentos = [
+                    sys.executable, '-m', 'gunicorn', 'my_project_ia_rag_aws.wsgi:application',
+                    '--bind', f'127.0.0.1:{porta}',
+                    '--workers', str(config.get('workers', 1)),
+                    '--threads', str(config.get('threads', 1)),
+                    '--timeout', str(config.get('timeout', 120)),
+                ]
+                if 'worker_class' in config:
+                    argumentos += ['--worker-class', config['worker_class']]
+
+                env = dict(os.environ, BEDROCK_ENDPOINT_URL=bedrock_url)
+                env.setdefault('AWS_ACCESS_KEY_ID', 'fake')
+                env.setdefault('AWS_SECRET_ACCESS_KEY', 'fake')
+                comando.stdout.write(f'\n🚀 {nome}: gunicorn {" ".join(argumentos[4:])}')
+                self.processo = subprocess.Popen(
+                    argumentos, cwd=settings.BASE_DIR, env=env, stdout=self.log, stderr=subprocess.STDOUT
+                )
+                try:
+                    self.esperar_pronto(config.get('workers', 1))
+                except BaseException:
+                    self.__exit__(None, None, None)
+                    raise
+                return self.url
+
+            def esperar_pronto(self, workers, timeout=120):
+                """/api/ready/ com 200 de todos os workers (cada um responde com o seu pid)"""
+                prontos = set()
+                limite = time.monotonic() + timeout
+                while time.monotonic() < limite:
+                    if self.processo.poll() is not None:
+                        raise CommandError(f'❌ gunicorn de {nome!r} terminou ao iniciar:\n{self.saida()}')
+                    try:
+                        resposta = requests.get(f'{self.url}/api/ready/', timeout=5)
+                        if resposta.status_code == 200:
+                            prontos.add(resposta.json()['pid'])
+                            if len(prontos) >= workers:
+                                return
+                            continue
+                    except requests.RequestException:
+                        pass
+                    time.sleep(0.2)
+                raise CommandError(
+                    f'❌ {nome!r}: {len(prontos)}/{workers} worker(s) prontos em {timeout}s:\n{self.saida()}'
+                )
+
+            def saida(self, linhas=20):
+                self.log.seek(0)
+                return '\n'.join(self.log.read().decode('utf-8', 'replace').splitlines()[-linhas:])
+
+            def __exit__(self, *exc):
+                if self.processo.poll() is None:
+                    self.processo.terminate()
+                    try:
+                        self.processo.wait(timeout=30)
+                    except subprocess.TimeoutExpired:
+                        self.processo.kill()
+                        self.processo.wait()
+                self.log.close()
+
+        return Servidor()
+
+    def executar(self, url, nome, consultas, mistura, options):
+        """
+        Carga em malha aberta: a requisição i é disparada em inicio + i/rps,
+        independentemente das anteriores terem terminado. A latência é contada
+        a partir do instante agendado, então atrasos do próprio gerador (todas
+        as vagas de --concorrencia ocupadas) entram na medida em vez de
+        esconder a fila (omissão coordenada).
+        """
+        rps, duracao, aquecimento = options['rps'], options['duracao'], options['aquecimento']
+        total = int((aquecimento + duracao) * rps)
+        sessoes = threading.local()
+        amostras = []
+        amostras_lock = threading.Lock()
+        atraso = {'maximo': 0.0}
+
+        def enviar(i, agendado):
+            # Espera por uma vaga do gerador (não do servidor)
+            atraso['maximo'] = max(atraso['maximo'], time.perf_counter() - agendado)
+            consulta = consultas[i % len(consultas)]
+            endpoint = mistura[i % len(mistura)]
+            if not hasattr(sessoes, 'sessao'):
+                sessoes.sessao = requests.Session()  # Keep-alive por thread do gerador
+            try:
+                if endpoint == 'search':
+                    resposta = sessoes.sessao.get(
+                        f'{url}/api/rag/search/',
+                        params={'q': consulta['query'], 'limit': 5, **consulta['filtros']},
+                        timeout=options['timeout'],
+                    )
+                else:
+                    resposta = sessoes.sessao.post(
+                        f'{url}/api/rag/query/',
+                        json={'query': consulta['query'], **consulta['filtros']},
+                        timeout=options['timeout'],
+                    )
+                resultado = str(resposta.status_code)
+            except requests.Timeout:
+                resultado = 'timeout'
+            except requests.RequestException:
+                resultado = 'conexao'
+
+            fim = time.perf_counter()
+            if agendado - inicio >= aquecimento:
+                with amostras_lock:
+                    amostras.append((endpoint, resultado, fim - agendado, fim))
+
+        self.stdout.write(
+            f'📈 {nome}: {rps:g} req/s por {duracao:g}s (+{aquecimento:g}s de aquecimento), '
+            f'mistura {"/".join(sorted(set(mistura)))}'
+        )
+        with ThreadPoolExecutor(max_workers=options['concorrencia']) as pool:
+            inicio = time.perf_counter()
+            for i in range(total):
+                agendado = inicio + i / rps
+                espera = agendado - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                pool.submit(enviar, i, agendado)
+
+        return self.resumir(nome, amostras, inicio + aquecimento, rps, atraso['maximo'])
+
+    def resumir(self, nome, amostras, inicio_medicao, rps, atraso_maximo):
+        """Vazão, percentis e erros por endpoint e no total"""
+        resumo = {'configuracao': nome, 'rps_alvo': rps, 'atraso_gerador_ms': round(atraso_maximo * 1000, 1)}
+        grupos = {'total': amostras}
+        for endpoint in sorted({a[0] for a in amostras}):
+            grupos[endpoint] = [a for a in amostras if a[0] == endpoint]
+
+        resumo['endpoints'] = {}
+        for endpoint, grupo in grupos.items():
+            if not grupo:
+                continue
+            ok = [a for a in grupo if a[1].startswith('2')]
+            erros = {}
+            for a in grupo:
+                if not a[1].startswith('2'):
+                    erros[a[1]] = erros.get(a[1], 0) + 1
+            segundos = max(a[3] for a in grupo) - inicio_medicao
+            latencias = np.asarray([a[2] for a in ok]) * 1000
+
+            resumo['endpoints'][endpoint] = {
+                'requisicoes': len(grupo),
+                'vazao_rps': round(len(ok) / segundos, 2) if segundos > 0 else None,
+                'taxa_erro': round(1 - len(ok) / len(grupo), 4),
+                'erros': erros,
+                **{
+                    f'p{p}_ms': round(float(np.percentile(latencias, p)), 1) if latencias.size else None
+                    for p in (50, 95, 99)
+                },
+                'max_ms': round(float(latencias.max()), 1) if latencias.size else None,
+            }
+        return resumo
+
+    def tabela(self, resultados):
+        self.stdout.write(self.style.SUCCESS('\n=== TESTE DE CARGA ==='))
+        self.stdout.write(
+            f'{"configuração":<16}{"endpoint":<10}{"req":>7}{"vazão/s":>9}{"erros":>8}'
+            f'{"p50 (ms)":>10}{"p95 (ms)":>10}{"p99 (ms)":>10}  status de erro'
+        )
+
+        def ms(valor):
+            return f'{valor:>10.1f}' if valor is not None else f'{"-":>10}'
+
+        for resultado in resultados:
+            for endpoint, m in resultado['endpoints'].items():
+                self.stdout.write(
+                    f'{resultado["configuracao"]:<16}{endpoint:<10}{m["requisicoes"]:>7}'
+                    f'{m["vazao_rps"] or 0:>9.2f}{m["taxa_erro"]:>8.1%}'
+                    f'{ms(m["p50_ms"])}{ms(m["p95_ms"])}{ms(m["p99_ms"])}  '
+                    + (', '.join(f'{s}: {n}' for s, n in sorted(m['erros'].items())) or '-')
+                )
+            if resultado['atraso_gerador_ms'] > 100:
+                self.stdout.write(
+                    f'⚠️ Aviso: o gerador atrasou até {resultado["atraso_gerador_ms"]:.0f} ms em '
+                    f'{resultado["configuracao"]} (aumente --concorrencia ou reduza --rps)'
+                )
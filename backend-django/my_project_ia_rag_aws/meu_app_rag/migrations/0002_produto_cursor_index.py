@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meu_app_rag', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['-data_cadastro', 'id'], name='produtos_cadastro_id_idx'),
+        ),
+    ]
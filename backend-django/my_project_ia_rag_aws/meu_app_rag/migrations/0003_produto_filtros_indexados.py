@@ -0,0 +1,65 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:12
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def preencher_slugs(apps, schema_editor):
+    Produto = apps.get_model('meu_app_rag', 'Produto')
+    produtos = []
+    for p in Produto.objects.only('id', 'categoria', 'marca', 'cor').iterator(chunk_size=2000):
+        p.categoria_slug = slugify(p.categoria or '')
+        p.marca_slug = slugify(p.marca or '')
+        p.cor_slug = slugify(p.cor or '')
+        produtos.append(p)
+        if len(produtos) >= 2000:
+            Produto.objects.bulk_update(produtos, ['categoria_slug', 'marca_slug', 'cor_slug'])
+            produtos = []
+    if produtos:
+        Produto.objects.bulk_update(produtos, ['categoria_slug', 'marca_slug', 'cor_slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meu_app_rag', '0002_produto_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='categoria_slug',
+            field=models.SlugField(blank=True, db_index=False, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='cor_slug',
+            field=models.SlugField(blank=True, db_index=False, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='marca_slug',
+            field=models.SlugField(blank=True, db_index=False, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(preencher_slugs, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['categoria_slug', '-data_cadastro', 'id'], name='produtos_cat_cadastro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['categoria_slug', 'preco'], name='produtos_cat_preco_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('estoque__gt', 0)), fields=['categoria_slug', '-data_cadastro', 'id'], name='produtos_cat_estoque_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['marca_slug'], name='produtos_marca_slug_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['cor_slug'], name='produtos_cor_slug_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:13
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def preencher_chave_importacao(apps, schema_editor):
+    """
+    Usa o nome como chave de importação dos produtos existentes.
+
+    Nomes repetidos ficam sem chave (não há como saber qual linha do
+    arquivo corresponde a cada um); o import_produtos cria produtos novos
+    para eles. Em uma única UPDATE, sem carregar o catálogo na memória.
+    """
+    Produto = apps.get_model('meu_app_rag', 'Produto')
+    nomes_unicos = (
+        Produto.objects.values('nome').annotate(total=Count('id'))
+        .filter(total=1).values('nome')
+    )
+    Produto.objects.filter(nome__in=nomes_unicos).update(chave_importacao=F('nome'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meu_app_rag', '0003_produto_filtros_indexados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produto',
+            name='chave_importacao',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True, unique=True),
+        ),
+        migrations.RunPython(preencher_chave_importacao, migrations.RunPython.noop),
+    ]
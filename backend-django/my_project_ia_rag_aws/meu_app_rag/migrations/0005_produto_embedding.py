@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:19
+
+import django.db.models.deletion
+import pgvector.django
+from django.db import migrations, models
+
+# HNSW com distância do cosseno (mesma métrica do backend em memória).
+# Só existe no PostgreSQL; em SQLite a tabela é criada mas não é usada.
+HNSW_INDEX = 'produto_embeddings_hnsw_idx'
+
+
+def criar_indice_hnsw(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {HNSW_INDEX} ON produto_embeddings '
+        'USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)'
+    )
+
+
+def remover_indice_hnsw(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {HNSW_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meu_app_rag', '0004_produto_chave_importacao'),
+    ]
+
+    operations = [
+        # CREATE EXTENSION vector (ignorado fora do PostgreSQL)
+        pgvector.django.VectorExtension(),
+        migrations.CreateModel(
+            name='ProdutoEmbedding',
+            fields=[
+                ('produto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='meu_app_rag.produto')),
+                ('embedding', pgvector.django.VectorField(dimensions=1024)),
+                ('versao', models.CharField(db_index=True, max_length=64)),
+            ],
+            options={
+                'verbose_name': 'Embedding de produto',
+                'verbose_name_plural': 'Embeddings de produtos',
+                'db_table': 'produto_embeddings',
+            },
+        ),
+        migrations.RunPython(criar_indice_hnsw, remover_indice_hnsw),
+    ]
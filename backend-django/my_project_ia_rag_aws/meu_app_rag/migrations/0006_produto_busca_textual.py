@@ -0,0 +1,79 @@
+from django.db import migrations
+
+# Índice de busca textual sobre nome, marca, categoria, descrição e
+# especificações (ver meu_app_rag/fulltext.py).
+#
+# SQLite: tabela virtual FTS5 com conteúdo externo (não duplica o texto),
+#   mantida por triggers — também cobre bulk_create/upsert do
+#   import_produtos, que não disparam signals.
+# PostgreSQL: coluna tsvector gerada (STORED) com pesos por campo e índice GIN.
+
+FTS_COLUNAS = ('nome', 'marca', 'categoria', 'descricao', 'especificacoes')
+
+_colunas = ', '.join(FTS_COLUNAS)
+_novos = ', '.join(f'new.{c}' for c in FTS_COLUNAS)
+_antigos = ', '.join(f'old.{c}' for c in FTS_COLUNAS)
+
+SQLITE_CRIAR = [
+    f"CREATE VIRTUAL TABLE produtos_fts USING fts5("
+    f"{_colunas}, content='produtos', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER produtos_fts_ai AFTER INSERT ON produtos BEGIN "
+    f"INSERT INTO produtos_fts(rowid, {_colunas}) VALUES (new.id, {_novos}); END",
+    f"CREATE TRIGGER produtos_fts_ad AFTER DELETE ON produtos BEGIN "
+    f"INSERT INTO produtos_fts(produtos_fts, rowid, {_colunas}) VALUES ('delete', old.id, {_antigos}); END",
+    # Só quando um campo indexado muda (atualizações de estoque/preço não reindexam)
+    f"CREATE TRIGGER produtos_fts_au AFTER UPDATE OF {_colunas} ON produtos BEGIN "
+    f"INSERT INTO produtos_fts(produtos_fts, rowid, {_colunas}) VALUES ('delete', old.id, {_antigos}); "
+    f"INSERT INTO produtos_fts(rowid, {_colunas}) VALUES (new.id, {_novos}); END",
+    # Indexa os produtos existentes
+    "INSERT INTO produtos_fts(produtos_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVER = [
+    'DROP TRIGGER IF EXISTS produtos_fts_au',
+    'DROP TRIGGER IF EXISTS produtos_fts_ad',
+    'DROP TRIGGER IF EXISTS produtos_fts_ai',
+    'DROP TABLE IF EXISTS produtos_fts',
+]
+
+POSTGRES_CRIAR = [
+    "ALTER TABLE produtos ADD COLUMN busca tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('portuguese'::regconfig, coalesce(nome, '')), 'A') || "
+    "setweight(to_tsvector('portuguese'::regconfig, coalesce(marca, '')), 'B') || "
+    "setweight(to_tsvector('portuguese'::regconfig, coalesce(categoria, '')), 'B') || "
+    "setweight(to_tsvector('portuguese'::regconfig, coalesce(descricao, '')), 'C') || "
+    "setweight(to_tsvector('portuguese'::regconfig, coalesce(especificacoes, '')), 'D')"
+    ") STORED",
+    'CREATE INDEX produtos_busca_gin ON produtos USING gin (busca)',
+]
+
+POSTGRES_REMOVER = [
+    'DROP INDEX IF EXISTS produtos_busca_gin',
+    'ALTER TABLE produtos DROP COLUMN IF EXISTS busca',
+]
+
+
+def criar_indice_textual(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {'sqlite': SQLITE_CRIAR, 'postgresql': POSTGRES_CRIAR}.get(vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+def remover_indice_textual(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    comandos = {'sqlite': SQLITE_REMOVER, 'postgresql': POSTGRES_REMOVER}.get(vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meu_app_rag', '0005_produto_embedding'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_textual, remover_indice_textual),
+    ]
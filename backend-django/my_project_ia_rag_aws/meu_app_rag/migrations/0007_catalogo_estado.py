@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meu_app_rag', '0006_produto_busca_textual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogoEstado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alterado_em', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Estado do catálogo',
+                'db_table': 'catalogo_estado',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['data_atualizacao'], name='produtos_atualizacao_idx'),
+        ),
+    ]
@@ -1,5 +1,11 @@
 from django.db import models
+from django.db.models import Q
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+from django.utils.text import slugify
+from pgvector.django import VectorField
+
+from config.settings_rag import RAG_EMBEDDING_DIMS
 
 
 class Produto(models.Model):
@@ -8,6 +14,10 @@ class Produto(models.Model):
     # Identificação
     nome = models.CharField(max_length=255)
     
+    # Chave natural do import_produtos (coluna "chave" do arquivo ou, na
+    # falta dela, o nome). Vazia para produtos criados pela API/admin
+    chave_importacao = models.CharField(max_length=255, unique=True, null=True, blank=True, editable=False)
+    
     # Classificação
     categoria = models.CharField(max_length=100)
     subcategoria = models.CharField(max_length=100, blank=True, null=True)
@@ -68,6 +78,18 @@ class Produto(models.Model):
     data_cadastro = models.DateTimeField(auto_now_add=True)
     data_atualizacao = models.DateTimeField(auto_now=True)
     
+    # Colunas normalizadas para filtros indexados (preenchidas no save)
+    categoria_slug = models.SlugField(max_length=100, blank=True, default='', editable=False, db_index=False)
+    marca_slug = models.SlugField(max_length=100, blank=True, default='', editable=False, db_index=False)
+    cor_slug = models.SlugField(max_length=50, blank=True, default='', editable=False, db_index=False)
+    
+    # Campo de origem → coluna normalizada
+    SLUG_FIELDS = {
+        'categoria': 'categoria_slug',
+        'marca': 'marca_slug',
+        'cor': 'cor_slug',
+    }
+    
     class Meta:
         db_table = 'produtos'
         verbose_name = 'Produto'
@@ -77,13 +99,97 @@ class Produto(models.Model):
             models.Index(fields=['nome']),
             models.Index(fields=['categoria']),
             models.Index(fields=['preco']),
+            # Cobre a ordenação da paginação por cursor
+            models.Index(fields=['-data_cadastro', 'id'], name='produtos_cadastro_id_idx'),
+            # Max(data_atualizacao) do ETag da listagem (ver caching.catalog_state)
+            models.Index(fields=['data_atualizacao'], name='produtos_atualizacao_idx'),
+            # Filtros indexados (ver meu_app_rag/filters.py)
+            models.Index(fields=['categoria_slug', '-data_cadastro', 'id'], name='produtos_cat_cadastro_idx'),
+            models.Index(fields=['categoria_slug', 'preco'], name='produtos_cat_preco_idx'),
+            models.Index(
+                fields=['categoria_slug', '-data_cadastro', 'id'],
+                condition=Q(estoque__gt=0),
+                name='produtos_cat_estoque_idx'
+            ),
+            models.Index(fields=['marca_slug'], name='produtos_marca_slug_idx'),
+            models.Index(fields=['cor_slug'], name='produtos_cor_slug_idx'),
         ]
     
     def __str__(self):
         return f"{self.nome} - R$ {self.preco}"
     
+    @staticmethod
+    def normalize_slug(valor):
+        """Normaliza um valor para as colunas de filtro (sem acento, minúsculo)"""
+        return slugify(valor or '')
+    
+    def fill_slugs(self):
+        """Preenche as colunas normalizadas (usar antes de bulk_create/bulk_update)"""
+        for origem, destino in self.SLUG_FIELDS.items():
+            setattr(self, destino, self.normalize_slug(getattr(self, origem)))
+    
     def save(self, *args, **kwargs):
         # Validação: preço promocional deve ser menor que preço normal
         if self.preco_promocional and self.preco_promocional >= self.preco:
             raise ValueError('Preço promocional deve ser menor que o preço normal')
-        super().save(*args, **kwargs)
\ No newline at end of file
+        self.fill_slugs()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {
+                self.SLUG_FIELDS[c] for c in update_fields if c in self.SLUG_FIELDS
+            }
+        super().save(*args, **kwargs)
+
+
+class CatalogoEstado(models.Model):
+    """
+    Marca da última alteração do catálogo que não aparece em data_atualizacao.
+
+    Linha única (pk=1), atualizada nas exclusões de Produto e em operações
+    em massa sem signals (QuerySet.update). Junto com Max(data_atualizacao)
+    forma a versão do catálogo usada nos ETags da listagem, igual em todos
+    os workers porque vem do banco.
+    """
+    
+    alterado_em = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'catalogo_estado'
+        verbose_name = 'Estado do catálogo'
+    
+    def __str__(self):
+        return f"Catálogo alterado em {self.alterado_em}"
+    
+    @classmethod
+    def touch(cls):
+        """Registra uma alteração do catálogo agora"""
+        cls.objects.update_or_create(pk=1, defaults={'alterado_em': timezone.now()})
+
+
+class ProdutoEmbedding(models.Model):
+    """
+    Embedding do produto para o backend pgvector (RAG_VECTOR_BACKEND='pgvector').
+
+    Fica em tabela própria para que listagens de Produto nunca carreguem
+    os vetores. Preenchida por popular_embeddings a partir da versão ativa
+    do índice; o índice HNSW só existe no PostgreSQL (migração 0005).
+    """
+    
+    produto = models.OneToOneField(
+        Produto,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='embedding',
+    )
+    embedding = VectorField(dimensions=RAG_EMBEDDING_DIMS)
+    
+    # Versão do índice (IndexStore) de onde o vetor veio
+    versao = models.CharField(max_length=64, db_index=True)
+    
+    class Meta:
+        db_table = 'produto_embeddings'
+        verbose_name = 'Embedding de produto'
+        verbose_name_plural = 'Embeddings de produtos'
+    
+    def __str__(self):
+        return f"Embedding de {self.produto_id} ({self.versao})"
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProdutoCursorPagination(CursorPagination):
+    """
+    Paginação por cursor para a listagem de produtos.
+    
+    Usa a ordenação (-data_cadastro, id), coberta por índice, então o custo
+    de cada página não depende da posição no catálogo (sem OFFSET) e a
+    navegação continua estável quando produtos são inseridos.
+    """
+    
+    ordering = ('-data_cadastro', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -112,4 +112,141 @@ INSTRUÇÕES PARA O ASSISTENTE:
 ✅ Seja objetivo e útil
 ❌ NÃO invente informações, marcas, preços ou características
 ❌ Se o usuário pedir algo fora dessa lista, responda: "Não encontrei esse item no catálogo atual"
-""".strip()
\ No newline at end of file
+""".strip()
+
+    @staticmethod
+    def _preco_txt(p):
+        """Preço para o usuário, com o desconto quando houver promoção"""
+        preco = float(p.get("preco") or 0)
+        preco_prom = p.get("preco_promocional")
+        preco_prom = float(preco_prom) if preco_prom else None
+
+        if preco_prom:
+            desconto_pct = ((preco - preco_prom) / preco * 100) if preco > 0 else 0
+            return f"R$ {preco_prom:.2f} (🔥 {desconto_pct:.0f}% OFF, antes R$ {preco:.2f})"
+        return f"R$ {preco:.2f}"
+
+    @classmethod
+    def _linha(cls, i, p):
+        """Linha de um produto nas listas em template (preço, marca, nota, estoque)"""
+        partes = [f"{i}. {p.get('nome')}", cls._preco_txt(p)]
+
+        if p.get("marca"):
+            partes.append(p["marca"])
+        if p.get("avaliacao"):
+            partes.append(f"⭐ {float(p['avaliacao']):.1f}")
+
+        estoque = p.get("estoque")
+        if estoque is not None:
+            if estoque <= 0:
+                partes.append("sem estoque")
+            elif estoque < 10:
+                partes.append(f"estoque baixo ({estoque} un.)")
+
+        return " — ".join(partes)
+
+    @classmethod
+    def summarize(cls, produtos, query):
+        """
+        Gera um resumo em template dos produtos, sem usar o LLM.
+        
+        Usado como resposta degradada quando o Bedrock está lento ou
+        indisponível.
+        
+        Args:
+            produtos: Lista de produtos encontrados
+            query: Consulta original do usuário
+            
+        Returns:
+            str: Resumo formatado para o usuário
+        """
+        if not produtos:
+            return (
+                "Não encontrei produtos que correspondam à sua busca. "
+                "Tente reformular sua pergunta ou buscar por outras características!"
+            )
+
+        linhas = [f'Encontrei {len(produtos)} produto(s) para "{query}":']
+        linhas.extend(cls._linha(i, p) for i, p in enumerate(produtos, 1))
+        linhas.append(
+            "\n(Resposta resumida: o assistente está temporariamente indisponível.)"
+        )
+        return "\n".join(linhas)
+
+    @classmethod
+    def answer(cls, intencoes, produtos, query):
+        """
+        Resposta em template para consultas diretas (ver rag/router.py).
+
+        Com um único produto (a consulta cita o nome dele), responde só o
+        que foi perguntado; com vários, lista os que atendem à pergunta.
+
+        Args:
+            intencoes: Intenções detectadas ("preco", "estoque", "avaliacao", "promocao")
+            produtos: Produtos encontrados (ao menos um)
+            query: Consulta original do usuário
+
+        Returns:
+            str: Resposta formatada para o usuário
+        """
+        if len(produtos) == 1:
+            return cls._answer_product(intencoes, produtos[0])
+
+        selecionados = produtos
+        if "estoque" in intencoes:
+            selecionados = [p for p in selecionados if (p.get("estoque") or 0) > 0]
+        if "promocao" in intencoes:
+            selecionados = [p for p in selecionados if p.get("preco_promocional")]
+
+        if not selecionados:
+            motivo = "em estoque" if "estoque" in intencoes else "em promoção"
+            return (
+                f'Encontrei {len(produtos)} produto(s) para "{query}", '
+                f"mas nenhum está {motivo} no momento."
+            )
+
+        if "estoque" in intencoes:
+            cabecalho = f'Sim! Encontrei {len(selecionados)} produto(s) em estoque para "{query}":'
+        elif "promocao" in intencoes:
+            cabecalho = f'Encontrei {len(selecionados)} produto(s) em promoção para "{query}":'
+        else:
+            cabecalho = f'Encontrei {len(selecionados)} produto(s) para "{query}":'
+
+        linhas = [cabecalho]
+        linhas.extend(cls._linha(i, p) for i, p in enumerate(selecionados, 1))
+        return "\n".join(linhas)
+
+    @classmethod
+    def _answer_product(cls, intencoes, p):
+        """Frases sobre um produto, uma por intenção"""
+        nome = p.get("nome")
+        preco = float(p.get("preco") or 0)
+        linhas = []
+
+        if "preco" in intencoes or "promocao" in intencoes:
+            if p.get("preco_promocional"):
+                linhas.append(f"💰 {nome} está em promoção: {cls._preco_txt(p)}.")
+            elif "preco" in intencoes:
+                linhas.append(f"💰 {nome} custa R$ {preco:.2f}.")
+            else:
+                linhas.append(f"{nome} não está em promoção no momento (R$ {preco:.2f}).")
+
+        if "estoque" in intencoes:
+            estoque = p.get("estoque") or 0
+            if estoque <= 0:
+                linhas.append(f"📦 {nome} está sem estoque no momento.")
+            elif estoque < 10:
+                linhas.append(f"📦 Restam só {estoque} unidade(s) de {nome} em estoque.")
+            else:
+                linhas.append(f"📦 Temos {estoque} unidades de {nome} em estoque.")
+
+        if "avaliacao" in intencoes:
+            if p.get("avaliacao"):
+                linhas.append(
+                    f"⭐ {nome} tem nota {float(p['avaliacao']):.1f}/5 "
+                    f"({cls._safe(p.get('num_avaliacoes'), 0)} avaliações)."
+                )
+            else:
+                linhas.append(f"⭐ {nome} ainda não tem avaliações.")
+
+        return "\n".join(linhas)
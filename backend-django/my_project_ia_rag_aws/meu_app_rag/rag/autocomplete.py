@@ -0,0 +1,133 @@
+import math
+import re
+from bisect import bisect_left
+import numpy as np
+from unidecode import unidecode
+
+from config.settings_rag import RAG_AUTOCOMPLETE_MAX_LIMIT, RAG_AUTOCOMPLETE_MEMO_MIN_MATCHES
+
+PALAVRA = re.compile(r"[a-z0-9]+")
+
+# Maior que qualquer caractere das chaves (ASCII depois do fold)
+_FIM = "\x7f"
+
+
+def fold(texto: str) -> str:
+    """Texto sem acento, minúsculo, só letras/dígitos separados por um espaço"""
+    return " ".join(PALAVRA.findall(unidecode(texto or "").lower()))
+
+
+def popularity(produto: dict) -> float:
+    """
+    Peso de um produto nas sugestões: avaliação x log(nº de avaliações),
+    pela metade se estiver sem estoque.
+    """
+    peso = (produto.get("avaliacao") or 0) * math.log1p(produto.get("num_avaliacoes") or 0)
+    if not produto.get("estoque"):
+        peso /= 2
+    return peso
+
+
+class PrefixIndex:
+    """
+    Sugestões de autocomplete por prefixo (nomes, marcas e categorias).
+
+    Cada sugestão entra uma vez por palavra, como a frase a partir dela
+    ("tenis corrida pro run", "corrida pro run", ...), em uma lista
+    ordenada: o prefixo digitado vira um intervalo achado por bisect.
+    As sugestões são numeradas por peso decrescente, então o top-N do
+    intervalo são os menores números (np.partition, sem ordenar o
+    intervalo inteiro).
+
+    Imutável depois de montado; só prefixos que casam com mais de
+    RAG_AUTOCOMPLETE_MEMO_MIN_MATCHES entradas vão para o cache, então ele
+    é limitado pelo tamanho do índice.
+    """
+
+    __slots__ = ("sugestoes", "chaves", "alvos", "_memo")
+
+    def __init__(self, sugestoes: list):
+        """
+        Args:
+            sugestoes: [(peso, {"texto", "tipo", ...})] em qualquer ordem
+        """
+        sugestoes = sorted(sugestoes, key=lambda s: (-s[0], s[1]["texto"]))
+        self.sugestoes = [s for _, s in sugestoes]
+
+        pares = set()
+        for i, sugestao in enumerate(self.sugestoes):
+            palavras = fold(sugestao["texto"]).split()
+            for j in range(len(palavras)):
+                pares.add((" ".join(palavras[j:]), i))
+
+        pares = sorted(pares)
+        self.chaves = [chave for chave, _ in pares]
+        self.alvos = np.fromiter((i for _, i in pares), dtype=np.uint32, count=len(pares))
+        self._memo = {}
+
+    @classmethod
+    def from_catalog(cls, produtos) -> "PrefixIndex":
+        """
+        Monta o índice a partir dos produtos do catálogo.
+
+        Marcas e categorias pesam a soma dos produtos delas.
+        """
+        sugestoes = []
+        grupos = {}
+        for produto in produtos:
+            if not produto.get("nome"):
+                continue
+            peso = popularity(produto)
+            sugestoes.append((peso, {"texto": produto["nome"], "tipo": "produto", "id": produto["id"]}))
+
+            for tipo in ("marca", "categoria"):
+                valor = (produto.get(tipo) or "").strip()
+                if not valor:
+                    continue
+                grupo = grupos.setdefault((tipo, fold(valor)), [valor, 0.0, 0])
+                grupo[1] += peso
+                grupo[2] += 1
+
+        for (tipo, _), (texto, peso, total) in grupos.items():
+            sugestoes.append((peso, {"texto": texto, "tipo": tipo, "produtos": total}))
+        return cls(sugestoes)
+
+    def __len__(self):
+        return len(self.sugestoes)
+
+    def _top(self, inicio: int, fim: int, n: int) -> list:
+        """Os n menores números de sugestão (sem repetição) em alvos[inicio:fim]"""
+        alvos = self.alvos[inicio:fim]
+        if len(alvos) > 2 * n:
+            # Uma sugestão pode aparecer mais de uma vez no intervalo
+            # ("tenis ... tenis"): com margem de 2x, refaz só se faltar
+            candidatos = np.unique(np.partition(alvos, 2 * n)[:2 * n])
+            if len(candidatos) >= n:
+                return candidatos[:n].tolist()
+        return np.unique(alvos)[:n].tolist()
+
+    def suggest(self, prefixo: str, limit: int = 8) -> list:
+        """
+        Sugestões cujo texto (ou alguma palavra dele em diante) começa com o prefixo.
+
+        Args:
+            prefixo: Texto digitado (acento e caixa são ignorados)
+            limit: Número máximo de sugestões
+
+        Returns:
+            list: Dicts {"texto", "tipo", "id"/"produtos"}, mais populares primeiro
+        """
+        prefixo = fold(prefixo)
+        if not prefixo:
+            return []
+
+        topo = self._memo.get(prefixo)
+        if topo is None:
+            inicio = bisect_left(self.chaves, prefixo)
+            fim = bisect_left(self.chaves, prefixo + _FIM, inicio)
+            if fim - inicio <= RAG_AUTOCOMPLETE_MEMO_MIN_MATCHES:
+                return [self.sugestoes[i] for i in self._top(inicio, fim, limit)]
+
+            topo = [self.sugestoes[i] for i in self._top(inicio, fim, RAG_AUTOCOMPLETE_MAX_LIMIT)]
+            self._memo[prefixo] = topo
+        return topo[:limit]
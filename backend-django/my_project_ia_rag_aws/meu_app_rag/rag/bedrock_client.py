@@ -0,0 +1,138 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import boto3
+from botocore.config import Config
+from config.settings_rag import (
+    AWS_REGION,
+    BEDROCK_EMBEDDING_MODEL,
+    BEDROCK_ENDPOINT_URL,
+    BEDROCK_MAX_POOL_CONNECTIONS,
+    BEDROCK_CONNECT_TIMEOUT,
+    BEDROCK_READ_TIMEOUT,
+    BEDROCK_RETRY_MODE,
+    BEDROCK_MAX_ATTEMPTS,
+    BEDROCK_PREWARM_CONNECTIONS,
+    BEDROCK_PREWARM_TIMEOUT,
+    RAG_REQUEST_DEADLINE,
+)
+
+# Um cliente por perfil: requisições (prazo da API) e lote (popular_embeddings)
+_clients = {}
+_client_lock = threading.Lock()
+
+
+def build_config(batch: bool = False) -> Config:
+    """
+    Configuração do botocore para o Bedrock Runtime.
+
+    Nas requisições, read_timeout e tentativas são limitados por
+    RAG_REQUEST_DEADLINE: quando run_with_deadline abandona uma chamada, a
+    thread do executor só é liberada quando o boto3 desiste, e com os
+    valores de lote (30 s x 3 tentativas) um Bedrock lento esgotaria o
+    executor com chamadas que ninguém mais espera.
+
+    Args:
+        batch: Perfil de lote (timeouts e retries completos, sem prazo)
+
+    Returns:
+        Config: Pool de conexões, retries adaptativos, timeouts e keep-alive
+    """
+    read_timeout = BEDROCK_READ_TIMEOUT
+    tentativas = BEDROCK_MAX_ATTEMPTS
+    if not batch:
+        read_timeout = min(read_timeout, RAG_REQUEST_DEADLINE)
+        tentativas = max(1, min(
+            tentativas, int(RAG_REQUEST_DEADLINE // (read_timeout + BEDROCK_CONNECT_TIMEOUT))
+        ))
+
+    return Config(
+        region_name=AWS_REGION,
+        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=read_timeout,
+        retries={
+            "mode": BEDROCK_RETRY_MODE,
+            "total_max_attempts": tentativas,
+        },
+        tcp_keepalive=True,
+    )
+
+
+def get_bedrock_client(batch: bool = False):
+    """
+    Retorna o cliente `bedrock-runtime` compartilhado pelo processo.
+
+    Clientes boto3 são thread-safe, então embeddings e geração usam a
+    mesma instância (e o mesmo pool de conexões TLS).
+
+    Args:
+        batch: Cliente de lote (popular_embeddings), sem os limites do
+            prazo da requisição (ver build_config)
+
+    Returns:
+        botocore.client.BedrockRuntime: Cliente compartilhado
+    """
+    client = _clients.get(batch)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(batch)
+            if client is None:
+                client = boto3.session.Session().client(
+                    "bedrock-runtime",
+                    endpoint_url=BEDROCK_ENDPOINT_URL,
+                    config=build_config(batch),
+                )
+                _clients[batch] = client
+    return client
+
+
+def reset_bedrock_client():
+    """Descarta os clientes compartilhados (ex.: após fork ou troca de credenciais)."""
+    with _client_lock:
+        _clients.clear()
+
+
+def prewarm_bedrock_client(connections: int = None, timeout: float = None) -> int:
+    """
+    Abre conexões com o Bedrock antes da primeira requisição do usuário.
+
+    Faz chamadas de embedding mínimas em paralelo para que o handshake
+    TLS e a resolução de credenciais aconteçam no início do worker.
+    Espera no máximo `timeout`: com o Bedrock lento ou inacessível, as
+    chamadas pendentes seguem em segundo plano e não contam.
+
+    Args:
+        connections: Número de conexões a abrir
+        timeout: Tempo máximo de espera em segundos
+
+    Returns:
+        int: Número de conexões aquecidas com sucesso
+    """
+    if connections is None:
+        connections = BEDROCK_PREWARM_CONNECTIONS
+    if timeout is None:
+        timeout = BEDROCK_PREWARM_TIMEOUT
+
+    client = get_bedrock_client()
+    connections = max(1, min(connections, BEDROCK_MAX_POOL_CONNECTIONS))
+
+    def ping(_):
+        try:
+            response = client.invoke_model(
+                modelId=BEDROCK_EMBEDDING_MODEL,
+                contentType="application/json",
+                accept="application/json",
+                body=json.dumps({"inputText": "warmup"}).encode("utf-8"),
+            )
+            response["body"].read()
+            return True
+        except Exception:
+            return False
+
+    pool = ThreadPoolExecutor(max_workers=connections, thread_name_prefix="bedrock-prewarm")
+    try:
+        feitos, _ = wait([pool.submit(ping, i) for i in range(connections)], timeout=timeout)
+        return sum(f.result() for f in feitos)
+    finally:
+        pool.shutdown(wait=False)
@@ -0,0 +1,208 @@
+import re
+import json
+import time
+import uuid
+import hashlib
+import threading
+from unidecode import unidecode
+from config.settings_rag import (
+    RAG_COALESCE_ENABLED,
+    RAG_COALESCE_CACHE_ALIAS,
+    RAG_COALESCE_WAIT_TIMEOUT,
+    RAG_COALESCE_LOCK_TTL,
+    RAG_COALESCE_RESULT_TTL,
+    RAG_COALESCE_POLL_INTERVAL,
+)
+
+
+class CoalesceTimeout(Exception):
+    """A requisição líder não terminou dentro do tempo de espera."""
+
+
+class _Chamada:
+    """Computação em andamento compartilhada pelas requisições duplicadas."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.aguardando = 0  # Duplicadas esperando o líder
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições idênticas em andamento (single-flight).
+
+    A primeira requisição de uma chave executa a computação; as duplicadas
+    que chegam enquanto ela está em andamento aguardam e recebem o mesmo
+    resultado. Nada é guardado depois que a computação termina, então as
+    respostas não mudam: apenas chamadas simultâneas são unificadas.
+
+    Dentro do worker a coordenação usa threads. Se um alias de cache
+    compartilhado for configurado (RAG_COALESCE_CACHE_ALIAS), o líder de
+    cada worker disputa também um lock no cache, de modo que apenas um
+    worker chama o Bedrock. O backend precisa ter `add` atômico
+    (Redis/Memcached). O resultado publicado no cache leva o token do
+    líder na chave, então uma duplicada só recebe o resultado da
+    computação que estava em andamento quando ela chegou.
+    """
+
+    def __init__(self, cache_alias=None):
+        self._lock = threading.Lock()
+        self._chamadas = {}
+        self.cache_alias = RAG_COALESCE_CACHE_ALIAS if cache_alias is None else cache_alias
+
+    @staticmethod
+    def make_key(tipo: str, query: str, limit: int, **filtros) -> str:
+        """
+        Gera a chave de coalescência da requisição.
+
+        Args:
+            tipo: Tipo da operação ('query', 'search', ...)
+            query: Texto da consulta (normalizado aqui)
+            limit: Número de resultados
+            **filtros: Demais parâmetros que alteram o resultado
+
+        Returns:
+            str: Hash estável da requisição
+        """
+        query_norm = unidecode(str(query).lower().strip())
+        query_norm = re.sub(r"[^a-z0-9 ]+", " ", query_norm)
+        query_norm = re.sub(r"\s+", " ", query_norm).strip()
+
+        bruto = json.dumps(
+            [tipo, query_norm, limit, filtros],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+    def do(self, key: str, fn, timeout: float = None):
+        """
+        Executa `fn` uma única vez por chave entre chamadas simultâneas.
+
+        Args:
+            key: Chave de coalescência (ver make_key)
+            fn: Função sem argumentos que produz o resultado
+            timeout: Tempo máximo de espera das duplicadas (segundos)
+
+        Returns:
+            tuple: (resultado, coalescido) — coalescido é True quando o
+            resultado veio de outra requisição
+        """
+        if not RAG_COALESCE_ENABLED:
+            return fn(), False
+
+        if timeout is None:
+            timeout = RAG_COALESCE_WAIT_TIMEOUT
+
+        with self._lock:
+            chamada = self._chamadas.get(key)
+            lider = chamada is None
+            if lider:
+                chamada = _Chamada()
+                self._chamadas[key] = chamada
+            else:
+                chamada.aguardando += 1
+
+        if not lider:
+            if not chamada.evento.wait(timeout):
+                raise CoalesceTimeout(
+                    "Tempo esgotado aguardando requisição idêntica em andamento."
+                )
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado, True
+
+        coalescido = False
+        try:
+            if self.cache_alias:
+                chamada.resultado, coalescido = self._do_shared(key, fn, timeout)
+            else:
+                chamada.resultado = fn()
+        except Exception as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                self._chamadas.pop(key, None)
+            chamada.evento.set()
+
+        return chamada.resultado, coalescido
+
+    def in_flight(self, key: str) -> bool:
+        """True se há uma computação da chave em andamento neste worker"""
+        with self._lock:
+            return key in self._chamadas
+
+    def waiting(self, key: str) -> int:
+        """Número de duplicadas aguardando a computação da chave neste worker"""
+        with self._lock:
+            chamada = self._chamadas.get(key)
+            return chamada.aguardando if chamada else 0
+
+    def _do_shared(self, key: str, fn, timeout: float):
+        """
+        Coordena o líder deste worker com os demais via cache compartilhado.
+
+        O lock guarda o token do líder e o resultado é publicado em uma
+        chave com esse token: quem aguarda lê só o resultado do líder que
+        viu no lock, nunca o de uma execução anterior.
+        """
+        from django.core.cache import caches
+
+        cache = caches[self.cache_alias]
+        lock_key = f"rag:sf:lock:{key}"
+        token = uuid.uuid4().hex
+
+        limite = time.monotonic() + timeout
+        while True:
+            adquirido_em = time.monotonic()
+            if cache.add(lock_key, token, RAG_COALESCE_LOCK_TTL):
+                try:
+                    resultado = fn()
+                    cache.set(self._result_key(key, token), resultado, RAG_COALESCE_RESULT_TTL)
+                    return resultado, False
+                finally:
+                    self._release(cache, lock_key, adquirido_em)
+
+            # Outro worker está computando: aguardar o resultado dele
+            lider = cache.get(lock_key)
+            while lider is not None and time.monotonic() < limite:
+                resultado = cache.get(self._result_key(key, lider))
+                if resultado is not None:
+                    return resultado, True
+                if cache.get(lock_key) != lider:
+                    # Líder liberou o lock: publicou há pouco ou terminou com
+                    # erro (aí a próxima volta tenta assumir)
+                    resultado = cache.get(self._result_key(key, lider))
+                    if resultado is not None:
+                        return resultado, True
+                    break
+                time.sleep(RAG_COALESCE_POLL_INTERVAL)
+
+            if time.monotonic() >= limite:
+                raise CoalesceTimeout(
+                    "Tempo esgotado aguardando requisição idêntica em outro worker."
+                )
+
+    @staticmethod
+    def _result_key(key: str, token: str) -> str:
+        return f"rag:sf:result:{key}:{token}"
+
+    @staticmethod
+    def _release(cache, lock_key: str, adquirido_em: float):
+        """
+        Libera o lock do líder.
+
+        A API de cache do Django não tem compare-and-delete. Enquanto o
+        lock não expirou ele só pode ser nosso (`add` falha para os
+        outros), então apagá-lo é seguro; perto da expiração outro líder
+        pode já tê-lo adquirido, e o lock é deixado expirar sozinho.
+        """
+        if time.monotonic() - adquirido_em < RAG_COALESCE_LOCK_TTL * 0.9:
+            cache.delete(lock_key)
+
+
+# Instância compartilhada pelo processo (worker)
+single_flight = SingleFlight()
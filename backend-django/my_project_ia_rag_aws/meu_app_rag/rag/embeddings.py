@@ -1,19 +1,20 @@
-import boto3
 import json
 import numpy as np
 from unidecode import unidecode
-from config.settings_rag import AWS_REGION, BEDROCK_EMBEDDING_MODEL
+from config.settings_rag import BEDROCK_EMBEDDING_MODEL, RAG_EMBEDDING_MIN_BUDGET
+from .bedrock_client import get_bedrock_client
+from .resilience import BedrockUnavailable, get_breaker, run_with_deadline
 
 
 class Embeddings:
     """Gera embeddings usando Amazon Bedrock (Titan Embeddings)."""
 
-    def __init__(self):
-        self.client = boto3.client(
-            "bedrock-runtime",
-            region_name=AWS_REGION,
-        )
+    def __init__(self, batch: bool = False):
+        # batch=True: cliente de lote (popular_embeddings), sem os limites
+        # de timeout/tentativas do prazo da requisição
+        self.client = get_bedrock_client(batch)
         self.model_id = BEDROCK_EMBEDDING_MODEL
+        self.breaker = get_breaker("embeddings")
 
     def _normalize(self, text: str) -> str:
         """Normaliza texto removendo acentos e convertendo para minúsculas"""
@@ -21,12 +22,13 @@ class Embeddings:
             return ""
         return unidecode(text.lower().strip())
 
-    def embed(self, text: str):
+    def embed(self, text: str, deadline=None):
         """
         Gera embedding para o texto fornecido.
         
         Args:
             text: Texto para gerar embedding
+            deadline: Prazo da requisição (Deadline) ou None
             
         Returns:
             np.array: Vetor de embedding (float32)
@@ -42,15 +44,23 @@ class Embeddings:
 
         payload = {"inputText": text}
 
-        try:
+        def invoke():
             response = self.client.invoke_model(
                 modelId=self.model_id,
                 contentType="application/json",
                 accept="application/json",
                 body=json.dumps(payload).encode("utf-8")
             )
+            return json.loads(response["body"].read())
 
-            data = json.loads(response["body"].read())
+        try:
+            data = run_with_deadline(
+                invoke,
+                deadline=deadline,
+                breaker=self.breaker,
+                etapa="embedding",
+                minimo=RAG_EMBEDDING_MIN_BUDGET,
+            )
 
             # Titan Embeddings v2 - formato atual
             if "embedding" in data:
@@ -72,6 +82,9 @@ class Embeddings:
                 f"❌ Formato inesperado para o modelo {self.model_id} → {data}"
             )
 
+        except BedrockUnavailable:
+            raise
+
         except self.client.exceptions.ValidationException as e:
             raise RuntimeError(f"❌ Erro de validação no Bedrock: {e}")
 
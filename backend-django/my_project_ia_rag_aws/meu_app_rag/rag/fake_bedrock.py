@@ -0,0 +1,271 @@
+import base64
+import binascii
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+import numpy as np
+
+from .autocomplete import fold
+
+# Bedrock Runtime local para testes de carga (fake_bedrock, teste_carga).
+# Responde invoke_model (Titan Embeddings e Claude Messages) e
+# invoke_model_with_response_stream (eventos da Messages API em
+# application/vnd.amazon.eventstream), com latência, throttling e tokens
+# configuráveis. Com BEDROCK_ENDPOINT_URL apontando para ele, o cliente
+# compartilhado (bedrock_client) e, portanto, Embeddings e ChatBedrock
+# falam com este servidor em vez da AWS.
+
+ROTA = re.compile(r"^/model/(?P<modelo>[^/]+)/(?P<operacao>invoke|invoke-with-response-stream)$")
+
+THROTTLING = "ThrottlingException:http://internal.amazon.com/coral/com.amazon.bedrock/"
+VALIDACAO = "ValidationException:http://internal.amazon.com/coral/com.amazon.bedrock/"
+
+
+def _header_string(nome: str, valor: str) -> bytes:
+    """Header de evento do tipo string (7) no formato event-stream da AWS"""
+    nome, valor = nome.encode("utf-8"), valor.encode("utf-8")
+    return struct.pack("!B", len(nome)) + nome + struct.pack("!BH", 7, len(valor)) + valor
+
+
+def event_message(payload: dict) -> bytes:
+    """
+    Mensagem event-stream de um chunk (como o Bedrock envia na resposta em streaming).
+
+    Prelúdio (tamanho total e dos headers) + CRC32, headers, payload
+    {"bytes": base64(json do chunk)} e CRC32 da mensagem inteira.
+    """
+    headers = (
+        _header_string(":event-type", "chunk")
+        + _header_string(":content-type", "application/json")
+        + _header_string(":message-type", "event")
+    )
+    corpo = json.dumps({"bytes": base64.b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")}).encode("utf-8")
+    preludio = struct.pack("!II", 16 + len(headers) + len(corpo), len(headers))
+    mensagem = preludio + struct.pack("!I", binascii.crc32(preludio)) + headers + corpo
+    return mensagem + struct.pack("!I", binascii.crc32(mensagem))
+
+
+class FakeBedrock:
+    """
+    Comportamento do Bedrock simulado.
+
+    Embeddings: com o índice (snapshot), o vetor de um texto é a média dos
+    vetores dos produtos que têm palavras em comum com ele, então a busca
+    encontra produtos como em produção; sem índice (ou sem palavras em
+    comum), um vetor pseudoaleatório fixo por texto.
+
+    Geração: espera latencia_ms (tempo até o primeiro token) + token_ms
+    por token de saída (min(max_tokens, tokens_saida)). Com jitter, cada
+    espera varia ±jitter (fração). Uma fração throttle_rate das chamadas,
+    e as que passariam de max_concorrencia simultâneas, recebem 429
+    ThrottlingException, como o Bedrock acima da cota.
+    """
+
+    def __init__(self, embedding_ms: float = 40, latencia_ms: float = 400, token_ms: float = 15,
+                 tokens_saida: int = 150, jitter: float = 0.2, throttle_rate: float = 0.0,
+                 max_concorrencia: int = 0, snapshot=None, dims: int = 1024):
+        self.embedding_ms = embedding_ms
+        self.latencia_ms = latencia_ms
+        self.token_ms = token_ms
+        self.tokens_saida = tokens_saida
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.max_concorrencia = max_concorrencia
+
+        self.dims = dims
+        self._vetores = None
+        self._palavras = {}
+        if snapshot is not None and len(snapshot.product_ids):
+            self._vetores = snapshot.product_vectors
+            self.dims = int(self._vetores.shape[1])
+            for linha, pid in enumerate(snapshot.product_ids):
+                produto = snapshot.catalogo.get(int(pid)) or {}
+                texto = " ".join(str(produto.get(c) or "") for c in ("nome", "categoria", "marca"))
+                for palavra in set(fold(texto).split()):
+                    self._palavras.setdefault(palavra, []).append(linha)
+
+        self._em_andamento = 0
+        self._lock = threading.Lock()
+        self.contagem = {"embeddings": 0, "geracoes": 0, "throttling": 0}
+
+    def esperar(self, ms: float):
+        if ms > 0:
+            time.sleep(ms / 1000 * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def admitir(self) -> bool:
+        """Reserva uma vaga de concorrência; False = responder com throttling"""
+        with self._lock:
+            if random.random() < self.throttle_rate or (
+                self.max_concorrencia and self._em_andamento >= self.max_concorrencia
+            ):
+                self.contagem["throttling"] += 1
+                return False
+            self._em_andamento += 1
+            return True
+
+    def liberar(self):
+        with self._lock:
+            self._em_andamento -= 1
+
+    def embed(self, texto: str, dims: int = None) -> list:
+        """Vetor normalizado do texto (média dos produtos com palavras em comum)"""
+        linhas = set()
+        for palavra in fold(texto).split():
+            linhas.update(self._palavras.get(palavra, ()))
+
+        if linhas and self._vetores is not None:
+            vetor = np.asarray(self._vetores[sorted(linhas)[:200]], dtype=np.float32).mean(axis=0)
+        else:
+            semente = int(hashlib.md5(texto.encode("utf-8")).hexdigest()[:8], 16)
+            vetor = np.random.default_rng(semente).standard_normal(dims or self.dims).astype(np.float32)
+
+        norma = np.linalg.norm(vetor)
+        return (vetor / norma if norma else vetor).tolist()
+
+    def invoke_embedding(self, pedido: dict) -> tuple:
+        self.esperar(self.embedding_ms)
+        texto = pedido.get("inputText") or ""
+        with self._lock:
+            self.contagem["embeddings"] += 1
+        corpo = {"embedding": self.embed(texto, pedido.get("dimensions")), "inputTextTokenCount": len(texto.split())}
+        return corpo, {"x-amzn-bedrock-input-token-count": str(len(texto.split()))}
+
+    def _geracao(self, pedido: dict) -> tuple:
+        """(tokens de entrada, palavras da resposta) da chamada"""
+        entrada = max(1, len(json.dumps(pedido.get("messages") or pedido.get("prompt") or "")) // 4)
+        saida = max(1, min(int(pedido.get("max_tokens") or self.tokens_saida), self.tokens_saida))
+        palavras = [f"token{i}" for i in range(saida)]
+        palavras[0] = "Resposta simulada pelo fake_bedrock:"
+        return entrada, palavras
+
+    def invoke_chat(self, modelo: str, pedido: dict) -> tuple:
+        entrada, palavras = self._geracao(pedido)
+        self.esperar(self.latencia_ms + self.token_ms * len(palavras))
+        with self._lock:
+            self.contagem["geracoes"] += 1
+        corpo = {
+            "id": f"msg_fake_{random.getrandbits(48):012x}",
+            "type": "message",
+            "role": "assistant",
+            "model": modelo,
+            "content": [{"type": "text", "text": " ".join(palavras)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": entrada, "output_tokens": len(palavras)},
+        }
+        return corpo, {
+            "x-amzn-bedrock-input-token-count": str(entrada),
+            "x-amzn-bedrock-output-token-count": str(len(palavras)),
+        }
+
+    def stream_chat(self, modelo: str, pedido: dict):
+        """Chunks da Messages API em streaming, um token por content_block_delta"""
+        entrada, palavras = self._geracao(pedido)
+        inicio = time.monotonic()
+
+        self.esperar(self.latencia_ms)
+        yield {"type": "message_start", "message": {
+            "id": f"msg_fake_{random.getrandbits(48):012x}", "type": "message", "role": "assistant",
+            "model": modelo, "content": [], "stop_reason": None,
+            "usage": {"input_tokens": entrada, "output_tokens": 0},
+        }}
+        yield {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}
+        primeiro = time.monotonic()
+        for i, palavra in enumerate(palavras):
+            self.esperar(self.token_ms)
+            yield {"type": "content_block_delta", "index": 0,
+                   "delta": {"type": "text_delta", "text": palavra if i == 0 else " " + palavra}}
+        yield {"type": "content_block_stop", "index": 0}
+        yield {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+               "usage": {"output_tokens": len(palavras)}}
+
+        with self._lock:
+            self.contagem["geracoes"] += 1
+        yield {"type": "message_stop", "amazon-bedrock-invocationMetrics": {
+            "inputTokenCount": entrada,
+            "outputTokenCount": len(palavras),
+            "invocationLatency": int((time.monotonic() - inicio) * 1000),
+            "firstByteLatency": int((primeiro - inicio) * 1000),
+        }}
+
+
+def make_handler(fake: FakeBedrock):
+    """Handler HTTP do Bedrock Runtime simulado (rotas /model/{id}/invoke[-with-response-stream])"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def responder(self, status, dados, headers=None):
+            corpo = json.dumps(dados).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            for nome, valor in (headers or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self.responder(404, {"message": "not found"})
+            self.responder(200, dict(fake.contagem))
+
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            rota = ROTA.match(self.path.split("?")[0])
+            if not rota:
+                return self.responder(404, {"message": f"Rota desconhecida: {self.path}"})
+            try:
+                pedido = json.loads(corpo or b"{}")
+            except ValueError:
+                return self.responder(400, {"message": "Malformed input request"}, {"x-amzn-ErrorType": VALIDACAO})
+
+            if not fake.admitir():
+                return self.responder(
+                    429, {"message": "Too many requests, please wait before trying again."},
+                    {"x-amzn-ErrorType": THROTTLING},
+                )
+            try:
+                modelo = unquote(rota["modelo"])
+                if rota["operacao"] == "invoke-with-response-stream":
+                    return self.stream(modelo, pedido)
+                if "inputText" in pedido:
+                    dados, headers = fake.invoke_embedding(pedido)
+                else:
+                    dados, headers = fake.invoke_chat(modelo, pedido)
+                self.responder(200, dados, headers)
+            finally:
+                fake.liberar()
+
+        def stream(self, modelo, pedido):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in fake.stream_chat(modelo, pedido):
+                mensagem = event_message(chunk)
+                self.wfile.write(f"{len(mensagem):x}\r\n".encode("ascii") + mensagem + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            pass  # Uma linha por chamada polui o log
+
+    return Handler
+
+
+def serve(fake: FakeBedrock, host: str = "127.0.0.1", port: int = 8200) -> ThreadingHTTPServer:
+    """
+    Cria o servidor (port=0 escolhe uma porta livre, ver server_address).
+
+    Quem chama decide entre serve_forever() e uma thread em segundo plano.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,149 @@
+from collections.abc import Mapping
+from decimal import Decimal
+import orjson
+
+
+def _default(obj):
+    """Tipos fora do JSON nativo do orjson (pickles legados podem ter Decimal)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def product_fragment(produto: dict, campos=None) -> bytes:
+    """
+    JSON do produto do catálogo sem o "}" final.
+
+    Calculado uma vez por versão do índice; a resposta de cada busca só
+    acrescenta os campos da consulta (score, score_rerank) e fecha o objeto.
+
+    Args:
+        produto: Produto do catálogo
+        campos: Apenas estes campos, nesta ordem (None = todos)
+    """
+    if campos is not None:
+        produto = {campo: produto[campo] for campo in campos if campo in produto}
+    return orjson.dumps(produto, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)[:-1]
+
+
+class ScoredProduct(Mapping):
+    """
+    Resultado de busca: produto do catálogo + campos da consulta.
+
+    Lê os campos do dict do catálogo sem copiá-lo (o snapshot do índice é
+    imutável) e guarda à parte os campos calculados na busca. Com o
+    fragmento JSON pré-serializado do produto, to_json() só serializa os
+    campos da consulta (ver renderers.ORJSONRenderer).
+
+    `visiveis` restringe os campos expostos (fields=, ver project); o
+    fragmento, nesse caso, contém só os campos visíveis do catálogo.
+    """
+
+    __slots__ = ("produto", "campos", "fragmento", "visiveis")
+
+    def __init__(self, produto: dict, fragmento: bytes = None, visiveis: tuple = None, **campos):
+        self.produto = produto
+        self.campos = campos
+        self.fragmento = fragmento
+        self.visiveis = visiveis
+
+    def __getitem__(self, chave):
+        if self.visiveis is not None and chave not in self.visiveis:
+            raise KeyError(chave)
+        if chave in self.campos:
+            return self.campos[chave]
+        return self.produto[chave]
+
+    def __contains__(self, chave):
+        if self.visiveis is not None and chave not in self.visiveis:
+            return False
+        return chave in self.campos or chave in self.produto
+
+    def __iter__(self):
+        chaves = (
+            *self.produto,
+            *(chave for chave in self.campos if chave not in self.produto),
+        )
+        if self.visiveis is None:
+            return iter(chaves)
+        return (chave for chave in chaves if chave in self.visiveis)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"ScoredProduct({dict(self)!r})"
+
+    def __reduce__(self):
+        # Resultados compartilhados entre workers passam pelo cache (pickle)
+        return (_restore, (self.produto, self.fragmento, self.visiveis, self.campos))
+
+    def with_fields(self, **campos) -> "ScoredProduct":
+        """Novo resultado com campos da consulta adicionais (mesmo produto e fragmento)"""
+        return ScoredProduct(self.produto, self.fragmento, self.visiveis, **{**self.campos, **campos})
+
+    def project(self, visiveis: tuple, fragmento: bytes = None) -> "ScoredProduct":
+        """
+        Mesmo resultado restrito aos campos `visiveis`.
+
+        Args:
+            visiveis: Campos expostos, na ordem da resposta
+            fragmento: product_fragment(produto, visiveis), se pré-calculado
+        """
+        return ScoredProduct(self.produto, fragmento, visiveis, **self.campos)
+
+    def to_json(self) -> bytes:
+        """JSON do resultado: fragmento do catálogo + campos da consulta"""
+        campos = self.campos
+        if self.visiveis is not None:
+            campos = {chave: valor for chave, valor in campos.items() if chave in self.visiveis}
+
+        if self.fragmento is None or any(chave in self.produto for chave in campos):
+            return orjson.dumps(dict(self), default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+        if not campos:
+            return self.fragmento + b"}"
+
+        corpo = orjson.dumps(campos, option=orjson.OPT_SERIALIZE_NUMPY)
+        separador = b"," if len(self.fragmento) > 1 else b""
+        return self.fragmento + separador + corpo[1:]
+
+
+def _restore(produto, fragmento, visiveis, campos):
+    return ScoredProduct(produto, fragmento, visiveis, **campos)
+
+
+def project_results(produtos, visiveis: tuple, fragmentos: dict = None, catalogo: dict = None):
+    """
+    Restringe os resultados de uma busca aos campos pedidos (fields=).
+
+    Args:
+        produtos: Resultados (ScoredProduct ou dict)
+        visiveis: Campos expostos (None = todos)
+        fragmentos: {id: product_fragment(produto, visiveis)} da versão do índice
+        catalogo: Catálogo da mesma versão dos fragmentos; um produto de outra
+            versão (troca de índice durante a busca) é serializado na hora
+
+    Returns:
+        list: Resultados projetados, sem copiar os produtos do catálogo
+    """
+    if visiveis is None:
+        return produtos
+
+    resultados = []
+    for produto in produtos:
+        if isinstance(produto, ScoredProduct):
+            pid = produto.produto.get("id")
+            fragmento = None
+            if fragmentos is not None and catalogo is not None and catalogo.get(pid) is produto.produto:
+                fragmento = fragmentos.get(pid)
+            resultados.append(produto.project(visiveis, fragmento))
+        else:
+            resultados.append({campo: produto[campo] for campo in visiveis if campo in produto})
+    return resultados
+
+
+def with_fields(produto, **campos):
+    """Resultado com campos adicionais, para ScoredProduct ou dict (ex.: pgvector)"""
+    if isinstance(produto, ScoredProduct):
+        return produto.with_fields(**campos)
+    return {**produto, **campos}
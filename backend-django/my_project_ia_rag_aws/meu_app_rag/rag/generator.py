@@ -1,34 +1,71 @@
-import boto3
+import threading
+import time
 from langchain_aws import ChatBedrock
 from langchain_core.messages import HumanMessage, SystemMessage
+from .bedrock_client import get_bedrock_client
+from .resilience import BedrockUnavailable, get_breaker, is_backend_failure, run_with_deadline
+from . import metrics
 from config.settings_rag import (
-    AWS_REGION, 
-    BEDROCK_MODEL_ID,
-    MAX_TOKENS,
+    BEDROCK_MODEL_TIERS,
+    BEDROCK_DEFAULT_TIER,
     TEMPERATURE,
     TOP_P,
-    HISTORICO_MAX
+    HISTORICO_MAX,
+    RAG_GENERATION_MIN_BUDGET
 )
 
+# Resposta fixa quando a busca não encontra produtos relevantes (sem chamar o LLM)
+RESPOSTA_SEM_PRODUTOS = (
+    "Não encontrei produtos que correspondam à sua busca. "
+    "Tente reformular sua pergunta ou buscar por outras características!"
+)
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(tier: str) -> ChatBedrock:
+    """
+    Modelo do processo para o nível informado (BEDROCK_MODEL_TIERS).
+
+    Criado uma vez e compartilhado: max_tokens vai em cada chamada, então
+    o objeto não muda entre requisições.
+    """
+    with _models_lock:
+        if tier not in _models:
+            config = BEDROCK_MODEL_TIERS[tier]
+            _models[tier] = ChatBedrock(
+                model_id=config["model_id"],
+                client=get_bedrock_client(),
+                model_kwargs={
+                    "max_tokens": config["max_tokens"],
+                    "temperature": TEMPERATURE,
+                    "top_p": TOP_P
+                }
+            )
+        return _models[tier]
+
+
+def generation_cost(tier: str, tokens_entrada: int, tokens_saida: int) -> float:
+    """Custo estimado (US$) de uma geração, pelos preços de BEDROCK_MODEL_TIERS"""
+    config = BEDROCK_MODEL_TIERS[tier]
+    return (
+        tokens_entrada / 1000 * config["custo_entrada_1k"]
+        + tokens_saida / 1000 * config["custo_saida_1k"]
+    )
+
 
 class ResponseGenerator:
-    """Gerador de respostas usando Claude via AWS Bedrock."""
+    """Gerador de respostas usando Claude via AWS Bedrock (modelo por nível)."""
 
     def __init__(self):
-        self.client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=AWS_REGION
-        )
-
-        self.model = ChatBedrock(
-            model_id=BEDROCK_MODEL_ID,
-            client=self.client,
-            model_kwargs={
-                "max_tokens": MAX_TOKENS,
-                "temperature": TEMPERATURE,
-                "top_p": TOP_P
-            }
-        )
+        self.client = get_bedrock_client()
+
+        # Um modelo e um circuit breaker por nível: lentidão ou throttling
+        # de um modelo não bloqueia o outro
+        self.models = {tier: get_model(tier) for tier in BEDROCK_MODEL_TIERS}
+        self.breakers = {tier: get_breaker(f"generation.{tier}") for tier in BEDROCK_MODEL_TIERS}
 
         # Histórico de conversação
         self.historico = []
@@ -58,23 +95,28 @@ class ResponseGenerator:
 
         return False
 
-    def generate(self, query: str, context: str) -> str:
+    def generate(self, query: str, context: str, deadline=None,
+                 tier: str = BEDROCK_DEFAULT_TIER, max_tokens: int = None) -> str:
         """
         Gera resposta baseada na consulta e contexto fornecidos.
         
         Args:
             query: Pergunta do usuário
             context: Contexto dos produtos encontrados
+            deadline: Prazo da requisição (Deadline) ou None
+            tier: Nível do modelo (BEDROCK_MODEL_TIERS, ver router.choose_tier)
+            max_tokens: Limite da resposta (None = padrão do nível)
             
         Returns:
             str: Resposta gerada pelo LLM
+            
+        Raises:
+            BedrockUnavailable: Se o LLM falhar, estourar o prazo ou o
+                circuit breaker estiver aberto
         """
         # Se contexto não tem produto → retorno automático
         if self._contexto_invalido(context):
-            return (
-                "Não encontrei produtos que correspondam à sua busca. "
-                "Tente reformular sua pergunta ou buscar por outras características!"
-            )
+            return RESPOSTA_SEM_PRODUTOS
 
         # Prompt estruturado para o Claude
         system_prompt = f"""
@@ -110,8 +152,30 @@ Ajudar o cliente a encontrar o produto ideal de forma clara, objetiva e útil.
             HumanMessage(content=query)
         ]
 
+        max_tokens = max_tokens or BEDROCK_MODEL_TIERS[tier]["max_tokens"]
+        inicio = time.perf_counter()
+
         try:
-            resposta = self.model.invoke(messages).content.strip()
+            mensagem = run_with_deadline(
+                lambda: self.models[tier].invoke(messages, max_tokens=max_tokens),
+                deadline=deadline,
+                breaker=self.breakers[tier],
+                etapa="geração da resposta",
+                minimo=RAG_GENERATION_MIN_BUDGET,
+            )
+            resposta = mensagem.content.strip()
+
+            # Latência, tokens e custo por nível (ver /api/rag/metrics/)
+            uso = mensagem.additional_kwargs.get("usage") or {}
+            entrada = uso.get("prompt_tokens", 0)
+            saida = uso.get("completion_tokens", 0)
+            metrics.observe(
+                f"modelo.{tier}",
+                time.perf_counter() - inicio,
+                tokens_entrada=entrada,
+                tokens_saida=saida,
+                custo_usd=generation_cost(tier, entrada, saida),
+            )
 
             # Salvar no histórico (limitado)
             self.historico.append({
@@ -129,8 +193,17 @@ Ajudar o cliente a encontrar o produto ideal de forma clara, objetiva e útil.
 
             return resposta
 
+        except BedrockUnavailable:
+            metrics.observe(f"modelo_falha.{tier}", time.perf_counter() - inicio)
+            raise
+
         except Exception as e:
-            return f"Erro ao gerar resposta: {str(e)}"
+            metrics.observe(f"modelo_falha.{tier}", time.perf_counter() - inicio)
+            if not is_backend_failure(e):
+                # Requisição recusada (ex.: ValidationException): erro nosso,
+                # não indisponibilidade; não vira resposta degradada
+                raise RuntimeError(f"❌ Bedrock recusou a requisição: {str(e)}") from e
+            raise BedrockUnavailable(f"Erro ao gerar resposta: {str(e)}") from e
 
     def clear_history(self):
         """Limpa o histórico de conversação"""
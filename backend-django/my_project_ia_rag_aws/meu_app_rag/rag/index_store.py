@@ -0,0 +1,600 @@
+import os
+import json
+import uuid
+import shutil
+import pickle
+import hashlib
+from datetime import datetime, timezone
+import numpy as np
+from django.core.exceptions import ImproperlyConfigured
+from config.settings_rag import (
+    CATALOGO_PKL,
+    VECTORS_PKL,
+    RAG_INDEX_DIR,
+    RAG_INDEX_KEEP_VERSIONS,
+    RAG_INDEX_VERIFY_CHECKSUMS,
+    RAG_EMBEDDING_CHUNK_SIZE,
+)
+
+MANIFEST_FILE = "manifest.json"
+CATALOGO_FILE = "catalogo.jsonl"
+# Catálogo em exportação (renomeado para CATALOGO_FILE ao final)
+CATALOGO_PARCIAL_FILE = "catalogo.jsonl.part"
+# Versões publicadas antes do catálogo em JSONL
+LEGACY_CATALOGO_FILE = "catalogo.pkl"
+IDS_FILE = "ids.npy"
+VECTORS_FILE = "vectors.npy"
+POINTER_FILE = "CURRENT"
+
+# Checkpoint do build: vetores float32 e ids int64 crus, gravados em append
+CHECKPOINT_META_FILE = "checkpoint.json"
+CHECKPOINT_IDS_FILE = "checkpoint_ids.i64"
+CHECKPOINT_VECTORS_FILE = "checkpoint_vectors.f32"
+
+# Colunas de Produto exportadas para o catálogo do índice
+CATALOGO_CAMPOS = [
+    "id", "nome", "categoria", "subcategoria", "preco", "preco_promocional",
+    "marca", "cor", "tamanho", "material", "estoque", "descricao",
+    "especificacoes", "avaliacao", "num_avaliacoes", "peso", "dimensoes",
+]
+
+
+def catalogo_item(row: dict) -> dict:
+    """Converte uma linha de Produto (`.values(*CATALOGO_CAMPOS)`) no formato do catálogo"""
+    produto = {campo: row[campo] for campo in CATALOGO_CAMPOS}
+    produto["preco"] = float(row["preco"]) if row["preco"] else 0
+    for campo in ("preco_promocional", "avaliacao", "peso"):
+        produto[campo] = float(row[campo]) if row[campo] else None
+    return produto
+
+
+def _sha256(path: str) -> str:
+    """Calcula o SHA-256 de um arquivo em blocos"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _fsync_dir(path: str):
+    """Garante que renomeações dentro do diretório cheguem ao disco (POSIX)"""
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _truncate_partial_line(path: str):
+    """Remove bytes após a última quebra de linha do arquivo"""
+    with open(path, "rb+") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            passo = min(64 * 1024, pos)
+            pos -= passo
+            f.seek(pos)
+            fim = f.read(passo).rfind(b"\n")
+            if fim != -1:
+                f.truncate(pos + fim + 1)
+                return
+        f.truncate(0)
+
+
+def _read_catalogo(path: str) -> dict:
+    """Catálogo {id: produto} de uma versão publicada (JSONL ou pickle legado)"""
+    jsonl = os.path.join(path, CATALOGO_FILE)
+    if os.path.exists(jsonl):
+        catalogo = {}
+        with open(jsonl, "rb") as f:
+            for linha in f:
+                produto = json.loads(linha)
+                catalogo[produto["id"]] = produto
+        return catalogo
+
+    with open(os.path.join(path, LEGACY_CATALOGO_FILE), "rb") as f:
+        return pickle.load(f)
+
+
+class IndexSnapshot:
+    """Versão imutável do índice carregada em memória."""
+
+    def __init__(self, version, product_ids, product_vectors, catalogo, manifest=None):
+        self.version = version
+        self.product_ids = product_ids
+        self.product_vectors = product_vectors
+        self.catalogo = catalogo
+        self.manifest = manifest or {}
+        # Estruturas derivadas, calculadas sob demanda por quem usa o snapshot
+        self.cache = {}
+
+
+class IndexBuild:
+    """
+    Build de índice em andamento, gravado num diretório de staging.
+
+    Só vira uma versão visível aos workers quando publicado por
+    IndexStore.publish().
+
+    O catálogo é exportado em streaming (append_catalogo, um produto
+    JSON por linha) e os embeddings são acrescentados em blocos a um
+    checkpoint (append_chunk), então um build interrompido pode ser
+    retomado a partir dos produtos já exportados (iter_catalogo) e dos
+    ids já gravados (embedded_ids). O índice final é montado direto do
+    disco (assemble).
+    """
+
+    def __init__(self, store, version: str, path: str):
+        self.store = store
+        self.version = version
+        self.path = path
+
+    @property
+    def catalogo_path(self) -> str:
+        return os.path.join(self.path, CATALOGO_FILE)
+
+    @property
+    def catalogo_parcial_path(self) -> str:
+        return os.path.join(self.path, CATALOGO_PARCIAL_FILE)
+
+    @property
+    def ids_path(self) -> str:
+        return os.path.join(self.path, IDS_FILE)
+
+    @property
+    def vectors_path(self) -> str:
+        return os.path.join(self.path, VECTORS_FILE)
+
+    @property
+    def checkpoint_meta_path(self) -> str:
+        return os.path.join(self.path, CHECKPOINT_META_FILE)
+
+    @property
+    def checkpoint_ids_path(self) -> str:
+        return os.path.join(self.path, CHECKPOINT_IDS_FILE)
+
+    @property
+    def checkpoint_vectors_path(self) -> str:
+        return os.path.join(self.path, CHECKPOINT_VECTORS_FILE)
+
+    def has_catalogo(self) -> bool:
+        """Indica se a exportação do catálogo foi concluída"""
+        return os.path.isfile(self.catalogo_path)
+
+    def append_catalogo(self, produtos):
+        """
+        Acrescenta um bloco de produtos ao catálogo em exportação.
+
+        Args:
+            produtos: Lista de dicts de produto (com 'id')
+        """
+        with open(self.catalogo_parcial_path, "ab") as f:
+            for produto in produtos:
+                f.write(json.dumps(produto, ensure_ascii=False).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def finish_catalogo(self):
+        """Marca a exportação do catálogo como concluída"""
+        if not os.path.exists(self.catalogo_parcial_path):
+            open(self.catalogo_parcial_path, "ab").close()
+        os.replace(self.catalogo_parcial_path, self.catalogo_path)
+
+    def iter_catalogo(self):
+        """
+        Lê o catálogo do build produto a produto (concluído ou parcial).
+
+        Uma última linha incompleta do catálogo parcial (escrita
+        interrompida) é descartada.
+        """
+        if self.has_catalogo():
+            path = self.catalogo_path
+        elif os.path.exists(self.catalogo_parcial_path):
+            path = self.catalogo_parcial_path
+            _truncate_partial_line(path)
+        else:
+            return
+
+        with open(path, "rb") as f:
+            for linha in f:
+                yield json.loads(linha)
+
+    def checkpoint_dims(self):
+        """Dimensão dos vetores do checkpoint (None se ainda vazio)"""
+        try:
+            with open(self.checkpoint_meta_path, encoding="utf-8") as f:
+                return json.load(f)["dims"]
+        except FileNotFoundError:
+            return None
+
+    def append_chunk(self, ids, vectors):
+        """
+        Acrescenta um bloco de embeddings ao checkpoint.
+
+        Os vetores são gravados antes dos ids: o arquivo de ids funciona
+        como marcador de commit, então um bloco interrompido no meio é
+        descartado por checkpoint_count().
+
+        Args:
+            ids: IDs dos produtos do bloco
+            vectors: Vetores do bloco (mesma ordem dos ids)
+        """
+        if len(ids) == 0:
+            return
+
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        dims = int(vectors.shape[1])
+
+        atual = self.checkpoint_dims()
+        if atual is None:
+            tmp = self.checkpoint_meta_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"dims": dims}, f)
+            os.replace(tmp, self.checkpoint_meta_path)
+        elif atual != dims:
+            raise ValueError(
+                f"❌ Dimensão inconsistente no checkpoint: {dims} (esperado {atual})"
+            )
+
+        # Descarta restos de um bloco interrompido antes de acrescentar
+        self.checkpoint_count()
+
+        for path, arr in ((self.checkpoint_vectors_path, vectors), (self.checkpoint_ids_path, ids)):
+            with open(path, "ab") as f:
+                arr.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def checkpoint_count(self) -> int:
+        """
+        Número de embeddings íntegros no checkpoint.
+
+        Trunca os arquivos caso a última escrita tenha sido interrompida.
+        """
+        dims = self.checkpoint_dims()
+        if not dims or not os.path.exists(self.checkpoint_ids_path):
+            return 0
+
+        ids_bytes = np.dtype(np.int64).itemsize
+        row_bytes = np.dtype(np.float32).itemsize * dims
+        n = min(
+            os.path.getsize(self.checkpoint_ids_path) // ids_bytes,
+            os.path.getsize(self.checkpoint_vectors_path) // row_bytes,
+        )
+
+        for path, tamanho in ((self.checkpoint_ids_path, n * ids_bytes),
+                              (self.checkpoint_vectors_path, n * row_bytes)):
+            if os.path.getsize(path) != tamanho:
+                os.truncate(path, tamanho)
+        return n
+
+    def embedded_ids(self) -> set:
+        """IDs de produtos já gravados no checkpoint"""
+        n = self.checkpoint_count()
+        if n == 0:
+            return set()
+        return set(np.fromfile(self.checkpoint_ids_path, dtype=np.int64, count=n).tolist())
+
+    def assemble(self, chunk_size: int = RAG_EMBEDDING_CHUNK_SIZE) -> int:
+        """
+        Monta ids.npy e vectors.npy a partir do checkpoint.
+
+        Os vetores são copiados em blocos de um memmap para outro, então o
+        pico de memória depende de chunk_size e não do tamanho do catálogo.
+
+        Returns:
+            int: Número de embeddings no índice final
+        """
+        n = self.checkpoint_count()
+        if n == 0:
+            self.write_vectors([], [])
+            self._remove_checkpoint()
+            return 0
+
+        dims = self.checkpoint_dims()
+        ids = np.fromfile(self.checkpoint_ids_path, dtype=np.int64, count=n)
+        origem = np.memmap(self.checkpoint_vectors_path, dtype=np.float32, mode="r", shape=(n, dims))
+
+        tmp = self.vectors_path + ".tmp"
+        destino = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(n, dims))
+        for inicio in range(0, n, chunk_size):
+            destino[inicio:inicio + chunk_size] = origem[inicio:inicio + chunk_size]
+        destino.flush()
+        del destino, origem
+
+        with open(tmp, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, self.vectors_path)
+
+        with open(self.ids_path, "wb") as f:
+            np.save(f, ids)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._remove_checkpoint()
+        return n
+
+    def _remove_checkpoint(self):
+        for nome in (CHECKPOINT_META_FILE, CHECKPOINT_IDS_FILE, CHECKPOINT_VECTORS_FILE):
+            try:
+                os.remove(os.path.join(self.path, nome))
+            except FileNotFoundError:
+                pass
+
+    def write_vectors(self, ids, vectors):
+        """
+        Grava ids e vetores do build.
+
+        Args:
+            ids: Sequência de IDs de produto
+            vectors: Matriz (n, dims) de embeddings
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            vectors = vectors.reshape(len(ids), -1) if len(ids) else vectors.reshape(0, 0)
+
+        for path, arr in ((self.ids_path, ids), (self.vectors_path, vectors)):
+            with open(path, "wb") as f:
+                np.save(f, arr)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def discard(self):
+        """Remove o diretório de staging"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class IndexStore:
+    """
+    Armazenamento versionado (blue/green) do índice vetorial.
+
+    Estrutura:
+        <root>/versions/<versão>/{catalogo.jsonl, ids.npy, vectors.npy, manifest.json}
+        <root>/staging/<versão>/   → builds em andamento
+        <root>/CURRENT             → nome da versão ativa
+
+    Cada build é gravado em um diretório próprio e só é ativado pela troca
+    atômica do arquivo CURRENT (os.replace), então um worker nunca lê um
+    par catálogo/vetores misturado nem um build incompleto.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = str(root or RAG_INDEX_DIR)
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.staging_dir = os.path.join(self.root, "staging")
+        self.pointer_path = os.path.join(self.root, POINTER_FILE)
+
+    def version_path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def current_version(self):
+        """
+        Lê a versão ativa.
+
+        Returns:
+            str ou None: Nome da versão ativa
+        """
+        try:
+            with open(self.pointer_path, "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def list_versions(self):
+        """Versões publicadas, da mais antiga para a mais nova"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            nome for nome in os.listdir(self.versions_dir)
+            if os.path.isfile(os.path.join(self.versions_dir, nome, MANIFEST_FILE))
+        )
+
+    def resumable_builds(self):
+        """Builds interrompidos (em staging) com catálogo exportado, total ou parcialmente"""
+        if not os.path.isdir(self.staging_dir):
+            return []
+        return sorted(
+            nome for nome in os.listdir(self.staging_dir)
+            if any(
+                os.path.isfile(os.path.join(self.staging_dir, nome, arquivo))
+                for arquivo in (CATALOGO_FILE, CATALOGO_PARCIAL_FILE)
+            )
+        )
+
+    def open_build(self, version: str) -> IndexBuild:
+        """Reabre um build em staging para retomá-lo"""
+        path = os.path.join(self.staging_dir, version)
+        if not os.path.isdir(path):
+            raise ImproperlyConfigured(f"❌ Build inexistente em staging: {version}")
+        return IndexBuild(self, version, path)
+
+    def new_build(self) -> IndexBuild:
+        """Cria um diretório de staging para um novo build"""
+        version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f") + "-" + uuid.uuid4().hex[:6]
+        path = os.path.join(self.staging_dir, version)
+        os.makedirs(path)
+        return IndexBuild(self, version, path)
+
+    def publish(self, build: IndexBuild, model_id: str, activate: bool = True) -> dict:
+        """
+        Publica um build: grava o manifest, move para versions/ e ativa.
+
+        Args:
+            build: Build concluído
+            model_id: Modelo de embeddings usado
+            activate: Se True, troca o ponteiro CURRENT para a nova versão
+
+        Returns:
+            dict: Manifest da versão publicada
+        """
+        vectors = np.load(build.vectors_path, mmap_mode="r")
+        product_count = int(vectors.shape[0])
+        dims = int(vectors.shape[1]) if vectors.ndim == 2 and product_count else 0
+        del vectors
+
+        manifest = {
+            "version": build.version,
+            "model_id": model_id,
+            "dims": dims,
+            "product_count": product_count,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "files": {
+                nome: {
+                    "sha256": _sha256(os.path.join(build.path, nome)),
+                    "bytes": os.path.getsize(os.path.join(build.path, nome)),
+                }
+                for nome in (CATALOGO_FILE, IDS_FILE, VECTORS_FILE)
+            },
+        }
+
+        with open(os.path.join(build.path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        os.replace(build.path, self.version_path(build.version))
+        _fsync_dir(self.versions_dir)
+
+        if activate:
+            self.activate(build.version)
+            self.gc()
+
+        return manifest
+
+    def activate(self, version: str):
+        """
+        Troca atomicamente a versão ativa.
+
+        Args:
+            version: Versão publicada a ativar
+        """
+        if not os.path.isfile(os.path.join(self.version_path(version), MANIFEST_FILE)):
+            raise ImproperlyConfigured(f"❌ Versão de índice inexistente: {version}")
+
+        tmp = f"{self.pointer_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.pointer_path)
+        _fsync_dir(self.root)
+
+    def gc(self, keep: int = RAG_INDEX_KEEP_VERSIONS):
+        """
+        Remove versões antigas, mantendo as `keep` mais novas e a ativa.
+
+        Returns:
+            list: Versões removidas
+        """
+        atual = self.current_version()
+        versoes = self.list_versions()
+        manter = set(versoes[-keep:]) if keep > 0 else set()
+        if atual:
+            manter.add(atual)
+
+        removidas = []
+        for version in versoes:
+            if version not in manter:
+                shutil.rmtree(self.version_path(version), ignore_errors=True)
+                removidas.append(version)
+
+        # Builds em staging mais antigos que a última versão publicada
+        # foram abandonados e não serão mais retomados
+        if versoes and os.path.isdir(self.staging_dir):
+            for version in os.listdir(self.staging_dir):
+                if version < versoes[-1]:
+                    shutil.rmtree(os.path.join(self.staging_dir, version), ignore_errors=True)
+                    removidas.append(version)
+        return removidas
+
+    def read_manifest(self, version: str) -> dict:
+        """
+        Manifest de uma versão publicada.
+
+        Raises:
+            ImproperlyConfigured: Manifest ausente, ilegível ou sem os
+                campos gravados por publish()
+        """
+        try:
+            with open(os.path.join(self.version_path(version), MANIFEST_FILE), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ImproperlyConfigured(f"❌ Manifest inválido na versão {version}: {e}")
+        if not isinstance(manifest, dict) or not {"product_count", "files"} <= manifest.keys():
+            raise ImproperlyConfigured(f"❌ Manifest incompleto na versão {version}")
+        return manifest
+
+    def load(self, version: str = None, mmap_vectors: bool = False) -> IndexSnapshot:
+        """
+        Carrega uma versão do índice (a ativa por padrão).
+
+        Sem versão publicada, cai nos arquivos legados CATALOGO_PKL/VECTORS_PKL.
+
+        Args:
+            version: Versão publicada (None = a ativa)
+            mmap_vectors: Mapeia vectors.npy em vez de lê-lo para a memória
+
+        Returns:
+            IndexSnapshot: Índice carregado
+        """
+        version = version or self.current_version()
+        if version is None:
+            return self.load_legacy()
+
+        path = self.version_path(version)
+        manifest = self.read_manifest(version)
+
+        if RAG_INDEX_VERIFY_CHECKSUMS:
+            for nome, info in manifest["files"].items():
+                if _sha256(os.path.join(path, nome)) != info["sha256"]:
+                    raise ImproperlyConfigured(
+                        f"❌ Checksum inválido em {nome} (versão {version}). "
+                        f"Execute: python manage.py popular_embeddings --force"
+                    )
+
+        ids = np.load(os.path.join(path, IDS_FILE))
+        vectors = np.load(
+            os.path.join(path, VECTORS_FILE), mmap_mode="r" if mmap_vectors else None
+        ).astype(np.float32, copy=False)
+        catalogo = _read_catalogo(path)
+
+        if len(ids) != manifest["product_count"] or len(vectors) != len(ids):
+            raise ImproperlyConfigured(
+                f"❌ Índice inconsistente na versão {version}: "
+                f"{len(ids)} ids, {len(vectors)} vetores, manifest={manifest['product_count']}"
+            )
+
+        return IndexSnapshot(version, ids.tolist(), vectors, catalogo, manifest)
+
+    def load_legacy(self) -> IndexSnapshot:
+        """Carrega os arquivos pickle legados (antes do índice versionado)"""
+        if not os.path.exists(VECTORS_PKL):
+            raise ImproperlyConfigured(
+                f"❌ Arquivo {VECTORS_PKL} não encontrado. "
+                f"Execute: python manage.py popular_embeddings"
+            )
+
+        if not os.path.exists(CATALOGO_PKL):
+            raise ImproperlyConfigured(
+                f"❌ Arquivo {CATALOGO_PKL} não encontrado. "
+                f"Execute: python manage.py popular_embeddings"
+            )
+
+        with open(VECTORS_PKL, "rb") as f:
+            data = pickle.load(f)
+
+        with open(CATALOGO_PKL, "rb") as f:
+            catalogo = pickle.load(f)
+
+        return IndexSnapshot(
+            None,
+            list(data["ids"]),
+            np.array(data["vectors"], dtype=np.float32),
+            catalogo,
+        )
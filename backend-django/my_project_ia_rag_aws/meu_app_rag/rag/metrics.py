@@ -0,0 +1,116 @@
+import threading
+from collections import deque
+import numpy as np
+
+from config.settings_rag import RAG_METRICS_WINDOW
+
+# Métricas do processo (cada worker do gunicorn tem as suas), expostas em
+# /api/rag/metrics/. Sem dependência externa: contagens e somas desde o
+# início do worker, percentis sobre as últimas RAG_METRICS_WINDOW amostras.
+# Eventos sem duração (motivos de rota, respostas degradadas) são
+# contadores, para não entrarem nos percentis de latência.
+
+
+class Metric:
+    """Latências de uma operação e somas de valores associados (tokens, custo)"""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.total = 0
+        self.segundos = 0.0
+        self.somas = {}
+        self._amostras = deque(maxlen=RAG_METRICS_WINDOW)
+        self._lock = threading.Lock()
+
+    def observe(self, segundos: float, **valores):
+        """
+        Registra uma execução.
+
+        Args:
+            segundos: Duração
+            **valores: Valores somados por execução (ex.: tokens_saida=120)
+        """
+        with self._lock:
+            self.total += 1
+            self.segundos += segundos
+            self._amostras.append(segundos)
+            for chave, valor in valores.items():
+                self.somas[chave] = self.somas.get(chave, 0) + valor
+
+    @property
+    def media(self) -> float:
+        """Duração média (segundos) desde o início do processo"""
+        return self.segundos / self.total if self.total else 0.0
+
+    def report(self) -> dict:
+        with self._lock:
+            amostras = np.fromiter(self._amostras, dtype=float, count=len(self._amostras))
+            total, segundos, somas = self.total, self.segundos, dict(self.somas)
+
+        relatorio = {
+            "total": total,
+            "media_ms": round(segundos / total * 1000, 2) if total else None,
+            "p50_ms": round(float(np.percentile(amostras, 50)) * 1000, 2) if amostras.size else None,
+            "p95_ms": round(float(np.percentile(amostras, 95)) * 1000, 2) if amostras.size else None,
+        }
+        for chave, valor in somas.items():
+            relatorio[chave] = round(valor, 6)
+        return relatorio
+
+
+class Counter:
+    """Número de ocorrências de um evento desde o início do processo"""
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def increment(self, n: int = 1):
+        with self._lock:
+            self.total += n
+
+
+_metrics = {}
+_counters = {}
+_metrics_lock = threading.Lock()
+
+
+def get_metric(nome: str) -> Metric:
+    """Retorna a métrica do processo com esse nome (criada no primeiro uso)"""
+    with _metrics_lock:
+        if nome not in _metrics:
+            _metrics[nome] = Metric(nome)
+        return _metrics[nome]
+
+
+def observe(nome: str, segundos: float, **valores):
+    """Atalho para get_metric(nome).observe(...)"""
+    get_metric(nome).observe(segundos, **valores)
+
+
+def report(prefixo: str = "") -> dict:
+    """Relatório das métricas cujo nome começa com o prefixo ({nome: relatório})"""
+    with _metrics_lock:
+        metricas = [m for nome, m in sorted(_metrics.items()) if nome.startswith(prefixo)]
+    return {m.nome[len(prefixo):]: m.report() for m in metricas}
+
+
+def get_counter(nome: str) -> Counter:
+    """Retorna o contador do processo com esse nome (criado no primeiro uso)"""
+    with _metrics_lock:
+        if nome not in _counters:
+            _counters[nome] = Counter(nome)
+        return _counters[nome]
+
+
+def increment(nome: str, n: int = 1):
+    """Atalho para get_counter(nome).increment(n)"""
+    get_counter(nome).increment(n)
+
+
+def counts(prefixo: str = "") -> dict:
+    """Contadores cujo nome começa com o prefixo ({nome: total})"""
+    with _metrics_lock:
+        contadores = [c for nome, c in sorted(_counters.items()) if nome.startswith(prefixo)]
+    return {c.nome[len(prefixo):]: c.total for c in contadores}
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def mmr_select(vectors, relevance, k: int, lambda_mult: float):
+    """
+    Seleciona k itens por Maximal Marginal Relevance.
+
+    A cada passo escolhe o item que maximiza
+
+        λ * relevância - (1 - λ) * maior similaridade com os já escolhidos
+
+    A matriz de similaridade entre candidatos é calculada uma única vez
+    (k_candidatos x k_candidatos) e a maior similaridade de cada candidato
+    é atualizada incrementalmente, então o custo depende só do número de
+    candidatos, não do tamanho do catálogo.
+
+    Args:
+        vectors: Matriz (n, dims) dos vetores dos candidatos
+        relevance: Relevância de cada candidato (n,)
+        k: Número de itens a selecionar
+        lambda_mult: 1.0 = só relevância; 0.0 = só diversidade
+
+    Returns:
+        list: Índices dos candidatos selecionados, em ordem de seleção
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    M = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(M, axis=1, keepdims=True)
+    norms[norms == 0] = 1e-8  # Evita divisão por zero
+    M = M / norms
+    similaridade = M @ M.T
+
+    selecionados = [int(np.argmax(relevance))]
+    disponivel = np.ones(n, dtype=bool)
+    disponivel[selecionados[0]] = False
+    max_sim = similaridade[selecionados[0]].astype(np.float64)
+
+    while len(selecionados) < k:
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * max_sim
+        mmr[~disponivel] = -np.inf
+        escolhido = int(np.argmax(mmr))
+
+        selecionados.append(escolhido)
+        disponivel[escolhido] = False
+        np.maximum(max_sim, similaridade[escolhido], out=max_sim)
+
+    return selecionados
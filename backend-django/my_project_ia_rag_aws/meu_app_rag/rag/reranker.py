@@ -0,0 +1,112 @@
+import numpy as np
+from .fragments import with_fields
+from config.settings_rag import (
+    RAG_RERANK_WEIGHTS,
+    RAG_RERANK_OUT_OF_STOCK_PENALTY,
+    RAG_RERANK_REVIEWS_CAP,
+)
+
+
+class FeatureReranker:
+    """
+    Segunda etapa da busca: reordena os candidatos da busca vetorial
+    combinando a similaridade com avaliação, número de avaliações,
+    desconto e estoque.
+
+    score_rerank = Σ peso_i * feature_i - penalidade * (estoque == 0)
+
+    Todas as features ficam em [0, 1] e são calculadas de uma vez sobre
+    o conjunto de candidatos (numpy), então o custo depende só do número
+    de candidatos.
+    """
+
+    def __init__(self, weights: dict = None, out_of_stock_penalty: float = None):
+        self.weights = dict(RAG_RERANK_WEIGHTS if weights is None else weights)
+        self.out_of_stock_penalty = (
+            RAG_RERANK_OUT_OF_STOCK_PENALTY if out_of_stock_penalty is None
+            else out_of_stock_penalty
+        )
+
+    def features(self, produtos):
+        """
+        Matriz de features dos candidatos.
+
+        Args:
+            produtos: Lista de produtos do catálogo (com "score")
+
+        Returns:
+            tuple: (dict nome -> np.array de features, np.array bool sem estoque)
+        """
+        n = len(produtos)
+
+        def coluna(campo):
+            return np.fromiter(
+                (p.get(campo) or 0 for p in produtos), dtype=np.float64, count=n
+            )
+
+        preco = coluna("preco")
+        promocional = coluna("preco_promocional")
+        num_avaliacoes = coluna("num_avaliacoes")
+
+        # Desconto relativo (0 sem promoção)
+        desconto = np.zeros(n)
+        em_promocao = (promocional > 0) & (preco > 0) & (promocional < preco)
+        desconto[em_promocao] = 1 - promocional[em_promocao] / preco[em_promocao]
+
+        features = {
+            "similaridade": coluna("score"),
+            "avaliacao": np.clip(coluna("avaliacao") / 5.0, 0, 1),
+            # Escala logarítmica: 10 → 1.000 avaliações pesa menos que 0 → 10
+            "popularidade": np.clip(
+                np.log1p(num_avaliacoes) / np.log1p(RAG_RERANK_REVIEWS_CAP), 0, 1
+            ),
+            "desconto": desconto,
+        }
+        sem_estoque = coluna("estoque") <= 0
+        return features, sem_estoque
+
+    def score(self, produtos):
+        """
+        Score combinado de cada candidato.
+
+        Args:
+            produtos: Candidatos da busca vetorial (com "score")
+
+        Returns:
+            np.array: score_rerank na ordem dos candidatos
+        """
+        features, sem_estoque = self.features(produtos)
+
+        final = np.zeros(len(produtos))
+        for nome, peso in self.weights.items():
+            if peso:
+                final += peso * features[nome]
+        final -= self.out_of_stock_penalty * sem_estoque
+        return final
+
+    def rerank(self, produtos, limit: int = None):
+        """
+        Reordena os candidatos pelo score combinado.
+
+        Args:
+            produtos: Candidatos da busca vetorial (com "score")
+            limit: Número de produtos a manter (None = todos)
+
+        Returns:
+            list: Produtos reordenados, com "score_rerank"; "score"
+            continua sendo a similaridade do cosseno
+        """
+        if not produtos:
+            return []
+
+        final = self.score(produtos)
+
+        # Ordenação estável: empates mantêm a ordem da busca vetorial
+        ordem = np.argsort(-final, kind="stable")
+        if limit is not None:
+            ordem = ordem[:limit]
+
+        return [
+            with_fields(produtos[i], score_rerank=round(float(final[i]), 6))
+            for i in ordem
+        ]
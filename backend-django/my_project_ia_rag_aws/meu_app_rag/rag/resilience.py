@@ -0,0 +1,220 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from botocore.exceptions import ClientError
+from config.settings_rag import (
+    RAG_BEDROCK_EXECUTOR_WORKERS,
+    RAG_BREAKER_FAILURE_THRESHOLD,
+    RAG_BREAKER_RESET_TIMEOUT,
+)
+
+
+class BedrockUnavailable(Exception):
+    """O Bedrock não pôde responder (erro, prazo esgotado ou circuito aberto)."""
+
+
+class DeadlineExceeded(BedrockUnavailable):
+    """O orçamento de latência da requisição foi esgotado."""
+
+
+class CircuitOpenError(BedrockUnavailable):
+    """O circuit breaker está aberto: a chamada falha imediatamente."""
+
+
+class Deadline:
+    """Prazo absoluto de uma requisição, repassado entre as etapas do pipeline."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Segundos restantes (nunca negativo)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Indica se o prazo já terminou"""
+        return self.remaining() <= 0
+
+    def check(self, etapa: str, minimo: float = 0.0):
+        """
+        Garante que ainda há tempo para executar uma etapa.
+
+        Args:
+            etapa: Nome da etapa (para a mensagem de erro)
+            minimo: Tempo mínimo necessário em segundos
+
+        Raises:
+            DeadlineExceeded: Se o tempo restante for menor que o mínimo
+        """
+        if self.remaining() <= minimo:
+            raise DeadlineExceeded(
+                f"⏱️ Prazo da requisição esgotado antes de: {etapa}"
+            )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples para chamadas ao Bedrock.
+
+    Estados:
+    - fechado: chamadas passam normalmente
+    - aberto: após N falhas seguidas, chamadas falham na hora
+    - meio-aberto: após o tempo de espera, uma chamada de teste é liberada
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio-aberto"
+
+    def __init__(self, nome: str,
+                 failure_threshold: int = RAG_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = RAG_BREAKER_RESET_TIMEOUT):
+        self.nome = nome
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            return self._estado
+
+    def before_call(self):
+        """
+        Verifica se a chamada pode prosseguir.
+
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto
+        """
+        with self._lock:
+            if self._estado == self.FECHADO:
+                return
+
+            if self._estado == self.ABERTO:
+                if time.monotonic() - self._aberto_em < self.reset_timeout:
+                    raise CircuitOpenError(
+                        f"🔌 Circuito '{self.nome}' aberto: Bedrock indisponível"
+                    )
+                self._estado = self.MEIO_ABERTO
+                self._teste_em_andamento = False
+
+            # Meio-aberto: apenas uma chamada de teste por vez
+            if self._teste_em_andamento:
+                raise CircuitOpenError(
+                    f"🔌 Circuito '{self.nome}' em teste: Bedrock indisponível"
+                )
+            self._teste_em_andamento = True
+
+    def record_success(self):
+        """Registra sucesso e fecha o circuito"""
+        with self._lock:
+            self._estado = self.FECHADO
+            self._falhas = 0
+            self._teste_em_andamento = False
+
+    def record_failure(self):
+        """Registra falha e abre o circuito ao atingir o limite"""
+        with self._lock:
+            self._falhas += 1
+            self._teste_em_andamento = False
+            if self._estado == self.MEIO_ABERTO or self._falhas >= self.failure_threshold:
+                self._estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Executor compartilhado para impor o prazo às chamadas bloqueantes do boto3
+_executor = ThreadPoolExecutor(
+    max_workers=RAG_BEDROCK_EXECUTOR_WORKERS,
+    thread_name_prefix="bedrock",
+)
+
+
+def get_breaker(nome: str) -> CircuitBreaker:
+    """Retorna o circuit breaker do processo para o serviço informado"""
+    with _breakers_lock:
+        if nome not in _breakers:
+            _breakers[nome] = CircuitBreaker(nome)
+        return _breakers[nome]
+
+
+def _chain(exc: BaseException):
+    """A exceção e as que ela encapsula (__cause__/__context__)"""
+    vistas = set()
+    while exc is not None and id(exc) not in vistas:
+        vistas.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def is_backend_failure(exc: Exception) -> bool:
+    """
+    Erros do cliente (4xx, exceto throttling) não indicam backend degradado.
+
+    O ChatBedrock encapsula o ClientError em ValueError, então o erro
+    original é procurado na cadeia de exceções.
+    """
+    for erro in _chain(exc):
+        if isinstance(erro, ClientError):
+            status = erro.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 500)
+            return status >= 500 or status == 429
+    return True
+
+
+def run_with_deadline(fn, deadline: Deadline = None, breaker: CircuitBreaker = None,
+                      etapa: str = "Bedrock", minimo: float = 0.0):
+    """
+    Executa uma chamada bloqueante respeitando o prazo e o circuit breaker.
+
+    Se o prazo terminar antes da resposta, a chamada é abandonada (a thread
+    termina sozinha pelo read_timeout do boto3, limitado pelo prazo da
+    requisição em bedrock_client.build_config) e DeadlineExceeded é lançada.
+
+    Args:
+        fn: Função sem argumentos
+        deadline: Prazo da requisição (None = sem limite)
+        breaker: Circuit breaker do serviço
+        etapa: Nome da etapa (para mensagens)
+        minimo: Tempo mínimo necessário para iniciar a chamada
+
+    Returns:
+        Resultado de fn()
+    """
+    if deadline is not None:
+        deadline.check(etapa, minimo)
+
+    if breaker is not None:
+        breaker.before_call()
+
+    try:
+        if deadline is None:
+            resultado = fn()
+        else:
+            future = _executor.submit(fn)
+            try:
+                resultado = future.result(timeout=deadline.remaining())
+            except FuturesTimeout:
+                future.cancel()
+                raise DeadlineExceeded(f"⏱️ Prazo da requisição esgotado em: {etapa}")
+    except DeadlineExceeded:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    except Exception as e:
+        if breaker is not None:
+            if is_backend_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        raise
+
+    if breaker is not None:
+        breaker.record_success()
+    return resultado
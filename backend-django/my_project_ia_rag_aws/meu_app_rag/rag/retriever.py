@@ -1,45 +1,78 @@
-import os
 import re
-import pickle
+import threading
 import numpy as np
 from unidecode import unidecode
-from django.core.exceptions import ImproperlyConfigured
 from .embeddings import Embeddings
-from config.settings_rag import CATALOGO_PKL, VECTORS_PKL
+from .vector_store import build_vector_store
+from .reranker import FeatureReranker
+from .mmr import mmr_select
+from .fragments import with_fields
+from config.settings_rag import (
+    RAG_RERANK_ENABLED,
+    RAG_RERANK_CANDIDATES,
+    RAG_SIMILARITY_THRESHOLD,
+    RAG_SCORE_GAP_CUTOFF,
+)
+
+
+def relevance_cutoff(scores, threshold: float = RAG_SIMILARITY_THRESHOLD,
+                     max_gap: float = RAG_SCORE_GAP_CUTOFF) -> int:
+    """
+    Quantos candidatos são relevantes, dado o score de similaridade.
+
+    Mantém o prefixo acima de `threshold` e o interrompe no primeiro
+    salto entre vizinhos maior que `max_gap`, então o número de
+    resultados se adapta à consulta.
+
+    Args:
+        scores: Similaridades em ordem decrescente
+        threshold: Similaridade mínima
+        max_gap: Maior queda permitida entre dois vizinhos (0 desativa)
+
+    Returns:
+        int: Tamanho do prefixo relevante
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = int(np.count_nonzero(scores >= threshold))
+
+    if n > 1 and max_gap > 0:
+        saltos = np.flatnonzero(scores[:n - 1] - scores[1:n] > max_gap)
+        if saltos.size:
+            n = int(saltos[0]) + 1
+    return n
 
 
 class ProductRetriever:
     """RAG - Busca vetorial de produtos usando similaridade por embeddings"""
 
-    def __init__(self):
+    def __init__(self, vector_store=None):
         self.embedding = Embeddings()
-        
-        # Validar existência dos arquivos
-        if not os.path.exists(VECTORS_PKL):
-            raise ImproperlyConfigured(
-                f"❌ Arquivo {VECTORS_PKL} não encontrado. "
-                f"Execute: python manage.py popular_embeddings"
-            )
 
-        if not os.path.exists(CATALOGO_PKL):
-            raise ImproperlyConfigured(
-                f"❌ Arquivo {CATALOGO_PKL} não encontrado. "
-                f"Execute: python manage.py popular_embeddings"
-            )
+        # Parâmetros da busca (settings por padrão; o avaliar_busca compara valores)
+        self.candidatos = RAG_RERANK_CANDIDATES
+        self.threshold = RAG_SIMILARITY_THRESHOLD
+        self.max_gap = RAG_SCORE_GAP_CUTOFF
 
-        # Carregar vetores
-        with open(VECTORS_PKL, "rb") as f:
-            data = pickle.load(f)
+        # Backend vetorial (RAG_VECTOR_BACKEND): índice em memória (padrão)
+        # ou pgvector. ImproperlyConfigured se não estiver disponível.
+        self.vector_store = vector_store or build_vector_store()
 
-        self.product_ids = data["ids"]
-        self.product_vectors = np.array(data["vectors"], dtype=np.float32)
+        # Segunda etapa: reordena os candidatos por avaliação, desconto e estoque
+        # (e, opcionalmente, diversifica com MMR — ver retrieve)
+        self.reranker = FeatureReranker() if RAG_RERANK_ENABLED else None
 
-        # Carregar catálogo
-        with open(CATALOGO_PKL, "rb") as f:
-            self.catalogo = pickle.load(f)
+    @property
+    def version(self):
+        return self.vector_store.version
 
-        if len(self.catalogo) == 0:
-            print("⚠️ Aviso: catálogo carregado, mas está vazio!")
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Troca para a nova versão do índice, se uma tiver sido ativada.
+
+        Returns:
+            bool: True se a versão mudou
+        """
+        return self.vector_store.refresh(force)
 
     def _normalize(self, text: str) -> str:
         """Normaliza texto para busca"""
@@ -49,35 +82,26 @@ class ProductRetriever:
         text = re.sub(r"\s+", " ", text)
         return text.strip()
 
-    def _cosine_similarity(self, q, M):
-        """
-        Calcula similaridade do cosseno entre vetor q e matriz M.
-        
-        Args:
-            q: Vetor de consulta (1D)
-            M: Matriz de vetores (2D)
-            
-        Returns:
-            np.array: Scores de similaridade
-        """
-        q_norm = np.linalg.norm(q)
-        if q_norm == 0:
-            return np.zeros(M.shape[0])
-
-        q = q / q_norm
-        M_norm = np.linalg.norm(M, axis=1, keepdims=True)
-        M_norm[M_norm == 0] = 1e-8  # Evita divisão por zero
-
-        M = M / M_norm
-        return np.dot(M, q)
-
-    def retrieve(self, query: str, limit: int = 5):
+    def retrieve(self, query: str, limit: int = 5, deadline=None, filtros: dict = None,
+                 mmr_lambda: float = None):
         """
         Busca produtos mais similares à consulta.
         
+        Candidatos abaixo de RAG_SIMILARITY_THRESHOLD ou após um salto de
+        score (ver relevance_cutoff) são descartados, então a lista pode
+        ter menos que `limit` produtos — ou nenhum.
+        
+        Com o re-ranking ativo e/ou MMR, busca RAG_RERANK_CANDIDATES
+        candidatos por similaridade e devolve até `limit` deles: os
+        melhores pelo score combinado (ver FeatureReranker) ou, com
+        `mmr_lambda`, uma seleção diversificada (ver mmr_select).
+        
         Args:
             query: Texto da consulta
             limit: Número máximo de resultados
+            deadline: Prazo da requisição (Deadline) ou None
+            filtros: Filtros opcionais (categoria, preco_min, preco_max, em_estoque)
+            mmr_lambda: Peso da relevância no MMR (0 a 1); None desativa
             
         Returns:
             list: Lista de produtos com score de similaridade
@@ -87,29 +111,49 @@ class ProductRetriever:
 
         # Gerar embedding
         query_vector = np.array(
-            self.embedding.embed(query_norm), 
+            self.embedding.embed(query_norm, deadline=deadline), 
             dtype=np.float32
         )
 
-        # Calcular similaridade
-        scores = self._cosine_similarity(query_vector, self.product_vectors)
+        # λ = 1 é só relevância: MMR não muda nada
+        usar_mmr = mmr_lambda is not None and mmr_lambda < 1
 
-        # Selecionar top-N
-        top_idx = np.argsort(scores)[::-1][:limit]
+        if self.reranker is None and not usar_mmr:
+            produtos = self.vector_store.search(query_vector, limit=limit, filtros=filtros)
+            return produtos[:self._relevantes(produtos)]
 
-        resultados = []
-        for idx in top_idx:
-            prod_id = self.product_ids[idx]
+        candidatos_limit = max(limit, self.candidatos)
 
-            if prod_id not in self.catalogo:
-                continue  # Failsafe
-
-            produto = dict(self.catalogo.get(prod_id))
-            produto["score"] = float(scores[idx])
-
-            resultados.append(produto)
+        if not usar_mmr:
+            candidatos = self.vector_store.search(
+                query_vector, limit=candidatos_limit, filtros=filtros
+            )
+            candidatos = candidatos[:self._relevantes(candidatos)]
+            return self.reranker.rerank(candidatos, limit=limit)
 
-        return resultados
+        candidatos, vetores = self.vector_store.search(
+            query_vector, limit=candidatos_limit, filtros=filtros, with_vectors=True
+        )
+        n = self._relevantes(candidatos)
+        candidatos, vetores = candidatos[:n], vetores[:n]
+
+        if self.reranker is not None and candidatos:
+            relevancia = self.reranker.score(candidatos)
+            candidatos = [
+                with_fields(produto, score_rerank=round(float(valor), 6))
+                for produto, valor in zip(candidatos, relevancia)
+            ]
+        else:
+            relevancia = [produto["score"] for produto in candidatos]
+
+        selecionados = mmr_select(vetores, relevancia, limit, mmr_lambda)
+        return [candidatos[i] for i in selecionados]
+
+    def _relevantes(self, produtos) -> int:
+        """Tamanho do prefixo relevante de produtos ordenados por similaridade"""
+        return relevance_cutoff(
+            [produto["score"] for produto in produtos], self.threshold, self.max_gap
+        )
 
     def retrieve_by_category(self, categoria: str, limit: int = 10):
         """
@@ -122,18 +166,7 @@ class ProductRetriever:
         Returns:
             list: Lista de produtos da categoria
         """
-        resultados = []
-        
-        for prod_id, produto in self.catalogo.items():
-            if produto.get('categoria', '').lower() == categoria.lower():
-                produto_copy = dict(produto)
-                produto_copy["score"] = 1.0  # Score máximo para busca exata
-                resultados.append(produto_copy)
-                
-                if len(resultados) >= limit:
-                    break
-        
-        return resultados
+        return self.vector_store.by_category(categoria, limit=limit)
 
     def get_product_by_id(self, product_id: int):
         """
@@ -145,7 +178,33 @@ class ProductRetriever:
         Returns:
             dict ou None: Produto encontrado ou None
         """
-        return self.catalogo.get(product_id)
+        return self.vector_store.get(product_id)
+
+    def suggest(self, prefixo: str, limit: int = 8):
+        """
+        Sugestões de autocomplete (sem embedding nem Bedrock).
+
+        Args:
+            prefixo: Texto digitado até agora
+            limit: Número máximo de sugestões
+
+        Returns:
+            list: Sugestões {"texto", "tipo", ...}, mais populares primeiro
+        """
+        return self.vector_store.suggest(prefixo, limit=limit)
+
+    def project(self, produtos, campos):
+        """
+        Restringe os produtos da resposta aos campos pedidos (fields=).
+
+        Args:
+            produtos: Resultados de retrieve()/retrieve_by_category()
+            campos: Tupla de campos (None = todos)
+
+        Returns:
+            list: Produtos projetados (sem cópia dos dados do catálogo)
+        """
+        return self.vector_store.project(produtos, campos)
 
     def get_statistics(self):
         """
@@ -154,22 +213,28 @@ class ProductRetriever:
         Returns:
             dict: Estatísticas do catálogo
         """
-        if not self.catalogo:
-            return {
-                "total_produtos": 0,
-                "categorias": [],
-                "preco_minimo": 0,
-                "preco_maximo": 0,
-                "preco_medio": 0
-            }
-
-        precos = [p.get('preco', 0) for p in self.catalogo.values() if p.get('preco')]
-        categorias = set(p.get('categoria', '') for p in self.catalogo.values() if p.get('categoria'))
-
-        return {
-            "total_produtos": len(self.catalogo),
-            "categorias": sorted(list(categorias)),
-            "preco_minimo": min(precos) if precos else 0,
-            "preco_maximo": max(precos) if precos else 0,
-            "preco_medio": sum(precos) / len(precos) if precos else 0
-        }   
\ No newline at end of file
+        return self.vector_store.statistics()
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever() -> ProductRetriever:
+    """
+    Retorna o ProductRetriever compartilhado pelo processo.
+
+    O backend vetorial é criado uma única vez por worker; no backend em
+    memória o índice é trocado quando uma nova versão é ativada (ver
+    InMemoryVectorStore.refresh).
+
+    Raises:
+        ImproperlyConfigured: Se ainda não existir índice gerado
+    """
+    global _retriever
+
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = ProductRetriever()
+    return _retriever
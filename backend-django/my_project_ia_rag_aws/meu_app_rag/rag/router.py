@@ -0,0 +1,208 @@
+import re
+from collections import namedtuple
+
+from .autocomplete import fold
+from .metrics import counts, get_metric, report
+from config.settings_rag import (
+    RAG_ROUTER_MIN_SCORE,
+    RAG_ROUTER_MAX_WORDS,
+    RAG_ROUTER_NAME_MATCH,
+    BEDROCK_MODEL_TIERS,
+    BEDROCK_DEFAULT_TIER,
+    RAG_MODEL_ROUTING,
+    RAG_FAST_TIER_MAX_WORDS,
+    RAG_FAST_TIER_MAX_PRODUCTS,
+)
+
+# Decisão do roteador:
+#   destino    → "template" (ContextAugmenter.answer) ou "llm" (ResponseGenerator)
+#   intencoes  → intenções detectadas, na ordem de INTENCOES
+#   produtos   → produtos da resposta em template (um só quando a consulta cita o nome)
+#   motivo     → por que foi para o LLM (para métricas e depuração)
+Rota = namedtuple("Rota", ["destino", "intencoes", "produtos", "motivo"])
+
+# Padrões sobre a consulta sem acento e minúscula (autocomplete.fold)
+INTENCOES = {
+    "preco": re.compile(r"\b(preco|precos|valor|custa|custam|quanto (e|sai|fica))\b"),
+    # Só palavras de estoque: "tem", "há" e "vende" aparecem em qualquer pedido
+    # ("tem tênis leve para corrida?") e não indicam uma pergunta sobre estoque
+    "estoque": re.compile(r"\b(estoque|estoques|disponivel|disponiveis|disponibilidade|esgotado|esgotada)\b"),
+    "avaliacao": re.compile(r"\b(avaliacao|avaliacoes|avaliado|avaliada|nota|estrelas)\b"),
+    "promocao": re.compile(r"\b(promocao|promocoes|desconto|descontos|oferta|ofertas|liquidacao)\b"),
+}
+
+# Pedidos de opinião, comparação ou recomendação precisam do LLM
+PERGUNTA_ABERTA = re.compile(
+    r"\b(compar\w*|melhor|melhores|pior|diferenca\w*|recomend\w*|indic\w*|sugest\w*|sugir\w*"
+    r"|escolher|vale a pena|combina\w*|ou|versus|vs|porque|por que|como|presente|ideal)\b"
+)
+
+# Comparações e pedidos que pedem raciocínio vão para o modelo forte
+PERGUNTA_COMPLEXA = re.compile(
+    r"\b(compar\w*|diferenca\w*|versus|vs|ou|melhor|melhores|pior|vale a pena"
+    r"|custo beneficio|explic\w*|detalh\w*|porque|por que|combina\w*)\b"
+)
+
+# Palavras do nome que não identificam o produto
+PALAVRAS_VAZIAS = {"de", "da", "do", "das", "dos", "e", "com", "para", "em", "a", "o"}
+
+# Palavras da consulta que não descrevem o que se procura. "para" e "com"
+# ficam de fora: "para corrida", "com amortecimento" são requisitos
+PALAVRAS_FUNCIONAIS = (PALAVRAS_VAZIAS - {"para", "com"}) | {
+    "os", "as", "um", "uma", "uns", "umas", "no", "na", "nos", "nas", "ao", "aos", "pelo", "pela",
+    "qual", "quais", "quanto", "quantos", "quantas", "quando", "onde", "esse", "essa", "esses",
+    "essas", "este", "esta", "estes", "estas", "isso", "isto", "aquele", "aquela", "ele", "ela",
+    "eles", "elas", "seu", "sua", "seus", "suas", "dele", "dela", "me", "voce", "voces", "vcs",
+    "tem", "tens", "temos", "ha", "ainda", "agora", "hoje", "ja", "sim", "nao", "algum", "alguma",
+    "por", "favor", "ta", "estao", "sao", "sai", "fica", "atual", "produto", "produtos", "item",
+}
+
+# Campos dos produtos encontrados que a consulta pode citar sem pedir nada a mais
+CAMPOS_CITAVEIS = ("nome", "marca", "categoria", "subcategoria", "cor")
+
+
+def _palavras_nome(produto) -> set:
+    return {p for p in fold(produto.get("nome")).split() if p not in PALAVRAS_VAZIAS}
+
+
+def _descricao(texto: str, produtos) -> set:
+    """
+    Palavras da consulta que descrevem o que se procura ("leve", "para
+    trilha"): não são intenção, palavra funcional nem parte do nome, marca,
+    categoria ou cor dos produtos encontrados.
+    """
+    for padrao in INTENCOES.values():
+        texto = padrao.sub(" ", texto)
+
+    citaveis = set()
+    for produto in produtos:
+        for campo in CAMPOS_CITAVEIS:
+            citaveis.update(fold(produto.get(campo)).split())
+    return set(texto.split()) - PALAVRAS_FUNCIONAIS - citaveis
+
+
+class QueryRouter:
+    """
+    Decide se uma consulta pode ser respondida por template.
+
+    Regras sobre o texto (intenção direta, sem pedido de opinião ou
+    comparação nem requisitos além dos produtos encontrados, consulta
+    curta) mais os scores da busca (o melhor produto precisa ser
+    relevante). Consultas que citam o nome de um produto são
+    respondidas só sobre ele; as demais listam os produtos encontrados.
+    """
+
+    def __init__(self, min_score: float = RAG_ROUTER_MIN_SCORE,
+                 max_words: int = RAG_ROUTER_MAX_WORDS,
+                 name_match: float = RAG_ROUTER_NAME_MATCH):
+        self.min_score = min_score
+        self.max_words = max_words
+        self.name_match = name_match
+
+    def _llm(self, motivo, intencoes=()):
+        return Rota("llm", tuple(intencoes), [], motivo)
+
+    def route(self, query: str, produtos) -> Rota:
+        """
+        Args:
+            query: Consulta do usuário
+            produtos: Resultado de ProductRetriever.retrieve() (ordem da resposta)
+
+        Returns:
+            Rota: Destino da consulta
+        """
+        texto = fold(query)
+        palavras = texto.split()
+
+        if not produtos:
+            return self._llm("sem_produtos")
+        if len(palavras) > self.max_words:
+            return self._llm("longa")
+        if PERGUNTA_ABERTA.search(texto):
+            return self._llm("aberta")
+
+        intencoes = tuple(nome for nome, padrao in INTENCOES.items() if padrao.search(texto))
+        if not intencoes:
+            return self._llm("sem_intencao")
+        # O template só responde o dado pedido, não se o produto atende à descrição
+        if _descricao(texto, produtos):
+            return self._llm("descritiva", intencoes)
+
+        melhor = max(float(p.get("score") or 0) for p in produtos)
+        if melhor < self.min_score:
+            return self._llm("score_baixo", intencoes)
+
+        # A consulta cita o nome de um produto? Responde só sobre ele
+        consulta = set(palavras)
+        citados = []
+        for produto in produtos:
+            nome = _palavras_nome(produto)
+            if nome and len(nome & consulta) / len(nome) >= self.name_match:
+                citados.append((len(nome & consulta), produto))
+        if citados:
+            produto = max(citados, key=lambda c: c[0])[1]
+            return Rota("template", intencoes, [produto], None)
+
+        return Rota("template", intencoes, list(produtos), None)
+
+
+def choose_tier(query: str, produtos) -> str:
+    """
+    Nível do modelo para gerar a resposta (BEDROCK_MODEL_TIERS).
+
+    Rápido para consultas curtas, sem comparação, com poucos produtos no
+    contexto; forte para o resto (ou sempre, sem RAG_MODEL_ROUTING).
+    """
+    if not RAG_MODEL_ROUTING:
+        return BEDROCK_DEFAULT_TIER
+
+    texto = fold(query)
+    if (PERGUNTA_COMPLEXA.search(texto)
+            or len(texto.split()) > RAG_FAST_TIER_MAX_WORDS
+            or len(produtos) > RAG_FAST_TIER_MAX_PRODUCTS):
+        return "forte"
+    return "rapido"
+
+
+def tier_report() -> dict:
+    """Latência, tokens e custo das gerações por nível de modelo, neste processo"""
+    geracoes = report("modelo.")
+    falhas = report("modelo_falha.")
+
+    relatorio = {}
+    for tier, config in BEDROCK_MODEL_TIERS.items():
+        metrica = geracoes.get(tier, {"total": 0})
+        if metrica["total"]:
+            metrica["custo_medio_usd"] = round(metrica["custo_usd"] / metrica["total"], 6)
+        relatorio[tier] = {
+            "model_id": config["model_id"],
+            "max_tokens": config["max_tokens"],
+            **metrica,
+            "falhas": falhas.get(tier, {}).get("total", 0),
+        }
+    return relatorio
+
+
+def routing_report() -> dict:
+    """
+    Resumo do roteamento no processo: parcela respondida por template e
+    tempo economizado estimado (média da geração pelo LLM x consultas
+    roteadas, menos o tempo dos templates).
+    """
+    template = get_metric("rota.template")
+    llm = get_metric("rota.llm")
+    total = template.total + llm.total
+
+    economia = None
+    if llm.total:
+        economia = round(template.total * llm.media - template.segundos, 3)
+
+    return {
+        "consultas": total,
+        "template": template.total,
+        "llm": llm.total,
+        "parcela_template": round(template.total / total, 4) if total else None,
+        "economia_estimada_s": economia,
+        "latencias": report("rota."),
+        "motivos_llm": counts("rota_motivo."),
+    }
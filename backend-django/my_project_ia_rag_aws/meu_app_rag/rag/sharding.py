@@ -0,0 +1,220 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import requests
+from django.utils.text import slugify
+
+from .index_store import IDS_FILE, VECTORS_FILE, _read_catalogo
+
+# Este módulo é importado pelos processos dos shards (spawn), então não
+# depende do Django configurado: só numpy e os arquivos do índice.
+
+
+def normalize_slug(valor) -> str:
+    """Mesma normalização de Produto.normalize_slug (sem acento, minúsculo)"""
+    return slugify(valor or "")
+
+
+def filter_columns(produtos) -> dict:
+    """
+    Colunas usadas pelos filtros, alinhadas às linhas do índice.
+
+    Args:
+        produtos: Produtos do catálogo na ordem das linhas ({} se ausente)
+
+    Returns:
+        dict: categoria (slug), preco e estoque como np.array
+    """
+    return {
+        "categoria": np.array([normalize_slug(p.get("categoria")) for p in produtos], dtype=object),
+        "preco": np.array([p.get("preco") or 0 for p in produtos], dtype=np.float64),
+        "estoque": np.array([p.get("estoque") or 0 for p in produtos], dtype=np.int64),
+    }
+
+
+def filter_mask(colunas: dict, filtros: dict):
+    """Máscara booleana das linhas que atendem aos filtros (categoria, preco_min, preco_max, em_estoque)"""
+    mascara = np.ones(len(colunas["preco"]), dtype=bool)
+
+    if filtros.get("categoria"):
+        mascara &= colunas["categoria"] == normalize_slug(filtros["categoria"])
+    if filtros.get("preco_min") is not None:
+        mascara &= colunas["preco"] >= filtros["preco_min"]
+    if filtros.get("preco_max") is not None:
+        mascara &= colunas["preco"] <= filtros["preco_max"]
+    if filtros.get("em_estoque") is True:
+        mascara &= colunas["estoque"] > 0
+    elif filtros.get("em_estoque") is False:
+        mascara &= colunas["estoque"] == 0
+    return mascara
+
+
+def shard_bounds(n: int, shard: int, shards: int):
+    """Intervalo [início, fim) de linhas do shard (partições contíguas e equilibradas)"""
+    return n * shard // shards, n * (shard + 1) // shards
+
+
+class ShardIndex:
+    """
+    Fatia [start, stop) das linhas de uma versão publicada do índice.
+
+    Os vetores são um memmap de vectors.npy: as páginas ficam no cache do
+    sistema operacional e são compartilhadas entre os processos dos
+    shards, sem cópia da matriz. Cada shard guarda apenas as normas e as
+    colunas de filtro das suas linhas.
+    """
+
+    def __init__(self, version_path: str, shard: int, shards: int):
+        self.version = os.path.basename(os.path.normpath(version_path))
+        self.shard = shard
+        self.shards = shards
+
+        ids = np.load(os.path.join(version_path, IDS_FILE), mmap_mode="r")
+        self.start, self.stop = shard_bounds(len(ids), shard, shards)
+        self.ids = np.array(ids[self.start:self.stop])
+
+        vectors = np.load(os.path.join(version_path, VECTORS_FILE), mmap_mode="r")
+        self.vectors = vectors[self.start:self.stop]
+
+        norms = np.linalg.norm(self.vectors, axis=1) if len(self.ids) else np.zeros(0)
+        norms[norms == 0] = 1e-8  # Evita divisão por zero
+        self.norms = norms.astype(np.float32)
+
+        catalogo = _read_catalogo(version_path)
+        self.colunas = filter_columns([catalogo.get(int(pid)) or {} for pid in self.ids])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query_vector, k: int, filtros: dict = None):
+        """
+        Top-k do shard por similaridade do cosseno.
+
+        Args:
+            query_vector: Embedding da consulta
+            k: Número de resultados do shard
+            filtros: Filtros opcionais (ver filter_mask)
+
+        Returns:
+            tuple: (versão, linhas globais no índice, scores), em ordem decrescente
+        """
+        q = np.asarray(query_vector, dtype=np.float32)
+        q_norm = np.linalg.norm(q)
+        if len(self.ids) == 0 or q_norm == 0 or k <= 0:
+            return self.version, [], []
+
+        scores = (self.vectors @ (q / q_norm)) / self.norms
+        if filtros:
+            scores = np.where(filter_mask(self.colunas, filtros), scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[np.isfinite(scores[top])]
+
+        return self.version, (top + self.start).tolist(), scores[top].astype(float).tolist()
+
+
+# ----------------------------------------------
+# Shards em processos locais
+# ----------------------------------------------
+_shard_index = None
+
+
+def _init_worker(version_path, shard, shards):
+    global _shard_index
+    _shard_index = ShardIndex(version_path, shard, shards)
+
+
+def _ping():
+    return len(_shard_index)
+
+
+def _search_worker(query_vector, k, filtros):
+    return _shard_index.search(query_vector, k, filtros)
+
+
+class LocalShard:
+    """
+    Shard servido por um processo local dedicado.
+
+    Um ProcessPoolExecutor de um único processo por shard garante que
+    cada processo carregue só a sua fatia. Usa spawn: o processo do
+    gunicorn tem threads, e fork com threads não é seguro.
+    """
+
+    def __init__(self, version_path: str, shard: int, shards: int):
+        self.shard = shard
+        self.initargs = (version_path, shard, shards)
+        self._start()
+
+    def _start(self):
+        self.pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self.initargs,
+        )
+        # Inicia o processo e a carga da fatia sem bloquear
+        self.ready = self.pool.submit(_ping)
+
+    def submit(self, query_vector, k, filtros):
+        try:
+            return self.pool.submit(_search_worker, np.asarray(query_vector, dtype=np.float32), k, filtros)
+        except BrokenProcessPool:
+            # O processo do shard morreu: sobe outro para as próximas buscas
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self._start()
+            raise
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ----------------------------------------------
+# Shards remotos (manage.py shard_server)
+# ----------------------------------------------
+_http_executor = None
+
+
+def _get_http_executor():
+    global _http_executor
+    if _http_executor is None:
+        _http_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="rag-shard")
+    return _http_executor
+
+
+class HttpShard:
+    """Shard servido por um shard_server em outro host (POST /search)"""
+
+    def __init__(self, url: str, shard: int, timeout: float):
+        self.url = url.rstrip("/")
+        self.shard = shard
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.ready = _get_http_executor().submit(self._health)
+
+    def _health(self):
+        return self.session.get(f"{self.url}/health", timeout=self.timeout).json()
+
+    def _search(self, query_vector, k, filtros):
+        response = self.session.post(
+            f"{self.url}/search",
+            json={
+                "query": np.asarray(query_vector, dtype=np.float32).tolist(),
+                "k": k,
+                "filtros": filtros or {},
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        dados = response.json()
+        return dados["version"], dados["rows"], dados["scores"]
+
+    def submit(self, query_vector, k, filtros):
+        return _get_http_executor().submit(self._search, query_vector, k, filtros)
+
+    def close(self):
+        self.session.close()
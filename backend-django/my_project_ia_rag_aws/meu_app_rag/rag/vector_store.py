@@ -0,0 +1,758 @@
+import time
+import threading
+from concurrent.futures import wait
+import numpy as np
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Avg, Count, Max, Min
+from pgvector.django import CosineDistance
+
+from meu_app_rag.models import Produto, ProdutoEmbedding
+from .index_store import IndexStore, CATALOGO_CAMPOS, catalogo_item
+from .resilience import DeadlineExceeded
+from .sharding import LocalShard, HttpShard, filter_columns, filter_mask
+from .fragments import ScoredProduct, product_fragment, project_results
+from .autocomplete import PrefixIndex
+from config.settings_rag import (
+    RAG_VECTOR_BACKEND,
+    RAG_INDEX_RELOAD_INTERVAL,
+    RAG_EMBEDDING_CHUNK_SIZE,
+    RAG_EMBEDDING_DIMS,
+    RAG_PGVECTOR_EF_SEARCH,
+    RAG_PGVECTOR_ITERATIVE_SCAN,
+    RAG_RESULT_FIELD_PROFILES,
+    RAG_RESULT_DEFAULT_PROFILE,
+    RAG_SHARDS,
+    RAG_SHARD_URLS,
+    RAG_SHARD_TIMEOUT,
+    RAG_SHARD_STARTUP_TIMEOUT,
+)
+
+# Filtros aceitos por VectorStore.search():
+#   categoria (str), preco_min/preco_max (float), em_estoque (bool)
+
+# Versão do pgvector a partir da qual existe hnsw.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+
+
+def parse_extversion(versao: str) -> tuple:
+    """Versão de uma extensão do PostgreSQL como tupla ('0.8.0' -> (0, 8, 0))"""
+    partes = []
+    for parte in (versao or "").split("."):
+        if not parte.isdigit():
+            break
+        partes.append(int(parte))
+    return tuple(partes)
+
+
+class InMemoryVectorStore:
+    """
+    Índice versionado em arquivos (IndexStore), carregado em memória.
+
+    Cada worker mantém sua cópia e troca de versão sem reiniciar quando
+    outra é ativada (ver refresh). Os filtros são aplicados como máscara
+    sobre os scores antes do top-N.
+
+    Com `version`, carrega essa versão e não acompanha o CURRENT (usado
+    para comparar versões, ver avaliar_busca).
+    """
+
+    def __init__(self, store: IndexStore = None, version: str = None):
+        self.store = store or IndexStore()
+        self._reload_lock = threading.Lock()
+        self._pinned = version is not None
+
+        # Carregar índice ativo (ImproperlyConfigured se não existir)
+        self._snapshot = self._load(version)
+        self._checked_at = time.monotonic()
+
+        if len(self._snapshot.catalogo) == 0:
+            print("⚠️ Aviso: catálogo carregado, mas está vazio!")
+
+    # O índice é trocado inteiro (um único objeto), então uma busca em
+    # andamento nunca vê vetores de uma versão e catálogo de outra.
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def _load(self, version: str = None):
+        """Carrega uma versão do índice (a ativa por padrão)"""
+        snapshot = self.store.load(version)
+        self._preparar(snapshot)
+        return snapshot
+
+    def _preparar(self, snapshot):
+        """
+        Pré-serializa os produtos (todos os campos e o perfil padrão de
+        fields=) e monta o índice de autocomplete da versão
+        """
+        self._fragmentos(snapshot)
+        padrao = RAG_RESULT_FIELD_PROFILES.get(RAG_RESULT_DEFAULT_PROFILE)
+        if padrao is not None:
+            self._fragmentos(snapshot, padrao)
+        self._autocomplete(snapshot)
+
+    def _fragmentos(self, snapshot, campos: tuple = None):
+        """
+        JSON pré-serializado de cada produto (ver rag/fragments.py), uma vez
+        por versão e por conjunto de campos (None = todos)
+        """
+        chave = ("fragmentos", campos)
+        fragmentos = snapshot.cache.get(chave)
+        if fragmentos is None:
+            fragmentos = {pid: product_fragment(p, campos) for pid, p in snapshot.catalogo.items()}
+            snapshot.cache[chave] = fragmentos
+        return fragmentos
+
+    def _autocomplete(self, snapshot):
+        """Índice de prefixos (rag/autocomplete.py), uma vez por versão"""
+        indice = snapshot.cache.get("autocomplete")
+        if indice is None:
+            indice = PrefixIndex.from_catalog(snapshot.catalogo.values())
+            snapshot.cache["autocomplete"] = indice
+        return indice
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Troca para a nova versão do índice, se uma tiver sido ativada.
+
+        A verificação lê apenas o arquivo CURRENT e acontece no máximo a
+        cada RAG_INDEX_RELOAD_INTERVAL segundos.
+
+        Returns:
+            bool: True se o índice foi recarregado
+        """
+        agora = time.monotonic()
+        if self._pinned or (not force and agora - self._checked_at < RAG_INDEX_RELOAD_INTERVAL):
+            return False
+
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # Outra thread já está verificando/recarregando
+
+        try:
+            self._checked_at = agora
+            version = self.store.current_version()
+            if version is None or version == self._snapshot.version:
+                return False
+
+            try:
+                self._snapshot = self._load(version)
+            except Exception as e:
+                print(f"⚠️ Aviso: falha ao carregar índice {version}, mantendo {self.version}: {e}")
+                return False
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _cosine_similarity(self, q, M):
+        """
+        Calcula similaridade do cosseno entre vetor q e matriz M.
+
+        Args:
+            q: Vetor de consulta (1D)
+            M: Matriz de vetores (2D)
+
+        Returns:
+            np.array: Scores de similaridade
+        """
+        q_norm = np.linalg.norm(q)
+        if q_norm == 0:
+            return np.zeros(M.shape[0])
+
+        q = q / q_norm
+        M_norm = np.linalg.norm(M, axis=1, keepdims=True)
+        M_norm[M_norm == 0] = 1e-8  # Evita divisão por zero
+
+        M = M / M_norm
+        return np.dot(M, q)
+
+    def _colunas_filtro(self, snapshot):
+        """Colunas do catálogo alinhadas aos vetores, calculadas uma vez por versão"""
+        colunas = snapshot.cache.get("filtros")
+        if colunas is None:
+            colunas = filter_columns(
+                [snapshot.catalogo.get(pid) or {} for pid in snapshot.product_ids]
+            )
+            snapshot.cache["filtros"] = colunas
+        return colunas
+
+    def _mascara(self, snapshot, filtros):
+        """Máscara booleana dos produtos que atendem aos filtros"""
+        return filter_mask(self._colunas_filtro(snapshot), filtros)
+
+    def search(self, query_vector, limit: int = 5, filtros: dict = None, with_vectors: bool = False):
+        """
+        Produtos mais similares ao vetor de consulta.
+
+        Args:
+            query_vector: Embedding da consulta
+            limit: Número máximo de resultados
+            filtros: Filtros opcionais (categoria, preco_min, preco_max, em_estoque)
+            with_vectors: Também devolve os vetores dos resultados
+
+        Returns:
+            list: Produtos (dict do catálogo) com "score"; com
+            with_vectors, a tupla (produtos, matriz (n, dims) dos vetores)
+        """
+        self.refresh()
+        snapshot = self._snapshot
+        fragmentos = self._fragmentos(snapshot)
+
+        # Calcular similaridade
+        scores = self._cosine_similarity(query_vector, snapshot.product_vectors)
+        if filtros:
+            scores = np.where(self._mascara(snapshot, filtros), scores, -np.inf)
+
+        # Selecionar top-N
+        top_idx = np.argsort(scores)[::-1][:limit]
+
+        resultados = []
+        indices = []
+        for idx in top_idx:
+            if not np.isfinite(scores[idx]):
+                break  # Demais candidatos foram removidos pelos filtros
+
+            prod_id = snapshot.product_ids[idx]
+
+            if prod_id not in snapshot.catalogo:
+                continue  # Failsafe
+
+            # Sem cópia do produto: o catálogo do snapshot não muda
+            resultados.append(ScoredProduct(
+                snapshot.catalogo[prod_id], fragmentos.get(prod_id), score=float(scores[idx])
+            ))
+            indices.append(idx)
+
+        if with_vectors:
+            return resultados, snapshot.product_vectors[indices]
+        return resultados
+
+    def by_category(self, categoria: str, limit: int = 10):
+        """Produtos de uma categoria (comparação sem diferenciar caixa)"""
+        self.refresh()
+        snapshot = self._snapshot
+        fragmentos = self._fragmentos(snapshot)
+        resultados = []
+
+        for pid, produto in snapshot.catalogo.items():
+            if produto.get('categoria', '').lower() == categoria.lower():
+                # Score máximo para busca exata
+                resultados.append(ScoredProduct(produto, fragmentos.get(pid), score=1.0))
+
+                if len(resultados) >= limit:
+                    break
+
+        return resultados
+
+    def get(self, product_id: int):
+        """Produto do catálogo ou None"""
+        return self._snapshot.catalogo.get(product_id)
+
+    def suggest(self, prefixo: str, limit: int = 8):
+        """Sugestões de autocomplete (nomes, marcas e categorias) para o prefixo"""
+        self.refresh()
+        return self._autocomplete(self._snapshot).suggest(prefixo, limit)
+
+    def project(self, produtos, campos: tuple):
+        """
+        Restringe os resultados aos campos pedidos (fields=).
+
+        Os perfis nomeados (RAG_RESULT_FIELD_PROFILES) usam fragmentos JSON
+        pré-calculados por versão; listas avulsas são serializadas na hora
+        (não viram cache, já que vêm da requisição).
+        """
+        if campos is None:
+            return produtos
+
+        snapshot = self._snapshot
+        fragmentos = None
+        if campos in RAG_RESULT_FIELD_PROFILES.values():
+            fragmentos = self._fragmentos(snapshot, campos)
+        return project_results(produtos, campos, fragmentos, snapshot.catalogo)
+
+    def describe(self):
+        """Resumo do índice carregado (ver /api/ready/)"""
+        snapshot = self._snapshot
+        vectors = snapshot.product_vectors
+        return {
+            "backend": "memory",
+            "versao": snapshot.version,
+            "produtos": len(snapshot.catalogo),
+            "dims": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "vetores_bytes": int(vectors.nbytes),
+        }
+
+    def statistics(self):
+        """Estatísticas do catálogo indexado"""
+        self.refresh()
+        catalogo = self._snapshot.catalogo
+
+        if not catalogo:
+            return {
+                "total_produtos": 0,
+                "categorias": [],
+                "preco_minimo": 0,
+                "preco_maximo": 0,
+                "preco_medio": 0
+            }
+
+        precos = [p.get('preco', 0) for p in catalogo.values() if p.get('preco')]
+        categorias = set(p.get('categoria', '') for p in catalogo.values() if p.get('categoria'))
+
+        return {
+            "total_produtos": len(catalogo),
+            "categorias": sorted(list(categorias)),
+            "preco_minimo": min(precos) if precos else 0,
+            "preco_maximo": max(precos) if precos else 0,
+            "preco_medio": sum(precos) / len(precos) if precos else 0
+        }
+
+
+class ShardedVectorStore(InMemoryVectorStore):
+    """
+    Índice versionado dividido em shards, buscados em paralelo (scatter-gather).
+
+    As linhas de vectors.npy são divididas em fatias contíguas; cada shard
+    (um processo local ou um shard_server remoto) devolve o seu top-k e o
+    coordenador junta os resultados. Shards que não respondem em
+    RAG_SHARD_TIMEOUT são ignorados: a busca responde com os demais (recall
+    parcial) e só falha se nenhum responder.
+
+    O coordenador mapeia vectors.npy em memória (mmap) em vez de carregá-lo:
+    os vetores só são lidos para with_vectors (MMR). Catálogo, get e
+    estatísticas continuam vindo do snapshot, como no InMemoryVectorStore.
+    """
+
+    def __init__(self, store: IndexStore = None, shards: int = None, urls=None, timeout: float = None,
+                 version: str = None):
+        self.urls = list(RAG_SHARD_URLS if urls is None else urls)
+        self.shards = len(self.urls) or shards or RAG_SHARDS
+        self.timeout = RAG_SHARD_TIMEOUT if timeout is None else timeout
+        super().__init__(store, version)
+
+    def _load(self, version: str = None):
+        """Carrega a versão e sobe os shards dela; o snapshot só é usado com os shards prontos"""
+        snapshot = self.store.load(version, mmap_vectors=True)
+        if snapshot.version is None:
+            raise ImproperlyConfigured(
+                "❌ RAG_VECTOR_BACKEND='sharded' requer um índice versionado. "
+                "Execute: python manage.py popular_embeddings"
+            )
+
+        if self.urls:
+            clientes = [HttpShard(url, i, self.timeout) for i, url in enumerate(self.urls)]
+        else:
+            path = self.store.version_path(snapshot.version)
+            clientes = [LocalShard(path, i, self.shards) for i in range(self.shards)]
+
+        try:
+            self._aguardar_shards(clientes, snapshot.version)
+        except Exception:
+            self._fechar(clientes)
+            raise
+
+        snapshot.cache["shards"] = clientes
+        self._preparar(snapshot)
+        return snapshot
+
+    def _aguardar_shards(self, clientes, version):
+        """Espera os shards carregarem; falha só se nenhum ficar pronto"""
+        wait([c.ready for c in clientes], timeout=RAG_SHARD_STARTUP_TIMEOUT)
+
+        prontos = 0
+        for cliente in clientes:
+            try:
+                info = cliente.ready.result(timeout=0)
+            except Exception as e:
+                print(f"⚠️ Aviso: shard {cliente.shard} não ficou pronto: {e!r}")
+                continue
+            if isinstance(info, dict) and info.get("version") != version:
+                print(
+                    f"⚠️ Aviso: shard {cliente.shard} está na versão {info.get('version')} "
+                    f"(coordenador: {version}); resultados ignorados até sincronizar"
+                )
+            prontos += 1
+
+        if prontos == 0:
+            raise ImproperlyConfigured(f"❌ Nenhum shard do índice {version} ficou pronto.")
+
+    def _fechar(self, clientes):
+        for cliente in clientes:
+            cliente.close()
+
+    def refresh(self, force: bool = False) -> bool:
+        anterior = self._snapshot
+        if not super().refresh(force):
+            return False
+
+        # Buscas em andamento ainda usam os shards da versão anterior
+        timer = threading.Timer(
+            self.timeout + 1, self._fechar, args=(anterior.cache.get("shards", []),)
+        )
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def close(self):
+        """Encerra os processos/conexões dos shards"""
+        self._fechar(self._snapshot.cache.get("shards", []))
+
+    def describe(self):
+        """Resumo do índice (vetores_bytes = tamanho do arquivo mapeado, não memória residente)"""
+        info = super().describe()
+        info.update(backend="sharded", shards=len(self._snapshot.cache.get("shards", [])))
+        return info
+
+    def wait_ready(self, timeout: float = RAG_SHARD_STARTUP_TIMEOUT) -> bool:
+        """Indica se todos os shards da versão ativa estão prontos"""
+        clientes = self._snapshot.cache.get("shards", [])
+        _, pendentes = wait([c.ready for c in clientes], timeout=timeout)
+        return not pendentes and all(c.ready.exception() is None for c in clientes)
+
+    def search(self, query_vector, limit: int = 5, filtros: dict = None, with_vectors: bool = False):
+        """
+        Produtos mais similares ao vetor de consulta (ver InMemoryVectorStore.search).
+
+        Raises:
+            DeadlineExceeded: Nenhum shard respondeu em RAG_SHARD_TIMEOUT
+        """
+        self.refresh()
+        snapshot = self._snapshot
+        fragmentos = self._fragmentos(snapshot)
+        q = np.asarray(query_vector, dtype=np.float32)
+
+        # Scatter: cada shard devolve até `limit` linhas
+        futures = {}
+        for cliente in snapshot.cache["shards"]:
+            try:
+                futures[cliente.submit(q, limit, filtros)] = cliente
+            except Exception as e:
+                print(f"⚠️ Aviso: shard {cliente.shard} indisponível: {e!r}")
+
+        feitos, pendentes = wait(futures, timeout=self.timeout)
+        for future in pendentes:
+            future.cancel()
+            print(f"⚠️ Aviso: shard {futures[future].shard} excedeu {self.timeout}s e foi ignorado")
+
+        # Gather
+        linhas, scores = [], []
+        respondidos = 0
+        for future in feitos:
+            try:
+                version, shard_linhas, shard_scores = future.result()
+            except Exception as e:
+                print(f"⚠️ Aviso: falha no shard {futures[future].shard}: {e!r}")
+                continue
+            if version != snapshot.version:
+                print(f"⚠️ Aviso: shard {futures[future].shard} respondeu com a versão {version}; ignorado")
+                continue
+            respondidos += 1
+            linhas.extend(shard_linhas)
+            scores.extend(shard_scores)
+
+        if futures and respondidos == 0:
+            raise DeadlineExceeded("Nenhum shard do índice respondeu a tempo.")
+
+        # Merge: top-N global entre os top-N de cada shard
+        ordem = np.argsort(-np.asarray(scores, dtype=np.float64), kind="stable")[:limit]
+
+        resultados = []
+        indices = []
+        for i in ordem:
+            idx = linhas[i]
+            prod_id = snapshot.product_ids[idx]
+
+            if prod_id not in snapshot.catalogo:
+                continue  # Failsafe
+
+            resultados.append(ScoredProduct(
+                snapshot.catalogo[prod_id], fragmentos.get(prod_id), score=float(scores[i])
+            ))
+            indices.append(idx)
+
+        if with_vectors:
+            return resultados, np.asarray(snapshot.product_vectors[indices])
+        return resultados
+
+
+class PgVectorStore:
+    """
+    Busca vetorial no PostgreSQL com pgvector (tabela produto_embeddings).
+
+    Os filtros de preço, categoria e estoque entram no WHERE do mesmo
+    SELECT que ordena pela distância do cosseno (índice HNSW), e os dados
+    do produto vêm do banco via JOIN — todos os servidores compartilham o
+    mesmo índice, sem cópia local dos arquivos.
+
+    A tabela é preenchida por sync() a partir de uma versão do IndexStore
+    (popular_embeddings faz isso ao ativar uma versão).
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS, ef_search: int = RAG_PGVECTOR_EF_SEARCH):
+        if connections[using].vendor != "postgresql":
+            raise ImproperlyConfigured(
+                "❌ RAG_VECTOR_BACKEND='pgvector' requer PostgreSQL com a extensão vector "
+                "(configure POSTGRES_DB/POSTGRES_HOST)."
+            )
+        self.using = using
+        self.ef_search = ef_search
+        self._iterative_scan = None  # Verificado na primeira busca
+        self._version = None
+        self._checked_at = None
+        self._autocomplete = (None, None)  # (versão, PrefixIndex)
+
+    @property
+    def version(self):
+        self.refresh()
+        return self._version
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Atualiza a versão sincronizada (no máximo a cada RAG_INDEX_RELOAD_INTERVAL).
+
+        Não há nada para recarregar: as buscas sempre leem a tabela.
+
+        Returns:
+            bool: True se a versão mudou
+        """
+        agora = time.monotonic()
+        if (not force and self._checked_at is not None
+                and agora - self._checked_at < RAG_INDEX_RELOAD_INTERVAL):
+            return False
+
+        self._checked_at = agora
+        version = (
+            ProdutoEmbedding.objects.using(self.using)
+            .order_by("-versao").values_list("versao", flat=True).first()
+        )
+        mudou = version != self._version
+        self._version = version
+        return mudou
+
+    def iterative_scan(self) -> str:
+        """
+        Modo de hnsw.iterative_scan usado nas buscas ('' = desativado).
+
+        O parâmetro só existe a partir do pgvector 0.8 (o SET falha nas
+        versões anteriores), então a versão da extensão é consultada uma
+        vez antes de usar RAG_PGVECTOR_ITERATIVE_SCAN.
+        """
+        if self._iterative_scan is None:
+            modo = RAG_PGVECTOR_ITERATIVE_SCAN
+            if modo:
+                with connections[self.using].cursor() as cursor:
+                    cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+                    row = cursor.fetchone()
+                versao = row[0] if row else None
+                if parse_extversion(versao) < ITERATIVE_SCAN_MIN_VERSION:
+                    print(
+                        f"⚠️ Aviso: pgvector {versao or '(extensão ausente)'} não suporta "
+                        "hnsw.iterative_scan (requer 0.8); buscas com filtros podem "
+                        "devolver menos resultados que o limite"
+                    )
+                    modo = ""
+            self._iterative_scan = modo
+        return self._iterative_scan
+
+    def _produtos(self):
+        """Produtos com embedding sincronizado"""
+        return Produto.objects.using(self.using).filter(embedding__isnull=False)
+
+    def _filtrar(self, queryset, filtros):
+        if filtros.get("categoria"):
+            queryset = queryset.filter(
+                produto__categoria_slug=Produto.normalize_slug(filtros["categoria"])
+            )
+        if filtros.get("preco_min") is not None:
+            queryset = queryset.filter(produto__preco__gte=filtros["preco_min"])
+        if filtros.get("preco_max") is not None:
+            queryset = queryset.filter(produto__preco__lte=filtros["preco_max"])
+        if filtros.get("em_estoque") is True:
+            queryset = queryset.filter(produto__estoque__gt=0)
+        elif filtros.get("em_estoque") is False:
+            queryset = queryset.filter(produto__estoque=0)
+        return queryset
+
+    def search(self, query_vector, limit: int = 5, filtros: dict = None, with_vectors: bool = False):
+        """
+        Produtos mais similares ao vetor de consulta (ver InMemoryVectorStore.search).
+        """
+        dims = len(query_vector)
+        queryset = ProdutoEmbedding.objects.using(self.using)
+        if filtros:
+            queryset = self._filtrar(queryset, filtros)
+
+        queryset = (
+            queryset
+            .annotate(distancia=CosineDistance("embedding", np.asarray(query_vector, dtype=np.float32)))
+            .order_by("distancia")
+            .values(
+                "distancia",
+                *(["embedding"] if with_vectors else []),
+                *(f"produto__{campo}" for campo in CATALOGO_CAMPOS),
+            )
+            [:limit]
+        )
+
+        iterative_scan = self.iterative_scan()
+
+        # Parâmetros do HNSW valem só para esta transação
+        with transaction.atomic(using=self.using):
+            with connections[self.using].cursor() as cursor:
+                cursor.execute("SET LOCAL hnsw.ef_search = %s", [max(self.ef_search, limit)])
+                if iterative_scan:
+                    cursor.execute("SET LOCAL hnsw.iterative_scan = %s", [iterative_scan])
+            rows = list(queryset)
+
+        # relaxed_order pode devolver os candidatos levemente fora de ordem
+        rows.sort(key=lambda row: row["distancia"])
+
+        resultados = []
+        for row in rows:
+            produto = catalogo_item({campo: row[f"produto__{campo}"] for campo in CATALOGO_CAMPOS})
+            produto["score"] = 1.0 - float(row["distancia"])
+            resultados.append(produto)
+
+        if with_vectors:
+            vetores = np.array([row["embedding"] for row in rows], dtype=np.float32).reshape(len(rows), dims)
+            return resultados, vetores
+        return resultados
+
+    def by_category(self, categoria: str, limit: int = 10):
+        """Produtos de uma categoria (sem diferenciar acento/caixa)"""
+        rows = (
+            self._produtos()
+            .filter(categoria_slug=Produto.normalize_slug(categoria))
+            .order_by("id")
+            .values(*CATALOGO_CAMPOS)[:limit]
+        )
+        resultados = []
+        for row in rows:
+            produto = catalogo_item(row)
+            produto["score"] = 1.0  # Score máximo para busca exata
+            resultados.append(produto)
+        return resultados
+
+    def get(self, product_id: int):
+        """Produto com embedding sincronizado ou None"""
+        row = self._produtos().filter(pk=product_id).values(*CATALOGO_CAMPOS).first()
+        return catalogo_item(row) if row else None
+
+    def suggest(self, prefixo: str, limit: int = 8):
+        """
+        Sugestões de autocomplete para o prefixo.
+
+        O índice de prefixos fica em memória e é remontado a partir do banco
+        quando a versão sincronizada muda (cada tecla não vai ao banco).
+        """
+        version = self.version
+        versao_indice, indice = self._autocomplete
+        if indice is None or versao_indice != version:
+            produtos = (catalogo_item(row) for row in self._produtos().values(*CATALOGO_CAMPOS).iterator())
+            indice = PrefixIndex.from_catalog(produtos)
+            self._autocomplete = (version, indice)
+        return indice.suggest(prefixo, limit)
+
+    def describe(self):
+        """Resumo da tabela de embeddings (ver /api/ready/)"""
+        return {
+            "backend": "pgvector",
+            "versao": self.version,
+            "produtos": ProdutoEmbedding.objects.using(self.using).count(),
+            "dims": RAG_EMBEDDING_DIMS,
+            "vetores_bytes": None,  # Ficam no PostgreSQL, fora do worker
+        }
+
+    def project(self, produtos, campos: tuple):
+        """Restringe os resultados aos campos pedidos (fields=)"""
+        return project_results(produtos, campos)
+
+    def statistics(self):
+        """Estatísticas dos produtos indexados (agregadas no banco)"""
+        produtos = self._produtos()
+        precos = produtos.filter(preco__gt=0).aggregate(
+            minimo=Min("preco"), maximo=Max("preco"), medio=Avg("preco")
+        )
+        categorias = (
+            produtos.exclude(categoria="").order_by("categoria")
+            .values_list("categoria", flat=True).distinct()
+        )
+
+        return {
+            "total_produtos": produtos.aggregate(total=Count("pk"))["total"],
+            "categorias": list(categorias),
+            "preco_minimo": float(precos["minimo"] or 0),
+            "preco_maximo": float(precos["maximo"] or 0),
+            "preco_medio": float(precos["medio"] or 0),
+        }
+
+    def sync(self, snapshot, chunk_size: int = RAG_EMBEDDING_CHUNK_SIZE) -> int:
+        """
+        Copia os vetores de uma versão do índice para produto_embeddings.
+
+        Tudo acontece em uma transação: as buscas continuam vendo a
+        versão anterior até o commit. Vetores de produtos que não existem
+        mais no banco são ignorados.
+
+        Args:
+            snapshot: IndexSnapshot carregado do IndexStore
+            chunk_size: Linhas por INSERT ... ON CONFLICT
+
+        Returns:
+            int: Número de embeddings sincronizados
+        """
+        versao = snapshot.version or "legacy"
+        ids = snapshot.product_ids
+        total = 0
+
+        with transaction.atomic(using=self.using):
+            for inicio in range(0, len(ids), chunk_size):
+                bloco = ids[inicio:inicio + chunk_size]
+                existentes = set(
+                    Produto.objects.using(self.using)
+                    .filter(id__in=bloco).values_list("id", flat=True)
+                )
+                objetos = [
+                    ProdutoEmbedding(
+                        produto_id=pid,
+                        embedding=snapshot.product_vectors[inicio + i],
+                        versao=versao,
+                    )
+                    for i, pid in enumerate(bloco)
+                    if pid in existentes
+                ]
+                ProdutoEmbedding.objects.using(self.using).bulk_create(
+                    objetos,
+                    update_conflicts=True,
+                    unique_fields=["produto"],
+                    update_fields=["embedding", "versao"],
+                )
+                total += len(objetos)
+
+            ProdutoEmbedding.objects.using(self.using).exclude(versao=versao).delete()
+
+        self.refresh(force=True)
+        return total
+
+
+def build_vector_store():
+    """
+    Cria o backend vetorial configurado em RAG_VECTOR_BACKEND.
+
+    Raises:
+        ImproperlyConfigured: Backend desconhecido, índice inexistente
+            ('memory'/'sharded') ou banco que não é PostgreSQL ('pgvector')
+    """
+    if RAG_VECTOR_BACKEND == "memory":
+        return InMemoryVectorStore()
+    if RAG_VECTOR_BACKEND == "pgvector":
+        return PgVectorStore()
+    if RAG_VECTOR_BACKEND == "sharded":
+        return ShardedVectorStore()
+    raise ImproperlyConfigured(
+        f"❌ RAG_VECTOR_BACKEND inválido: {RAG_VECTOR_BACKEND!r} (use 'memory', 'pgvector' ou 'sharded')"
+    )
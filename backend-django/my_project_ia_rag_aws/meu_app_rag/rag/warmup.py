@@ -0,0 +1,132 @@
+import os
+import time
+import resource
+import threading
+import numpy as np
+from config.settings_rag import BEDROCK_PREWARM, RAG_EMBEDDING_DIMS
+
+# Estado do aquecimento deste worker (exposto em /api/ready/)
+_status = {
+    "status": "pendente",   # pendente | aquecendo | pronto | falhou
+    "iniciado_em": None,
+    "duracao": None,
+    "etapas": {},
+    "erro": None,
+}
+_lock = threading.Lock()
+_thread = None
+
+
+def _etapa(nome, funcao):
+    """Executa uma etapa do aquecimento e registra a duração"""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    _status["etapas"][nome] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def _scoring(retriever):
+    """Busca fictícia: aquece BLAS, colunas de filtro, shards/HNSW e o re-ranking"""
+    dims = retriever.vector_store.describe().get("dims") or RAG_EMBEDDING_DIMS
+    vetor = np.ones(dims, dtype=np.float32)
+
+    produtos = retriever.vector_store.search(vetor, limit=5)
+    retriever.vector_store.search(vetor, limit=5, filtros={"em_estoque": True})
+    if retriever.reranker and produtos:
+        retriever.reranker.rerank(produtos)
+
+
+def warmup():
+    """
+    Aquece o worker antes de receber tráfego.
+
+    Carrega o índice vetorial, cria o retriever, o augmenter e o
+    generator (imports do langchain e clientes boto3), executa uma busca
+    fictícia e, com BEDROCK_PREWARM, abre as conexões TLS com o Bedrock.
+
+    Falhas não derrubam o worker: ficam registradas em warmup_status() e
+    /api/ready/ responde 503 até um novo aquecimento funcionar.
+
+    Returns:
+        dict: Estado do aquecimento (ver warmup_status)
+    """
+    from .retriever import get_retriever
+    from .augmenter import ContextAugmenter
+    from .generator import ResponseGenerator
+    from .bedrock_client import prewarm_bedrock_client
+
+    with _lock:
+        if _status["status"] == "pronto":
+            return warmup_status()
+        _status.update(status="aquecendo", iniciado_em=time.time(), erro=None, etapas={})
+
+    inicio = time.perf_counter()
+    try:
+        retriever = _etapa("indice", get_retriever)
+        _etapa("clientes", lambda: (ContextAugmenter(), ResponseGenerator()))
+        _etapa("busca", lambda: _scoring(retriever))
+        if BEDROCK_PREWARM:
+            _status["conexoes_bedrock"] = _etapa("bedrock", prewarm_bedrock_client)
+        _status["status"] = "pronto"
+    except Exception as e:
+        _status.update(status="falhou", erro=str(e))
+    finally:
+        _status["duracao"] = round(time.perf_counter() - inicio, 3)
+
+    return warmup_status()
+
+
+def start_warmup():
+    """
+    Inicia o aquecimento em segundo plano, se ainda não foi feito.
+
+    Usado pelo post_worker_init do gunicorn, pelo runserver
+    (AppConfig.ready) e por /api/ready/ quando o worker não passou pelo
+    hook; com o aquecimento pronto ou em andamento não faz nada. Fora da
+    thread principal, o aquecimento não conta para o --timeout do
+    gunicorn: o worker continua respondendo ao arbiter enquanto carrega o
+    índice.
+    """
+    global _thread
+
+    with _lock:
+        if _status["status"] == "pronto" or (_thread and _thread.is_alive()):
+            return
+        if _status["status"] == "pendente":
+            _status["status"] = "aquecendo"
+        _thread = threading.Thread(target=warmup, name="rag-warmup", daemon=True)
+        _thread.start()
+
+
+def is_warm() -> bool:
+    return _status["status"] == "pronto"
+
+
+def warmup_status() -> dict:
+    """Cópia do estado do aquecimento"""
+    status = dict(_status)
+    status["etapas"] = dict(_status["etapas"])
+    return status
+
+
+def process_memory() -> dict:
+    """
+    Memória do processo do worker.
+
+    Returns:
+        dict: rss_bytes (atual, via /proc no Linux; None se indisponível)
+        e pico_rss_bytes (máximo desde o início)
+    """
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # ru_maxrss: KB no Linux, bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname().sysname != "Darwin":
+        pico *= 1024
+
+    return {"rss_bytes": rss, "pico_rss_bytes": pico}
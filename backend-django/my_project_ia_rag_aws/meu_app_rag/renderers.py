@@ -0,0 +1,78 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .rag.fragments import ScoredProduct
+
+# Mesmas conversões do JSONRenderer do DRF (Decimal → float, datetime UTC
+# com "Z", timedelta, lazy strings...)
+_drf_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renderer JSON baseado em orjson (substitui o JSONRenderer do DRF).
+
+    Produz os mesmos bytes do JSONRenderer compacto do DRF, exceto na
+    notação de alguns floats (1e16 em vez de 1e+16), e serializa tipos do
+    NumPy (np.float32, np.int64, arrays) nativamente. Listas de
+    ScoredProduct (resultados da busca) não são convertidas em dicts:
+    cada item é emendado a partir do JSON pré-serializado do produto,
+    calculado na carga do índice (ver rag/fragments.py).
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    # datetime vai para default(): o orjson escreveria UTC como "+00:00"
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    @staticmethod
+    def default(obj):
+        """Tipos que o orjson não conhece, com as mesmas regras do JSONRenderer do DRF"""
+        if isinstance(obj, ScoredProduct):
+            return dict(obj)
+        try:
+            return _drf_encoder.default(obj)
+        except TypeError:
+            raise TypeError(f'Tipo não serializável em JSON: {type(obj).__name__}') from None
+
+    def dumps(self, data, indent=False):
+        opcoes = self.OPTIONS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, default=self.default, option=opcoes)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # Browsable API e "Accept: application/json; indent=4" pedem indentação
+        renderer_context = renderer_context or {}
+        indent = bool(renderer_context.get('indent'))
+        if accepted_media_type and 'indent=' in accepted_media_type:
+            indent = True
+
+        if indent or not isinstance(data, dict) or not any(map(_tem_fragmentos, data.values())):
+            return _escape_separators(self.dumps(data, indent))
+
+        # {"query": ..., "produtos": [ScoredProduct, ...]}: emenda os fragmentos
+        partes = []
+        for chave, valor in data.items():
+            if _tem_fragmentos(valor):
+                corpo = b'[' + b','.join(
+                    item.to_json() if isinstance(item, ScoredProduct) else self.dumps(item)
+                    for item in valor
+                ) + b']'
+            else:
+                corpo = self.dumps(valor)
+            partes.append(orjson.dumps(str(chave)) + b':' + corpo)
+        return _escape_separators(b'{' + b','.join(partes) + b'}')
+
+
+def _tem_fragmentos(valor) -> bool:
+    return isinstance(valor, list) and bool(valor) and isinstance(valor[0], ScoredProduct)
+
+
+def _escape_separators(json: bytes) -> bytes:
+    """Escapa U+2028/U+2029 como o DRF (válidos em JSON, mas não em JavaScript)"""
+    return json.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,5 +1,16 @@
+from decimal import Decimal
+from django.db import models
 from rest_framework import serializers
 from .models import Produto
+from .rag.index_store import CATALOGO_CAMPOS
+from config.settings_rag import (
+    RAG_RESULT_FIELD_PROFILES,
+    RAG_RESULT_DEFAULT_PROFILE,
+    RAG_AUTOCOMPLETE_LIMIT,
+    RAG_AUTOCOMPLETE_MAX_LIMIT,
+    BEDROCK_MODEL_TIERS,
+    RAG_MAX_TOKENS_LIMIT,
+)
 
 
 class ProdutoSerializer(serializers.ModelSerializer):
@@ -7,7 +18,8 @@ class ProdutoSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Produto
-        fields = '__all__'
+        # Colunas internas: normalizadas (filtros) e chave do import_produtos
+        exclude = list(Produto.SLUG_FIELDS.values()) + ['chave_importacao']
         read_only_fields = ['data_cadastro', 'data_atualizacao']
     
     def validate(self, data):
@@ -20,6 +32,12 @@ class ProdutoSerializer(serializers.ModelSerializer):
         return data
 
 
+class ProdutoImportSerializer(ProdutoSerializer):
+    """Valida linhas do import_produtos (`chave` opcional; sem ela, o nome é a chave)"""
+    
+    chave = serializers.CharField(max_length=255, required=False)
+
+
 class ProdutoListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listagens"""
     
@@ -29,9 +47,114 @@ class ProdutoListSerializer(serializers.ModelSerializer):
             'id', 'nome', 'categoria', 'preco', 
             'preco_promocional', 'marca', 'estoque', 'avaliacao'
         ]
+    
+    # Casas decimais dos campos Decimal, formatados como string (igual ao DRF)
+    _DECIMAIS = {
+        nome: Produto._meta.get_field(nome).decimal_places
+        for nome in Meta.fields
+        if isinstance(Produto._meta.get_field(nome), models.DecimalField)
+    }
+    
+    @classmethod
+    def lean(cls, row):
+        """
+        Serializa uma linha de `.values()` sem o overhead por campo do DRF.
+        
+        Produz a mesma saída de `ProdutoListSerializer(instance).data`.
+        
+        Args:
+            row: dict com (ao menos) os campos de Meta.fields
+            
+        Returns:
+            dict: Produto serializado
+        """
+        dados = {}
+        for nome in cls.Meta.fields:
+            valor = row[nome]
+            casas = cls._DECIMAIS.get(nome)
+            if casas is not None and valor is not None:
+                valor = f"{Decimal(valor):.{casas}f}"
+            dados[nome] = valor
+        return dados
 
 
-class RAGQuerySerializer(serializers.Serializer):
+class RAGFiltrosSerializer(serializers.Serializer):
+    """Filtros e diversificação (MMR) opcionais aplicados junto com a busca vetorial"""
+    
+    FILTROS = ('categoria', 'preco_min', 'preco_max', 'em_estoque')
+    
+    categoria = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        max_length=100,
+        help_text="Restringe a busca a uma categoria (sem diferenciar acento/caixa)"
+    )
+    preco_min = serializers.FloatField(required=False, min_value=0, help_text="Preço mínimo")
+    preco_max = serializers.FloatField(required=False, min_value=0, help_text="Preço máximo")
+    em_estoque = serializers.BooleanField(
+        required=False,
+        allow_null=True,
+        default=None,  # Ausente na query string ≠ false
+        help_text="Apenas produtos com (true) ou sem (false) estoque"
+    )
+    
+    mmr_lambda = serializers.FloatField(
+        required=False,
+        allow_null=True,
+        default=None,
+        min_value=0,
+        max_value=1,
+        help_text="Diversifica os resultados (MMR): 1 = só relevância, 0 = só diversidade"
+    )
+    
+    # Campos que podem ser pedidos em fields= (catálogo + campos da busca)
+    CAMPOS_RESULTADO = tuple(CATALOGO_CAMPOS) + ('score', 'score_rerank')
+    
+    def get_fields(self):
+        # "fields" não pode ser declarado como atributo: sobrescreveria
+        # Serializer.fields
+        campos = super().get_fields()
+        campos['fields'] = serializers.CharField(
+            required=False,
+            default=RAG_RESULT_DEFAULT_PROFILE,
+            help_text=(
+                f"Campos de cada produto: perfil ({', '.join(RAG_RESULT_FIELD_PROFILES)}) "
+                f"ou lista separada por vírgula (o id sempre é incluído)"
+            )
+        )
+        return campos
+    
+    def validate_fields(self, value):
+        """Converte perfil/lista em tupla de campos (None = todos)"""
+        value = (value or '').strip()
+        if value in RAG_RESULT_FIELD_PROFILES:
+            return RAG_RESULT_FIELD_PROFILES[value]
+        
+        campos = [c.strip() for c in value.split(',') if c.strip()]
+        invalidos = [c for c in campos if c not in self.CAMPOS_RESULTADO]
+        if not campos or invalidos:
+            raise serializers.ValidationError(
+                f"Campos inválidos: {', '.join(invalidos) if invalidos else repr(value)}. Use um perfil "
+                f"({', '.join(RAG_RESULT_FIELD_PROFILES)}) ou: {', '.join(self.CAMPOS_RESULTADO)}"
+            )
+        return tuple(dict.fromkeys(['id'] + campos))
+    
+    @property
+    def campos(self):
+        """Campos dos produtos na resposta (None = todos)"""
+        return self.validated_data.get('fields')
+    
+    @property
+    def filtros(self):
+        """Filtros informados, no formato de ProductRetriever.retrieve()"""
+        return {
+            campo: self.validated_data[campo]
+            for campo in self.FILTROS
+            if self.validated_data.get(campo) not in (None, '')
+        }
+
+
+class RAGQuerySerializer(RAGFiltrosSerializer):
     """Serializer para consultas RAG"""
     
     query = serializers.CharField(
@@ -45,6 +168,81 @@ class RAGQuerySerializer(serializers.Serializer):
         max_value=20,
         help_text="Número máximo de produtos a retornar"
     )
+    modelo = serializers.ChoiceField(
+        choices=list(BEDROCK_MODEL_TIERS),
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text="Força o nível do modelo (padrão: escolhido pela complexidade da consulta)"
+    )
+    max_tokens = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        default=None,
+        min_value=50,
+        max_value=RAG_MAX_TOKENS_LIMIT,
+        help_text="Tamanho máximo da resposta do LLM (padrão: o do nível do modelo)"
+    )
+
+
+class BuscaVetorialSerializer(RAGFiltrosSerializer):
+    """Parâmetros de /rag/search/ (busca vetorial sem geração de resposta)"""
+
+    q = serializers.CharField(
+        required=True,
+        max_length=500,
+        help_text="Texto da busca"
+    )
+    limit = serializers.IntegerField(
+        default=5,
+        min_value=1,
+        max_value=20,  # Mesmo teto do /rag/query/: o MMR é O(k·n)
+        help_text="Número máximo de produtos a retornar"
+    )
+
+
+class BuscaTextualSerializer(RAGFiltrosSerializer):
+    """Busca textual (palavras-chave, ver fulltext.py) com os mesmos filtros da busca vetorial"""
+
+    q = serializers.CharField(
+        required=True,
+        max_length=200,
+        help_text="Palavras-chave (nome, marca, categoria, descrição, especificações)"
+    )
+    limit = serializers.IntegerField(
+        default=10,
+        min_value=1,
+        max_value=50,
+        help_text="Número máximo de produtos a retornar"
+    )
+    mmr_lambda = None  # Sem embeddings, não há diversificação
+
+    CAMPOS_RESULTADO = tuple(CATALOGO_CAMPOS) + ('score', 'trecho')
+
+    @property
+    def campos(self):
+        """Campos dos produtos na resposta (None = todos); o trecho sempre é incluído"""
+        campos = super().campos
+        if campos is None:
+            return None
+        return tuple(dict.fromkeys(campos + ('trecho',)))
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Parâmetros de /rag/autocomplete/"""
+
+    q = serializers.CharField(
+        required=True,
+        allow_blank=True,  # Campo de busca vazio: nenhuma sugestão
+        max_length=100,
+        help_text="Texto digitado até agora"
+    )
+    limit = serializers.IntegerField(
+        default=RAG_AUTOCOMPLETE_LIMIT,
+        min_value=1,
+        max_value=RAG_AUTOCOMPLETE_MAX_LIMIT,
+        help_text="Número máximo de sugestões"
+    )
 
 
 class RAGResponseSerializer(serializers.Serializer):
@@ -54,4 +252,17 @@ class RAGResponseSerializer(serializers.Serializer):
     resposta = serializers.CharField()
     produtos_encontrados = serializers.IntegerField()
     produtos = ProdutoListSerializer(many=True)
+    degradado = serializers.BooleanField(
+        help_text="True quando a resposta é um resumo em template (LLM indisponível ou lento)"
+    )
+    rota = serializers.CharField(
+        help_text=(
+            "Origem da resposta: llm, template:<intenções> (consulta direta), "
+            "degradado (LLM indisponível ou lento) ou sem_produtos"
+        )
+    )
+    modelo = serializers.CharField(
+        allow_null=True,
+        help_text="Nível do modelo que gerou a resposta (null quando o LLM não foi usado)"
+    )
     tempo_processamento = serializers.FloatField(help_text="Tempo em segundos")
\ No newline at end of file
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Produto
+from .caching import invalidate_catalog
+
+
+@receiver(post_delete, sender=Produto)
+def produto_excluido(sender, **kwargs):
+    """
+    Invalida ETags e respostas em cache da API de produtos.
+
+    Saves não precisam: data_atualizacao (auto_now) já muda a versão do
+    catálogo (ver caching.catalog_state).
+    """
+    invalidate_catalog()
@@ -0,0 +1,121 @@
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from config.settings_rag import RAG_AUTOCOMPLETE_LIMIT, RAG_AUTOCOMPLETE_MAX_LIMIT
+from meu_app_rag.rag import autocomplete, vector_store
+from meu_app_rag.rag.autocomplete import PrefixIndex, fold, popularity
+from meu_app_rag.rag.vector_store import InMemoryVectorStore
+from meu_app_rag.tests.utils import IndiceTemporarioMixin, produto_catalogo, publicar, vetor
+
+
+def catalogo():
+    return [
+        produto_catalogo(1, 'Tênis Corrida Pro', marca='Veloz', avaliacao=4.8, num_avaliacoes=900),
+        produto_catalogo(2, 'Tênis Casual', marca='Veloz', avaliacao=4.0, num_avaliacoes=20),
+        produto_catalogo(3, 'Tênis Trilha Tênis', marca='Serra', avaliacao=4.9, num_avaliacoes=500,
+                         estoque=0),
+        produto_catalogo(4, 'Camiseta Corrida', categoria='Roupas', avaliacao=3.0, num_avaliacoes=5),
+    ]
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.indice = PrefixIndex.from_catalog(catalogo())
+
+    def textos(self, prefixo, limit=8):
+        return [s['texto'] for s in self.indice.suggest(prefixo, limit)]
+
+    def test_fold(self):
+        self.assertEqual(fold('  Tênis-CORRIDA  Pró! '), 'tenis corrida pro')
+        self.assertEqual(fold(None), '')
+
+    def test_ignora_acento_e_caixa(self):
+        esperado = self.textos('tenis')
+        self.assertEqual(self.textos('TÊNIS'), esperado)
+        self.assertEqual(self.textos('Tên'), esperado)
+        self.assertEqual(len(esperado), 3)
+
+    def test_casa_palavras_do_meio_e_frases(self):
+        self.assertEqual(self.textos('corrida'), ['Tênis Corrida Pro', 'Camiseta Corrida'])
+        self.assertEqual(self.textos('corrida p'), ['Tênis Corrida Pro'])
+        self.assertEqual(self.textos('pro corrida'), [])
+        self.assertEqual(self.textos(''), [])
+        self.assertEqual(self.textos('!!'), [])
+
+    def test_ordem_por_popularidade(self):
+        # Sem estoque, o peso cai pela metade: o Trilha fica atrás do Corrida Pro
+        pesos = {p['id']: popularity(p) for p in catalogo()}
+        self.assertGreater(pesos[1], pesos[3])
+        self.assertEqual(self.textos('tenis'), ['Tênis Corrida Pro', 'Tênis Trilha Tênis', 'Tênis Casual'])
+
+    def test_marcas_e_categorias_agregam_os_produtos(self):
+        veloz, = [s for s in self.indice.suggest('vel') if s['tipo'] == 'marca']
+        self.assertEqual((veloz['texto'], veloz['produtos']), ('Veloz', 2))
+        categoria = self.indice.suggest('calc')[0]
+        self.assertEqual((categoria['tipo'], categoria['produtos']), ('categoria', 3))
+
+    def test_limit_e_palavra_repetida_sem_duplicar(self):
+        self.assertEqual(self.textos('tenis', limit=1), ['Tênis Corrida Pro'])
+        # "Tênis Trilha Tênis" casa duas vezes com "tenis" mas aparece uma vez
+        self.assertEqual(len(set(self.textos('t', limit=20))), len(self.textos('t', limit=20)))
+
+    def test_prefixos_frequentes_vao_para_o_cache(self):
+        esperado = self.textos('t', limit=3)
+        with mock.patch.object(autocomplete, 'RAG_AUTOCOMPLETE_MEMO_MIN_MATCHES', 0):
+            indice = PrefixIndex.from_catalog(catalogo())
+            self.assertEqual([s['texto'] for s in indice.suggest('t', 3)], esperado)
+            self.assertIn('t', indice._memo)
+            self.assertEqual([s['texto'] for s in indice.suggest('T', 2)], esperado[:2])
+
+
+class AutocompleteViewTests(IndiceTemporarioMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        produtos = catalogo()
+        publicar(self.store, produtos, np.stack([vetor(p['nome']) for p in produtos]))
+        self.vector_store = InMemoryVectorStore(self.store)
+
+        retriever = mock.Mock()
+        retriever.suggest.side_effect = self.vector_store.suggest
+        patcher = mock.patch(
+            'meu_app_rag.rag.retriever.get_retriever', mock.Mock(return_value=retriever)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sugerir(self, **params):
+        return self.client.get(reverse('rag-autocomplete'), params)
+
+    def test_sugestoes(self):
+        response = self.sugerir(q='TÊN', limit=2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['query'], 'TÊN')
+        self.assertEqual(
+            response.data['sugestoes'],
+            [{'texto': 'Tênis Corrida Pro', 'tipo': 'produto', 'id': 1},
+             {'texto': 'Tênis Trilha Tênis', 'tipo': 'produto', 'id': 3}]
+        )
+
+    def test_limit_padrao_maximo_e_texto_vazio(self):
+        self.assertLessEqual(len(self.sugerir(q='t').data['sugestoes']), RAG_AUTOCOMPLETE_LIMIT)
+        self.assertEqual(self.sugerir(q='').data['sugestoes'], [])
+        for params in ({}, {'q': 't', 'limit': 0}, {'q': 't', 'limit': RAG_AUTOCOMPLETE_MAX_LIMIT + 1},
+                       {'q': 't', 'limit': 'abc'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.sugerir(**params).status_code, 400)
+
+    def test_nova_versao_do_indice_remonta_as_sugestoes(self):
+        self.assertEqual(self.sugerir(q='sand').data['sugestoes'], [])
+
+        produtos = catalogo() + [produto_catalogo(5, 'Sandália Praia', avaliacao=5.0, num_avaliacoes=50)]
+        publicar(self.store, produtos, np.stack([vetor(p['nome']) for p in produtos]))
+        with mock.patch.object(vector_store, 'RAG_INDEX_RELOAD_INTERVAL', 0):
+            sugestoes = self.sugerir(q='sand').data['sugestoes']
+
+        self.assertEqual(sugestoes, [{'texto': 'Sandália Praia', 'tipo': 'produto', 'id': 5}])
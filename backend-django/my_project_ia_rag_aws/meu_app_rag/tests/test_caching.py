@@ -0,0 +1,57 @@
+from decimal import Decimal
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from config.settings_rag import PRODUTOS_CACHE_ALIAS
+from meu_app_rag import caching
+from meu_app_rag.models import Produto
+
+
+class CatalogoEtagTests(APITestCase):
+
+    def setUp(self):
+        caches[PRODUTOS_CACHE_ALIAS].clear()
+        self.url = reverse('produto-list')
+        self.produto = Produto.objects.create(nome='Tênis', categoria='Calçados', preco=Decimal('199.90'))
+        Produto.objects.create(nome='Bota', categoria='Calçados', preco=Decimal('299.90'))
+
+    def etag(self, params=None):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_etag_vem_do_banco_e_nao_do_cache(self):
+        etag = self.etag()
+        # Outro worker (cache local vazio) calcula o mesmo ETag
+        caches[PRODUTOS_CACHE_ALIAS].clear()
+        self.assertEqual(self.etag(), etag)
+        self.assertNotEqual(self.etag({'categoria': 'calcados'}), etag)
+
+    def test_304_com_if_none_match(self):
+        etag = self.etag()
+        caches[PRODUTOS_CACHE_ALIAS].clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_save_muda_versao(self):
+        etag = self.etag()
+        self.produto.estoque = 5
+        self.produto.save()
+        self.assertNotEqual(self.etag(), etag)
+
+    def test_exclusao_muda_versao_e_pagina(self):
+        etag = self.etag()
+        self.produto.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.produto.pk, [p['id'] for p in response.data['results']])
+
+    def test_update_em_massa_com_invalidate_catalog(self):
+        antes = caching.catalog_state()
+        Produto.objects.update(estoque=9)
+        self.assertEqual(caching.catalog_state()['versao'], antes['versao'])
+        caching.invalidate_catalog()
+        depois = caching.catalog_state()
+        self.assertNotEqual(depois['versao'], antes['versao'])
+        self.assertGreaterEqual(depois['last_modified'], antes['last_modified'])
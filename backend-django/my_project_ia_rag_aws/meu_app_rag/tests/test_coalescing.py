@@ -0,0 +1,177 @@
+import threading
+from unittest import mock
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag import coalescing
+from meu_app_rag.rag.coalescing import SingleFlight, CoalesceTimeout
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Coalescência dentro do worker (sem cache compartilhado)"""
+
+    def setUp(self):
+        self.sf = SingleFlight(cache_alias='')
+        self.liberar = threading.Event()
+        self.chamadas = 0
+
+    def lider(self, resultado=None, erro=None):
+        """fn do líder: conta a chamada e só termina quando o teste liberar"""
+        def fn():
+            self.chamadas += 1
+            self.liberar.wait(5)
+            if erro is not None:
+                raise erro
+            return resultado
+        return fn
+
+    def em_paralelo(self, key, fn):
+        """Inicia o líder numa thread e espera ele registrar a chamada"""
+        saida = {}
+
+        def executar():
+            try:
+                saida['valor'] = self.sf.do(key, fn)
+            except Exception as e:
+                saida['erro'] = e
+
+        thread = threading.Thread(target=executar)
+        thread.start()
+        for _ in range(500):
+            if self.sf.in_flight(key):
+                break
+            threading.Event().wait(0.01)
+        return thread, saida
+
+    def esperar_duplicadas(self, key, total):
+        """Espera as duplicadas se registrarem na chamada do líder"""
+        for _ in range(500):
+            if self.sf.waiting(key) >= total:
+                return
+            threading.Event().wait(0.01)
+        self.fail('duplicadas não chegaram a aguardar o líder')
+
+    def test_make_key_normaliza_consulta(self):
+        self.assertEqual(
+            SingleFlight.make_key('query', '  Tênis   de CORRIDA! ', 5),
+            SingleFlight.make_key('query', 'tenis de corrida', 5),
+        )
+        self.assertNotEqual(
+            SingleFlight.make_key('query', 'tenis', 5),
+            SingleFlight.make_key('query', 'tenis', 5, categoria='calcados'),
+        )
+
+    def test_duplicada_recebe_resultado_do_lider(self):
+        thread, saida = self.em_paralelo('k', self.lider(resultado={'resposta': 'ok'}))
+
+        resultados = []
+        duplicadas = [
+            threading.Thread(target=lambda: resultados.append(self.sf.do('k', self.lider())))
+            for _ in range(3)
+        ]
+        for t in duplicadas:
+            t.start()
+        self.esperar_duplicadas('k', 3)
+        self.liberar.set()
+        thread.join(5)
+        for t in duplicadas:
+            t.join(5)
+
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(saida['valor'], ({'resposta': 'ok'}, False))
+        self.assertEqual(resultados, [({'resposta': 'ok'}, True)] * 3)
+        self.assertFalse(self.sf.in_flight('k'))
+
+    def test_erro_do_lider_propaga_para_duplicadas(self):
+        erro = RuntimeError('bedrock fora')
+        thread, saida = self.em_paralelo('k', self.lider(erro=erro))
+
+        erros = []
+
+        def duplicada():
+            try:
+                self.sf.do('k', self.lider())
+            except RuntimeError as e:
+                erros.append(e)
+
+        t = threading.Thread(target=duplicada)
+        t.start()
+        self.esperar_duplicadas('k', 1)
+        self.liberar.set()
+        thread.join(5)
+        t.join(5)
+
+        self.assertIs(saida['erro'], erro)
+        self.assertEqual(erros, [erro])
+        self.assertEqual(self.chamadas, 1)
+
+        # Depois do erro a chave fica livre: a próxima chamada executa de novo
+        self.assertEqual(self.sf.do('k', lambda: 'nova'), ('nova', False))
+
+    def test_duplicada_desiste_apos_timeout(self):
+        thread, _ = self.em_paralelo('k', self.lider(resultado='ok'))
+        with self.assertRaises(CoalesceTimeout):
+            self.sf.do('k', self.lider(), timeout=0.05)
+        self.liberar.set()
+        thread.join(5)
+
+
+class SingleFlightCacheTests(SimpleTestCase):
+    """Coalescência entre workers: duas instâncias sobre o mesmo cache"""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.worker_a = SingleFlight(cache_alias='default')
+        self.worker_b = SingleFlight(cache_alias='default')
+        self.liberar = threading.Event()
+        self.iniciou = threading.Event()
+
+    def lider_bloqueado(self, worker, resultado):
+        """Líder em outra thread que só termina quando o teste liberar"""
+        saida = {}
+
+        def fn():
+            self.iniciou.set()
+            self.liberar.wait(5)
+            return resultado
+
+        thread = threading.Thread(target=lambda: saida.setdefault('valor', worker.do('k', fn)))
+        thread.start()
+        self.assertTrue(self.iniciou.wait(5))
+        return thread, saida
+
+    def test_outro_worker_recebe_resultado_do_lider(self):
+        thread, saida = self.lider_bloqueado(self.worker_a, 'resposta A')
+        threading.Timer(0.1, self.liberar.set).start()
+
+        self.assertEqual(self.worker_b.do('k', lambda: 'resposta B'), ('resposta A', True))
+        thread.join(5)
+        self.assertEqual(saida['valor'], ('resposta A', False))
+
+    def test_resultado_de_execucao_anterior_nao_e_reaproveitado(self):
+        self.assertEqual(self.worker_a.do('k', lambda: 'antiga'), ('antiga', False))
+
+        # Nova execução em andamento: quem chega agora espera por ela
+        thread, _ = self.lider_bloqueado(self.worker_a, 'nova')
+        threading.Timer(0.1, self.liberar.set).start()
+
+        self.assertEqual(self.worker_b.do('k', lambda: 'propria'), ('nova', True))
+        thread.join(5)
+
+        # Sem líder em andamento, executa de novo (nada fica em cache)
+        self.assertEqual(self.worker_b.do('k', lambda: 'propria'), ('propria', False))
+
+    def test_lider_com_erro_libera_para_outro_worker(self):
+        with self.assertRaises(RuntimeError):
+            self.worker_a.do('k', mock.Mock(side_effect=RuntimeError('bedrock fora')))
+        self.assertEqual(self.worker_b.do('k', lambda: 'ok'), ('ok', False))
+
+    def test_lock_expirado_nao_e_apagado(self):
+        cache = caches['default']
+        cache.set('rag:sf:lock:k', 'outro-lider')
+        with mock.patch.object(coalescing.time, 'monotonic', return_value=1000.0):
+            SingleFlight._release(cache, 'rag:sf:lock:k', 1000.0 - coalescing.RAG_COALESCE_LOCK_TTL)
+        self.assertEqual(cache.get('rag:sf:lock:k'), 'outro-lider')
+
+        SingleFlight._release(cache, 'rag:sf:lock:k', coalescing.time.monotonic())
+        self.assertIsNone(cache.get('rag:sf:lock:k'))
@@ -0,0 +1,68 @@
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from meu_app_rag.management.commands.popular_embeddings import Command
+from meu_app_rag.models import Produto
+from meu_app_rag.tests.utils import IndiceTemporarioMixin
+
+
+class ExportarCatalogoTests(IndiceTemporarioMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.produtos = [
+            Produto.objects.create(nome=f'Produto {i}', categoria='Calçados', preco=Decimal('10.50'))
+            for i in range(5)
+        ]
+        self.ids = [p.pk for p in self.produtos]
+        self.comando = Command()
+
+    def test_paginas_por_id_sem_offset(self):
+        build = self.store.new_build()
+        with CaptureQueriesContext(connection) as consultas:
+            exportados = list(self.comando.exportar_catalogo(build, chunk_size=2))
+
+        self.assertEqual([p['id'] for p in exportados], self.ids)
+        # 3 páginas com produtos + 1 vazia que encerra a exportação
+        self.assertEqual(len(consultas), 4)
+        for consulta in consultas.captured_queries:
+            self.assertNotIn('OFFSET', consulta['sql'].upper())
+        self.assertIn(f'"id" > {self.ids[3]}', consultas.captured_queries[2]['sql'])
+
+        self.assertTrue(build.has_catalogo())
+        self.assertEqual([p['id'] for p in build.iter_catalogo()], self.ids)
+        self.assertEqual(exportados[0]['preco'], 10.5)
+
+    def test_cada_pagina_e_gravada_antes_de_ser_repassada(self):
+        build = self.store.new_build()
+        exportacao = self.comando.exportar_catalogo(build, chunk_size=2)
+        next(exportacao)
+        self.assertEqual([p['id'] for p in build.iter_catalogo()], self.ids[:2])
+        self.assertFalse(build.has_catalogo())
+
+    def test_retomada_continua_apos_o_ultimo_id_exportado(self):
+        build = self.store.new_build()
+        exportacao = self.comando.exportar_catalogo(build, chunk_size=2)
+        next(exportacao)
+        exportacao.close()  # Interrompido com a primeira página gravada
+
+        # Produto já exportado e alterado depois não é relido do banco
+        Produto.objects.filter(pk=self.ids[0]).update(nome='Alterado')
+
+        retomado = self.store.open_build(build.version)
+        with CaptureQueriesContext(connection) as consultas:
+            exportados = list(self.comando.exportar_catalogo(retomado, chunk_size=2))
+
+        self.assertEqual([p['id'] for p in exportados], self.ids)
+        self.assertEqual(exportados[0]['nome'], 'Produto 0')
+        self.assertIn(f'"id" > {self.ids[1]}', consultas.captured_queries[0]['sql'])
+
+    def test_catalogo_completo_nao_consulta_o_banco(self):
+        build = self.store.new_build()
+        list(self.comando.exportar_catalogo(build, chunk_size=10))
+
+        with self.assertNumQueries(0):
+            exportados = list(self.comando.exportar_catalogo(self.store.open_build(build.version)))
+        self.assertEqual(len(exportados), 5)
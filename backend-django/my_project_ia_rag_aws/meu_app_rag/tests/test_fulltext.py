@@ -0,0 +1,113 @@
+from decimal import Decimal
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from meu_app_rag import fulltext
+from meu_app_rag.models import Produto
+from meu_app_rag.tests.test_produtos import criar_produto
+
+
+class Fts5QueryTests(SimpleTestCase):
+
+    def test_palavras_entre_aspas_e_prefixo_na_ultima(self):
+        self.assertEqual(fulltext.fts5_query('tênis corr'), '"tênis" "corr"*')
+        self.assertEqual(fulltext.fts5_query('Tênis'), '"Tênis"*')
+
+    def test_operadores_e_aspas_do_usuario_viram_termos(self):
+        casos = {
+            'tênis AND "leve"': '"tênis" "AND" "leve"*',
+            'NOT bota OR -chinelo': '"NOT" "bota" "OR" "chinelo"*',
+            'NEAR(a b) col:valor^': '"NEAR" "a" "b" "col" "valor"*',
+            'aspas "" soltas "': '"aspas" "soltas"*',
+        }
+        for texto, esperado in casos.items():
+            with self.subTest(texto=texto):
+                self.assertEqual(fulltext.fts5_query(texto), esperado)
+
+    def test_sem_palavras(self):
+        for texto in ('', None, '  ', '"*()-+^:'):
+            with self.subTest(texto=texto):
+                self.assertIsNone(fulltext.fts5_query(texto))
+
+
+class BuscaTextualTests(APITestCase):
+
+    def setUp(self):
+        self.url = reverse('produto-busca')
+        self.runner = criar_produto(
+            'Tênis Runner', marca='Veloz', descricao='Tênis leve para corrida de rua'
+        )
+        self.trilha = criar_produto(
+            'Bota Trilha', descricao='Impermeável, boa também para corrida em trilha', estoque=0
+        )
+        self.camiseta = criar_produto(
+            'Camiseta Dry', categoria='Roupas', preco=Decimal('79.90'), descricao='Tecido respirável'
+        )
+
+    def buscar(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['produtos']
+
+    def ids(self, q, **params):
+        return [p['id'] for p in self.buscar(q, **params)]
+
+    def test_encontra_por_palavra_sem_acento_e_por_prefixo(self):
+        self.assertEqual(self.ids('tenis'), [self.runner.id])
+        self.assertEqual(self.ids('respir'), [self.camiseta.id])
+        self.assertEqual(self.ids('veloz corrida'), [self.runner.id])
+        self.assertEqual(self.ids('sandália'), [])
+
+    def test_ranking_pesa_o_nome(self):
+        self.assertEqual(self.ids('trilha'), [self.trilha.id])
+        produtos = self.buscar('corrida')
+        self.assertEqual({p['id'] for p in produtos}, {self.runner.id, self.trilha.id})
+        self.assertGreater(produtos[0]['score'], 0)
+        self.assertGreaterEqual(produtos[0]['score'], produtos[1]['score'])
+
+    def test_trecho_destaca_os_termos(self):
+        produto = self.buscar('impermeável')[0]
+        self.assertIn(f'{fulltext.MARCA_INICIO}Impermeável{fulltext.MARCA_FIM}', produto['trecho'])
+
+    def test_filtros_e_limit(self):
+        self.assertEqual(self.ids('corrida', em_estoque='true'), [self.runner.id])
+        self.assertEqual(self.ids('corrida', em_estoque='false'), [self.trilha.id])
+        self.assertEqual(self.ids('tecido', categoria='roupas'), [self.camiseta.id])
+        self.assertEqual(self.ids('tecido', categoria='Calçados'), [])
+        self.assertEqual(len(self.ids('corrida', limit=1)), 1)
+
+    def test_operadores_e_aspas_nao_quebram_a_busca(self):
+        for q in ('tênis AND "leve', 'corrida OR NOT', 'NEAR(tênis', '"', '*'):
+            with self.subTest(q=q):
+                response = self.client.get(self.url, {'q': q})
+                self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.ids('"tênis" AND'), [])  # "AND" é palavra, não operador
+
+    def test_indice_acompanha_alteracoes_e_exclusoes(self):
+        self.runner.nome = 'Tênis Maratona'
+        self.runner.save()
+        self.assertEqual(self.ids('maratona'), [self.runner.id])
+        self.assertEqual(self.ids('runner'), [])
+
+        # Alteração que não toca campos indexados
+        Produto.objects.filter(pk=self.runner.pk).update(estoque=10)
+        self.assertEqual(self.ids('maratona'), [self.runner.id])
+
+        self.camiseta.delete()
+        self.assertEqual(self.ids('respirável'), [])
+
+        # bulk_create (import_produtos) não dispara signals: os triggers cobrem
+        novo, = Produto.objects.bulk_create([
+            Produto(nome='Meia Esportiva', categoria='Roupas', preco=Decimal('19.90'))
+        ])
+        self.assertEqual(self.ids('meia'), [novo.id])
+
+    def test_parametros_invalidos_respondem_400(self):
+        for params in ({}, {'q': ''}, {'q': 'tênis', 'limit': 0}, {'q': 'tênis', 'limit': 'abc'},
+                       {'q': 'tênis', 'limit': 51}, {'q': 'x' * 201}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_texto_sem_palavras_nao_encontra_nada(self):
+        self.assertEqual(self.buscar('!!! ???'), [])
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase
+
+from config.settings_rag import BEDROCK_MODEL_TIERS
+from meu_app_rag.rag import generator
+from meu_app_rag.rag.generator import ResponseGenerator, get_model
+from meu_app_rag.rag.resilience import BedrockUnavailable, CircuitBreaker, CircuitOpenError
+
+CONTEXTO = 'ID: 1\nNome: Tênis Runner\nPreço: R$ 299,90'
+
+
+def resposta(texto):
+    return SimpleNamespace(
+        content=texto, additional_kwargs={'usage': {'prompt_tokens': 100, 'completion_tokens': 20}}
+    )
+
+
+class GetModelTests(SimpleTestCase):
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.dict(generator._models, clear=True),
+            mock.patch.object(generator, 'ChatBedrock', side_effect=lambda **kwargs: mock.Mock(**kwargs)),
+            mock.patch.object(generator, 'get_bedrock_client'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_um_modelo_por_nivel_com_a_configuracao_dele(self):
+        for tier, config in BEDROCK_MODEL_TIERS.items():
+            with self.subTest(tier=tier):
+                modelo = get_model(tier)
+                self.assertEqual(modelo.model_id, config['model_id'])
+                self.assertEqual(modelo.model_kwargs['max_tokens'], config['max_tokens'])
+                self.assertIs(get_model(tier), modelo)
+        self.assertIsNot(get_model('rapido'), get_model('forte'))
+
+
+class ResponseGeneratorTierTests(SimpleTestCase):
+
+    def setUp(self):
+        self.modelos = {tier: mock.Mock(name=tier) for tier in BEDROCK_MODEL_TIERS}
+        for modelo in self.modelos.values():
+            modelo.invoke.return_value = resposta('Recomendo o Tênis Runner')
+        for patcher in (
+            mock.patch.object(generator, 'get_model', side_effect=self.modelos.__getitem__),
+            mock.patch.object(generator, 'get_bedrock_client'),
+            mock.patch.object(
+                generator, 'get_breaker',
+                side_effect=lambda nome: CircuitBreaker(nome, failure_threshold=2, reset_timeout=60)
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.generator = ResponseGenerator()
+
+    def test_usa_o_modelo_do_nivel_com_o_max_tokens_dele(self):
+        self.assertEqual(self.generator.generate('preço?', CONTEXTO, tier='rapido'), 'Recomendo o Tênis Runner')
+
+        self.modelos['forte'].invoke.assert_not_called()
+        self.assertEqual(
+            self.modelos['rapido'].invoke.call_args.kwargs,
+            {'max_tokens': BEDROCK_MODEL_TIERS['rapido']['max_tokens']}
+        )
+
+    def test_max_tokens_informado_chega_ao_modelo(self):
+        self.generator.generate('compare os dois', CONTEXTO, tier='forte', max_tokens=123)
+        self.assertEqual(self.modelos['forte'].invoke.call_args.kwargs, {'max_tokens': 123})
+
+    def test_breaker_por_nivel(self):
+        self.modelos['rapido'].invoke.side_effect = ConnectionError('throttling')
+
+        for _ in range(2):
+            with self.assertRaises(BedrockUnavailable):
+                self.generator.generate('preço?', CONTEXTO, tier='rapido')
+        with self.assertRaises(CircuitOpenError):
+            self.generator.generate('preço?', CONTEXTO, tier='rapido')
+        self.assertEqual(self.modelos['rapido'].invoke.call_count, 2)
+
+        # O modelo forte continua respondendo
+        self.assertEqual(self.generator.breakers['forte'].estado, CircuitBreaker.FECHADO)
+        self.assertEqual(self.generator.generate('preço?', CONTEXTO, tier='forte'), 'Recomendo o Tênis Runner')
+
+    def test_contexto_sem_produtos_nao_chama_o_modelo(self):
+        self.assertEqual(self.generator.generate('preço?', '', tier='rapido'), generator.RESPOSTA_SEM_PRODUTOS)
+        self.modelos['rapido'].invoke.assert_not_called()
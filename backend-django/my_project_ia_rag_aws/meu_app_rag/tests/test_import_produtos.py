@@ -0,0 +1,149 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from meu_app_rag.management.commands import import_produtos
+from meu_app_rag.models import Produto
+from meu_app_rag.rag.embeddings import Embeddings
+from meu_app_rag.rag.index_store import IndexStore
+from meu_app_rag.tests.utils import IndiceTemporarioMixin, vetor
+
+LINHAS = [
+    {'nome': 'Tênis Runner', 'categoria': 'Calçados', 'preco': '299.90', 'estoque': 10, 'marca': 'Nike'},
+    {'nome': 'Bota Couro', 'categoria': 'Calçados', 'preco': '499.00'},
+    {'nome': 'Boné', 'categoria': 'Acessórios', 'preco': '59.90', 'cor': 'Azul'},
+]
+
+
+class ImportMixin:
+
+    def importar(self, linhas, **options):
+        """Roda o import_produtos sobre um JSONL temporário; devolve as estatísticas"""
+        fd, caminho = tempfile.mkstemp(suffix='.jsonl')
+        self.addCleanup(os.remove, caminho)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(linha, ensure_ascii=False) + '\n' for linha in linhas)
+
+        comando = import_produtos.Command()
+        call_command(comando, caminho, stdout=io.StringIO(), **options)
+        return comando.stats
+
+
+class ImportProdutosTests(ImportMixin, TestCase):
+
+    def test_cria_e_reimportacao_identica_nao_grava(self):
+        stats = self.importar(LINHAS)
+        self.assertEqual((stats['criadas'], stats['invalidas']), (3, 0))
+        tenis = Produto.objects.get(nome='Tênis Runner')
+        self.assertEqual(tenis.chave_importacao, 'Tênis Runner')
+        self.assertEqual(tenis.categoria_slug, 'calcados')
+
+        stats = self.importar(LINHAS)
+        self.assertEqual((stats['criadas'], stats['atualizadas'], stats['inalteradas']), (0, 0, 3))
+        self.assertEqual(Produto.objects.get(pk=tenis.pk).data_atualizacao, tenis.data_atualizacao)
+
+    def test_upsert_parcial_mantem_campos_ausentes(self):
+        self.importar(LINHAS)
+        antes = Produto.objects.get(nome='Tênis Runner')
+        stats = self.importar([{'nome': 'Tênis Runner', 'preco': '279.90'}])
+        self.assertEqual((stats['atualizadas'], stats['invalidas']), (1, 0))
+
+        tenis = Produto.objects.get(nome='Tênis Runner')
+        # O upsert também atualiza data_atualizacao (versão do catálogo)
+        self.assertGreater(tenis.data_atualizacao, antes.data_atualizacao)
+        self.assertEqual(tenis.preco, Decimal('279.90'))
+        self.assertEqual((tenis.estoque, tenis.marca), (10, 'Nike'))
+        self.assertEqual(Produto.objects.count(), 3)
+
+    def test_chave_do_arquivo_permite_renomear(self):
+        self.importar([dict(LINHAS[0], chave='SKU-1')])
+        stats = self.importar([{'chave': 'SKU-1', 'nome': 'Tênis Runner 2'}])
+        self.assertEqual(stats['atualizadas'], 1)
+        self.assertEqual(Produto.objects.get(chave_importacao='SKU-1').nome, 'Tênis Runner 2')
+        self.assertEqual(Produto.objects.count(), 1)
+
+    def test_mesma_chave_no_bloco_ultima_linha_vence(self):
+        stats = self.importar([LINHAS[2], dict(LINHAS[2], preco='49.90')])
+        self.assertEqual(stats['criadas'], 1)
+        self.assertEqual(Produto.objects.get().preco, Decimal('49.90'))
+
+    def test_linhas_invalidas_sao_contadas(self):
+        stats = self.importar([
+            {'nome': 'Sem preço', 'categoria': 'Calçados'},
+            {'nome': 'Promo', 'categoria': 'Calçados', 'preco': '10', 'preco_promocional': '20'},
+            LINHAS[1],
+        ])
+        self.assertEqual((stats['invalidas'], stats['criadas']), (2, 1))
+
+    def test_dry_run_nao_grava(self):
+        stats = self.importar(LINHAS, dry_run=True)
+        self.assertEqual(stats['criadas'], 3)
+        self.assertFalse(Produto.objects.exists())
+
+
+class ImportProdutosApiTests(ImportMixin, APITestCase):
+
+    def criar_pela_api(self, nome):
+        response = self.client.post(
+            reverse('produto-list'), {'nome': nome, 'categoria': 'Calçados', 'preco': '100.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertNotIn('chave_importacao', response.data)
+        return response.data['id']
+
+    def test_api_aceita_nomes_repetidos(self):
+        self.criar_pela_api('Chinelo')
+        self.criar_pela_api('Chinelo')
+        self.assertEqual(Produto.objects.filter(nome='Chinelo').count(), 2)
+
+    def test_produto_da_api_e_adotado_pelo_nome(self):
+        pk = self.criar_pela_api('Bota Couro')
+        stats = self.importar([LINHAS[1]])
+        self.assertEqual((stats['criadas'], stats['atualizadas']), (0, 1))
+
+        produto = Produto.objects.get()
+        self.assertEqual((produto.pk, produto.chave_importacao), (pk, 'Bota Couro'))
+        self.assertEqual(produto.preco, Decimal('499.00'))
+
+    def test_nome_ambiguo_cria_produto_novo(self):
+        self.criar_pela_api('Bota Couro')
+        self.criar_pela_api('Bota Couro')
+        stats = self.importar([LINHAS[1]])
+        self.assertEqual(stats['criadas'], 1)
+        self.assertEqual(Produto.objects.filter(chave_importacao='Bota Couro').count(), 1)
+        self.assertEqual(Produto.objects.count(), 3)
+
+
+class ImportReembedTests(IndiceTemporarioMixin, ImportMixin, TestCase):
+
+    def test_reembed_gera_apenas_os_alterados(self):
+        textos = []
+
+        def embed(_, texto, deadline=None):
+            textos.append(texto)
+            return vetor(texto)
+
+        with mock.patch.object(Embeddings, 'embed', embed), \
+                mock.patch('meu_app_rag.management.commands.popular_embeddings.BEDROCK_EMBEDDING_MODEL', 'fake'):
+            self.importar(LINHAS, reembed=True)
+            self.assertEqual(len(textos), 3)
+
+            textos.clear()
+            self.importar([dict(LINHAS[0], descricao='Amortecimento em gel')], reembed=True)
+
+        self.assertEqual(len(textos), 1)
+        self.assertIn('amortecimento em gel', textos[0])
+        self.assertEqual(len(IndexStore().load().product_ids), 3)
+
+    def test_sem_alteracoes_nao_chama_popular_embeddings(self):
+        self.importar(LINHAS)
+        with mock.patch('meu_app_rag.management.commands.import_produtos.call_command') as popular:
+            self.importar(LINHAS, reembed=True)
+        popular.assert_not_called()
@@ -0,0 +1,111 @@
+import io
+import os
+from decimal import Decimal
+from unittest import mock
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from meu_app_rag.models import Produto
+from meu_app_rag.rag.embeddings import Embeddings
+from meu_app_rag.tests.utils import DIMS, IndiceTemporarioMixin, vetor
+
+
+class CheckpointTests(IndiceTemporarioMixin, SimpleTestCase):
+
+    def test_bloco_interrompido_e_descartado(self):
+        build = self.store.new_build()
+        build.append_chunk([1, 2], [vetor('a'), vetor('b')])
+
+        # Escrita interrompida: vetor do bloco seguinte gravado pela metade
+        # e id sem o vetor completo
+        with open(build.checkpoint_vectors_path, 'ab') as f:
+            f.write(b'\0' * (DIMS * 4 // 2))
+        with open(build.checkpoint_ids_path, 'ab') as f:
+            np.asarray([3], dtype=np.int64).tofile(f)
+
+        self.assertEqual(build.checkpoint_count(), 2)
+        self.assertEqual(os.path.getsize(build.checkpoint_ids_path), 2 * 8)
+        self.assertEqual(os.path.getsize(build.checkpoint_vectors_path), 2 * DIMS * 4)
+        self.assertEqual(build.embedded_ids(), {1, 2})
+
+        build.append_chunk([3], [vetor('c')])
+        self.assertEqual(build.assemble(chunk_size=2), 3)
+        self.assertEqual(np.load(build.ids_path).tolist(), [1, 2, 3])
+        np.testing.assert_array_equal(np.load(build.vectors_path)[2], vetor('c'))
+
+    def test_dimensao_inconsistente(self):
+        build = self.store.new_build()
+        build.append_chunk([1], [vetor('a')])
+        with self.assertRaises(ValueError):
+            build.append_chunk([2], [np.zeros(DIMS + 1, dtype=np.float32)])
+
+    def test_linha_parcial_do_catalogo_e_descartada(self):
+        build = self.store.new_build()
+        build.append_catalogo([{'id': 1, 'nome': 'A'}, {'id': 2, 'nome': 'B'}])
+        with open(build.catalogo_parcial_path, 'ab') as f:
+            f.write(b'{"id": 3, "no')
+
+        self.assertEqual([p['id'] for p in build.iter_catalogo()], [1, 2])
+        self.assertFalse(build.has_catalogo())
+
+
+class PopularEmbeddingsResumeTests(IndiceTemporarioMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(1, 6):
+            Produto.objects.create(
+                nome=f'Produto {i}', categoria='Calçados', preco=Decimal('100.00'), estoque=i,
+            )
+        self.textos = []
+
+    def popular(self, falhar=(), interromper=None, **options):
+        """popular_embeddings com o Bedrock substituído; devolve a saída"""
+        def embed(_, texto, deadline=None):
+            self.textos.append(texto)
+            if interromper and interromper in texto:
+                raise KeyboardInterrupt
+            if any(nome in texto for nome in falhar):
+                raise RuntimeError('bedrock fora')
+            return vetor(texto)
+
+        saida = io.StringIO()
+        with mock.patch.object(Embeddings, 'embed', embed), \
+                mock.patch('meu_app_rag.management.commands.popular_embeddings.BEDROCK_EMBEDDING_MODEL', 'fake'):
+            call_command('popular_embeddings', chunk_size=2, stdout=saida, stderr=io.StringIO(), **options)
+        return saida.getvalue()
+
+    def test_falha_sai_com_erro_e_resume_gera_so_os_pendentes(self):
+        with self.assertRaises(CommandError):
+            self.popular(falhar=['produto 4'])
+
+        self.assertIsNone(self.store.current_version())
+        self.assertEqual(len(self.store.resumable_builds()), 1)
+
+        self.textos.clear()
+        self.popular(resume=True)
+
+        self.assertEqual(len(self.textos), 1)
+        self.assertIn('produto 4', self.textos[0])
+        snapshot = self.store.load()
+        self.assertEqual(sorted(snapshot.product_ids), sorted(Produto.objects.values_list('id', flat=True)))
+
+    def test_resume_apos_interrupcao(self):
+        with self.assertRaises(KeyboardInterrupt):
+            self.popular(interromper='produto 4')
+
+        # Blocos de 2: produtos 1-2 no checkpoint, o 3 salvo no bloco parcial
+        build = self.store.open_build(self.store.resumable_builds()[-1])
+        self.assertEqual(len(build.embedded_ids()), 3)
+
+        self.textos.clear()
+        self.popular(resume=True)
+
+        self.assertEqual(len(self.textos), 2)
+        self.assertEqual(len(self.store.load().product_ids), 5)
+
+    def test_allow_partial_publica_sem_os_que_falharam(self):
+        self.popular(falhar=['produto 2'], allow_partial=True)
+        self.assertEqual(len(self.store.load().product_ids), 4)
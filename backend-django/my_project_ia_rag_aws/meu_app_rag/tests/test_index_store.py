@@ -0,0 +1,127 @@
+import json
+import os
+from unittest import mock
+import numpy as np
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag import vector_store
+from meu_app_rag.rag.index_store import MANIFEST_FILE, VECTORS_FILE
+from meu_app_rag.rag.vector_store import InMemoryVectorStore
+from meu_app_rag.tests.utils import IndiceTemporarioMixin, produto_catalogo, publicar, vetor
+
+
+class IndexStoreTests(IndiceTemporarioMixin, SimpleTestCase):
+
+    def publicar(self, *nomes, activate=True):
+        produtos = [produto_catalogo(i, nome) for i, nome in enumerate(nomes, 1)]
+        return publicar(self.store, produtos, [vetor(nome) for nome in nomes], activate=activate)
+
+    def test_publish_ativa_e_grava_manifest(self):
+        versao = self.publicar('Tênis', 'Bota')
+
+        self.assertEqual(self.store.current_version(), versao)
+        snapshot = self.store.load()
+        self.assertEqual(snapshot.product_ids, [1, 2])
+        np.testing.assert_array_equal(snapshot.product_vectors[1], vetor('Bota'))
+        self.assertEqual(snapshot.catalogo[1]['nome'], 'Tênis')
+        self.assertEqual(snapshot.manifest['product_count'], 2)
+        self.assertEqual(snapshot.manifest['model_id'], 'fake')
+
+    def test_activate_troca_current(self):
+        v1 = self.publicar('Tênis')
+        v2 = self.publicar('Bota', activate=False)
+        self.assertEqual(self.store.current_version(), v1)
+
+        self.store.activate(v2)
+        self.assertEqual(self.store.current_version(), v2)
+        self.assertEqual(self.store.load().catalogo[1]['nome'], 'Bota')
+
+        with self.assertRaises(ImproperlyConfigured):
+            self.store.activate('inexistente')
+        self.assertEqual(self.store.current_version(), v2)
+
+    def test_checksum_invalido_e_rejeitado(self):
+        versao = self.publicar('Tênis', 'Bota')
+        with open(os.path.join(self.store.version_path(versao), VECTORS_FILE), 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b'\x7f')
+
+        with self.assertRaisesRegex(ImproperlyConfigured, 'Checksum'):
+            self.store.load()
+
+    def test_manifest_corrompido_e_rejeitado(self):
+        versao = self.publicar('Tênis')
+        caminho = os.path.join(self.store.version_path(versao), MANIFEST_FILE)
+
+        with open(caminho, 'w') as f:
+            f.write('{"version": ')
+        with self.assertRaisesRegex(ImproperlyConfigured, 'Manifest inválido'):
+            self.store.load()
+
+        with open(caminho, 'w') as f:
+            json.dump({'version': versao}, f)
+        with self.assertRaisesRegex(ImproperlyConfigured, 'Manifest incompleto'):
+            self.store.load()
+
+    def test_product_count_divergente_e_rejeitado(self):
+        versao = self.publicar('Tênis')
+        caminho = os.path.join(self.store.version_path(versao), MANIFEST_FILE)
+        manifest = self.store.read_manifest(versao)
+        manifest['product_count'] = 5
+        with open(caminho, 'w') as f:
+            json.dump(manifest, f)
+
+        with self.assertRaisesRegex(ImproperlyConfigured, 'inconsistente'):
+            self.store.load()
+
+    def test_gc_mantem_a_versao_ativa(self):
+        abandonado = self.store.new_build()
+        versoes = [self.publicar(f'Produto {i}', activate=False) for i in range(4)]
+        self.store.activate(versoes[0])
+        # Build iniciado depois da última publicação pode estar em andamento
+        em_andamento = self.store.new_build()
+
+        removidas = self.store.gc(keep=2)
+
+        self.assertEqual(self.store.list_versions(), [versoes[0], *versoes[2:]])
+        self.assertEqual(set(removidas), {versoes[1], abandonado.version})
+        self.assertTrue(os.path.isdir(em_andamento.path))
+        self.assertEqual(self.store.load().version, versoes[0])
+
+
+class InMemoryRefreshTests(IndiceTemporarioMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.v1 = publicar(self.store, [produto_catalogo(1, 'Tênis')], [vetor('Tênis')])
+        self.vector_store = InMemoryVectorStore(self.store)
+
+    def test_troca_para_versao_ativada(self):
+        v2 = publicar(self.store, [produto_catalogo(2, 'Bota')], [vetor('Bota')])
+
+        # Dentro do intervalo de verificação nada muda
+        self.assertEqual(self.vector_store.version, self.v1)
+        with mock.patch.object(vector_store, 'RAG_INDEX_RELOAD_INTERVAL', 0):
+            resultados = self.vector_store.search(vetor('Bota'), limit=1)
+
+        self.assertEqual(self.vector_store.version, v2)
+        self.assertEqual([p['id'] for p in resultados], [2])
+        self.assertEqual(self.vector_store.suggest('bo'), self.vector_store.suggest('Bo'))
+        self.assertFalse(self.vector_store.refresh(force=True))
+
+    def test_versao_corrompida_mantem_a_atual(self):
+        v2 = publicar(self.store, [produto_catalogo(2, 'Bota')], [vetor('Bota')])
+        with open(os.path.join(self.store.version_path(v2), MANIFEST_FILE), 'w') as f:
+            f.write('corrompido')
+
+        with mock.patch('builtins.print'):
+            self.assertFalse(self.vector_store.refresh(force=True))
+        self.assertEqual(self.vector_store.version, self.v1)
+        self.assertEqual(self.vector_store.get(1)['nome'], 'Tênis')
+
+    def test_versao_fixa_nao_acompanha_current(self):
+        fixa = InMemoryVectorStore(self.store, version=self.v1)
+        publicar(self.store, [produto_catalogo(2, 'Bota')], [vetor('Bota')])
+        self.assertFalse(fixa.refresh(force=True))
+        self.assertEqual(fixa.version, self.v1)
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag import metrics
+from meu_app_rag.rag.router import routing_report
+
+
+class CounterTests(SimpleTestCase):
+
+    def test_contadores_por_prefixo(self):
+        metrics.increment('teste_contador.a')
+        metrics.increment('teste_contador.a')
+        metrics.increment('teste_contador.b', 3)
+        self.assertEqual(metrics.counts('teste_contador.'), {'a': 2, 'b': 3})
+
+    def test_contador_nao_entra_nas_latencias(self):
+        metrics.observe('teste_latencia.x', 0.2)
+        metrics.increment('teste_latencia.y')
+        self.assertEqual(list(metrics.report('teste_latencia.')), ['x'])
+        self.assertEqual(metrics.report('teste_latencia.')['x']['p50_ms'], 200.0)
+
+    def test_motivos_de_rota_no_relatorio(self):
+        antes = routing_report()['motivos_llm'].get('teste_motivo', 0)
+        metrics.increment('rota_motivo.teste_motivo')
+        relatorio = routing_report()
+        self.assertEqual(relatorio['motivos_llm']['teste_motivo'], antes + 1)
+        self.assertNotIn('teste_motivo', relatorio['latencias'])
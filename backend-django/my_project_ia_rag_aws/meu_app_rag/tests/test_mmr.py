@@ -0,0 +1,31 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag.mmr import mmr_select
+
+
+class MmrSelectTests(SimpleTestCase):
+
+    def setUp(self):
+        # 0 e 1 quase idênticos; 2 em outra direção, um pouco menos relevante
+        self.vetores = np.array([[1.0, 0.0], [0.99, 0.05], [0.0, 1.0], [0.7, 0.7]], dtype=np.float32)
+        self.relevancia = [0.95, 0.94, 0.80, 0.60]
+
+    def test_lambda_um_segue_a_relevancia(self):
+        self.assertEqual(mmr_select(self.vetores, self.relevancia, 4, 1.0), [0, 1, 2, 3])
+
+    def test_diversifica_quase_duplicados(self):
+        self.assertEqual(mmr_select(self.vetores, self.relevancia, 2, 0.5), [0, 2])
+
+    def test_primeiro_e_sempre_o_mais_relevante(self):
+        self.assertEqual(mmr_select(self.vetores, self.relevancia, 1, 0.0), [0])
+
+    def test_k_maior_que_candidatos_e_vazio(self):
+        selecionados = mmr_select(self.vetores, self.relevancia, 10, 0.5)
+        self.assertEqual(sorted(selecionados), [0, 1, 2, 3])
+        self.assertEqual(mmr_select(np.empty((0, 2)), [], 3, 0.5), [])
+        self.assertEqual(mmr_select(self.vetores, self.relevancia, 0, 0.5), [])
+
+    def test_vetor_nulo_nao_gera_nan(self):
+        vetores = np.array([[1.0, 0.0], [0.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+        self.assertEqual(sorted(mmr_select(vetores, [0.9, 0.8, 0.7], 3, 0.5)), [0, 1, 2])
@@ -0,0 +1,87 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+import numpy as np
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from config.settings_rag import RAG_EMBEDDING_DIMS
+from meu_app_rag.models import Produto, ProdutoEmbedding
+from meu_app_rag.rag import vector_store
+from meu_app_rag.rag.vector_store import PgVectorStore, parse_extversion
+
+
+class ExtversionTests(SimpleTestCase):
+
+    def test_parse(self):
+        self.assertEqual(parse_extversion('0.8.0'), (0, 8, 0))
+        self.assertEqual(parse_extversion('0.7.4'), (0, 7, 4))
+        self.assertEqual(parse_extversion('0.8.0-dev'), (0, 8))
+        self.assertEqual(parse_extversion(None), ())
+        self.assertLess(parse_extversion('0.7.4'), vector_store.ITERATIVE_SCAN_MIN_VERSION)
+        self.assertGreaterEqual(parse_extversion('0.10.1'), vector_store.ITERATIVE_SCAN_MIN_VERSION)
+
+
+def unitario(*coords):
+    """Vetor de RAG_EMBEDDING_DIMS dimensões com as primeiras coordenadas dadas"""
+    v = np.zeros(RAG_EMBEDDING_DIMS, dtype=np.float32)
+    v[:len(coords)] = coords
+    return v / np.linalg.norm(v)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'requer PostgreSQL com pgvector (POSTGRES_DB)')
+class PgVectorStoreTests(TestCase):
+    """
+    Roda contra o PostgreSQL do docker-compose.dev.yml (perfil pgvector):
+    POSTGRES_DB=rag POSTGRES_USER=rag POSTGRES_PASSWORD=rag python manage.py test meu_app_rag
+    """
+
+    def setUp(self):
+        def criar(nome, categoria, estoque):
+            return Produto.objects.create(nome=nome, categoria=categoria, preco=Decimal('100'), estoque=estoque)
+
+        self.tenis = criar('Tênis', 'Calçados', 5)
+        self.bota = criar('Bota', 'Calçados', 0)
+        self.bone = criar('Boné', 'Acessórios', 2)
+        self.snapshot = SimpleNamespace(
+            version='v1',
+            product_ids=[self.tenis.pk, self.bota.pk, self.bone.pk, 999999],
+            product_vectors=np.stack([unitario(1, 0), unitario(1, 0.3), unitario(0, 1), unitario(1, 1)]),
+        )
+        self.store = PgVectorStore()
+
+    def test_sync_ignora_produtos_inexistentes_e_troca_versao(self):
+        self.assertEqual(self.store.sync(self.snapshot), 3)
+        self.assertEqual(self.store.version, 'v1')
+
+        self.snapshot.version = 'v2'
+        self.snapshot.product_ids = [self.tenis.pk]
+        self.snapshot.product_vectors = self.snapshot.product_vectors[:1]
+        self.assertEqual(self.store.sync(self.snapshot), 1)
+        self.assertEqual(list(ProdutoEmbedding.objects.values_list('versao', flat=True)), ['v2'])
+
+    def test_busca_ordenada_e_filtrada(self):
+        self.store.sync(self.snapshot)
+
+        resultados = self.store.search(unitario(1, 0), limit=3)
+        self.assertEqual([p['id'] for p in resultados], [self.tenis.pk, self.bota.pk, self.bone.pk])
+        self.assertAlmostEqual(resultados[0]['score'], 1.0, places=5)
+
+        filtrados = self.store.search(unitario(1, 0), limit=3, filtros={'categoria': 'calcados', 'em_estoque': True})
+        self.assertEqual([p['id'] for p in filtrados], [self.tenis.pk])
+
+        resultados, vetores = self.store.search(unitario(0, 1), limit=2, with_vectors=True)
+        self.assertEqual(vetores.shape, (2, RAG_EMBEDDING_DIMS))
+        self.assertEqual(resultados[0]['id'], self.bone.pk)
+
+    def test_iterative_scan_conforme_versao_da_extensao(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            versao = cursor.fetchone()[0]
+        suportado = parse_extversion(versao) >= vector_store.ITERATIVE_SCAN_MIN_VERSION
+
+        with mock.patch.object(vector_store, 'RAG_PGVECTOR_ITERATIVE_SCAN', 'relaxed_order'):
+            store = PgVectorStore()
+            self.assertEqual(store.iterative_scan(), 'relaxed_order' if suportado else '')
+            store.sync(self.snapshot)
+            self.assertEqual(len(store.search(unitario(1, 0), limit=2, filtros={'em_estoque': True})), 2)
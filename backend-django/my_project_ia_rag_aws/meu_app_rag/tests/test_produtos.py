@@ -0,0 +1,132 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from config.settings_rag import PRODUTOS_CACHE_ALIAS
+from meu_app_rag.models import Produto
+from meu_app_rag.serializers import ProdutoListSerializer
+
+
+def criar_produto(nome, **campos):
+    dados = {'categoria': 'Calçados', 'preco': Decimal('199.90'), 'estoque': 3}
+    dados.update(campos)
+    return Produto.objects.create(nome=nome, **dados)
+
+
+class ProdutoListagemTests(APITestCase):
+
+    def setUp(self):
+        caches[PRODUTOS_CACHE_ALIAS].clear()
+        self.url = reverse('produto-list')
+
+    def percorrer(self, params):
+        """Segue os cursores da listagem; devolve os ids na ordem recebida"""
+        ids, url = [], self.url
+        while url:
+            response = self.client.get(url, params if url == self.url else None)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(p['id'] for p in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_cursor_percorre_em_ordem_sem_repetir(self):
+        agora = timezone.now()
+        produtos = [criar_produto(f'Tênis {i}') for i in range(7)]
+        # Dois produtos com a mesma data_cadastro: o id desempata
+        datas = [agora - timedelta(minutes=m) for m in (5, 1, 3, 3, 9, 0, 7)]
+        for produto, data in zip(produtos, datas):
+            Produto.objects.filter(pk=produto.pk).update(data_cadastro=data)
+
+        esperado = [p.pk for data, p in sorted(zip(datas, produtos), key=lambda dp: (-dp[0].timestamp(), dp[1].pk))]
+        self.assertEqual(self.percorrer({'page_size': 2}), esperado)
+
+    def test_insercao_durante_a_navegacao_nao_desloca_paginas(self):
+        for i in range(4):
+            criar_produto(f'Bota {i}')
+        primeira = self.client.get(self.url, {'page_size': 2}).data
+        vistos = [p['id'] for p in primeira['results']]
+
+        # Produto novo entra no topo (data_cadastro mais recente) e não
+        # aparece nem repete itens nas páginas seguintes
+        novo = criar_produto('Bota nova')
+        segunda = self.client.get(primeira['next']).data
+        seguintes = [p['id'] for p in segunda['results']]
+
+        self.assertNotIn(novo.pk, seguintes)
+        self.assertFalse(set(vistos) & set(seguintes))
+        self.assertEqual(len(seguintes), 2)
+
+    def test_page_size_limitado(self):
+        for i in range(3):
+            criar_produto(f'Sandália {i}')
+        response = self.client.get(self.url, {'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertNotIn('count', response.data)
+
+    def test_saida_enxuta_igual_ao_serializer(self):
+        criar_produto(
+            'Tênis Corrida', marca='Nike', preco=Decimal('349.9'),
+            preco_promocional=Decimal('299'), avaliacao=Decimal('4.5'),
+        )
+        criar_produto('Chinelo', preco=Decimal('29.90'))
+
+        response = self.client.get(self.url)
+        esperado = {p.pk: ProdutoListSerializer(p).data for p in Produto.objects.all()}
+
+        for item in response.data['results']:
+            self.assertEqual(item, dict(esperado[item['id']]))
+        tenis = next(p for p in response.data['results'] if p['nome'] == 'Tênis Corrida')
+        self.assertEqual(tenis['preco'], '349.90')
+        self.assertEqual(tenis['preco_promocional'], '299.00')
+        self.assertEqual(tenis['avaliacao'], '4.50')
+        self.assertEqual(list(tenis), ProdutoListSerializer.Meta.fields)
+
+    def test_lean_com_valores_nulos(self):
+        row = {campo: None for campo in ProdutoListSerializer.Meta.fields}
+        row.update(id=1, nome='Boné', categoria='Acessórios', preco=Decimal('50'), estoque=0)
+        dados = ProdutoListSerializer.lean(row)
+        self.assertEqual(dados['preco'], '50.00')
+        self.assertIsNone(dados['preco_promocional'])
+        self.assertIsNone(dados['avaliacao'])
+
+
+class ProdutoFiltroTests(APITestCase):
+
+    def setUp(self):
+        caches[PRODUTOS_CACHE_ALIAS].clear()
+        self.url = reverse('produto-list')
+        self.tenis = criar_produto('Tênis', categoria='Calçados', marca='Nike', preco=Decimal('300'),
+                                   preco_promocional=Decimal('250'), avaliacao=Decimal('4.8'))
+        self.bota = criar_produto('Bota', categoria='CALCADOS', preco=Decimal('500'), estoque=0)
+        self.bone = criar_produto('Boné', categoria='Acessórios', preco=Decimal('80'))
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return {p['id'] for p in response.data['results']}
+
+    def test_filtros_validos(self):
+        self.assertEqual(self.ids(categoria='calçados'), {self.tenis.pk, self.bota.pk})
+        self.assertEqual(self.ids(categoria='Calcados', em_estoque='sim'), {self.tenis.pk})
+        self.assertEqual(self.ids(em_estoque='false'), {self.bota.pk})
+        self.assertEqual(self.ids(preco_min='100', preco_max='400'), {self.tenis.pk})
+        self.assertEqual(self.ids(em_promocao='true', marca='NIKE'), {self.tenis.pk})
+        self.assertEqual(self.ids(avaliacao_min='4.5'), {self.tenis.pk})
+        self.assertEqual(self.ids(preco_min=''), {self.tenis.pk, self.bota.pk, self.bone.pk})
+
+    def test_valores_invalidos_respondem_400(self):
+        invalidos = {
+            'preco_min': 'barato',
+            'preco_max': '1,5x',
+            'avaliacao_min': 'cinco',
+            'em_estoque': 'talvez',
+            'em_promocao': '2',
+        }
+        for nome, valor in invalidos.items():
+            with self.subTest(nome=nome):
+                response = self.client.get(self.url, {nome: valor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(nome, response.data)
@@ -0,0 +1,123 @@
+from unittest import mock
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from meu_app_rag.rag import metrics
+from meu_app_rag.rag.resilience import BedrockUnavailable
+
+PRODUTOS = [{'id': 1, 'nome': 'Tênis Runner', 'categoria': 'Calçados', 'preco': 299.9, 'score': 0.91}]
+
+
+class RAGQueryRotaTests(APITestCase):
+
+    def setUp(self):
+        retriever = mock.Mock()
+        retriever.retrieve.return_value = PRODUTOS
+        retriever.project.side_effect = lambda produtos, campos: produtos
+
+        self.generator = mock.Mock()
+        augmenter = mock.Mock()
+        augmenter.augment.return_value = 'contexto'
+        augmenter.summarize.return_value = 'Resumo dos produtos encontrados'
+
+        for alvo, valor in (
+            ('meu_app_rag.rag.retriever.get_retriever', mock.Mock(return_value=retriever)),
+            ('meu_app_rag.rag.generator.ResponseGenerator', mock.Mock(return_value=self.generator)),
+            ('meu_app_rag.rag.augmenter.ContextAugmenter', mock.Mock(return_value=augmenter)),
+            ('meu_app_rag.views.RAG_ROUTER_ENABLED', False),
+        ):
+            patcher = mock.patch(alvo, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def consultar(self, query):
+        response = self.client.post(reverse('rag-query'), {'query': query}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_llm_indisponivel_responde_rota_degradada(self):
+        self.generator.generate.side_effect = BedrockUnavailable('Bedrock fora')
+        antes = metrics.get_counter('resposta.degradada').total
+
+        dados = self.consultar('tênis para corrida leve')
+
+        self.assertEqual(
+            (dados['rota'], dados['modelo'], dados['degradado']), ('degradado', None, True)
+        )
+        self.assertEqual(dados['resposta'], 'Resumo dos produtos encontrados')
+        self.assertEqual(metrics.get_counter('resposta.degradada').total, antes + 1)
+        metricas = self.client.get(reverse('rag-metrics')).data
+        self.assertEqual(metricas['respostas_degradadas'], antes + 1)
+
+    def test_resposta_do_llm_informa_o_modelo(self):
+        self.generator.generate.return_value = 'Recomendo o Tênis Runner'
+
+        dados = self.consultar('tênis para corrida na chuva')
+
+        self.assertEqual((dados['rota'], dados['degradado']), ('llm', False))
+        self.assertEqual(dados['modelo'], self.generator.generate.call_args.kwargs['tier'])
+
+
+    def test_nivel_escolhido_pela_consulta(self):
+        self.generator.generate.return_value = 'Resposta'
+
+        self.assertEqual(self.consultar('preço do tênis runner')['modelo'], 'rapido')
+        self.assertEqual(self.consultar('tênis runner ou bota trilha, qual é melhor?')['modelo'], 'forte')
+
+    def test_modelo_e_max_tokens_informados(self):
+        self.generator.generate.return_value = 'Resposta'
+
+        response = self.client.post(
+            reverse('rag-query'),
+            {'query': 'preço do tênis runner', 'modelo': 'forte', 'max_tokens': 120},
+            format='json'
+        )
+
+        self.assertEqual(response.data['modelo'], 'forte')
+        chamada = self.generator.generate.call_args.kwargs
+        self.assertEqual((chamada['tier'], chamada['max_tokens']), ('forte', 120))
+
+    def test_modelo_ou_max_tokens_invalidos_respondem_400(self):
+        for dados in ({'modelo': 'turbo'}, {'max_tokens': 10}, {'max_tokens': 100000}):
+            with self.subTest(dados=dados):
+                response = self.client.post(
+                    reverse('rag-query'), {'query': 'preço do tênis runner', **dados}, format='json'
+                )
+                self.assertEqual(response.status_code, 400)
+        self.generator.generate.assert_not_called()
+
+class RAGSearchTests(APITestCase):
+
+    def setUp(self):
+        self.retriever = mock.Mock()
+        self.retriever.retrieve.return_value = PRODUTOS
+        self.retriever.project.side_effect = lambda produtos, campos: produtos
+        patcher = mock.patch(
+            'meu_app_rag.rag.retriever.get_retriever', mock.Mock(return_value=self.retriever)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def buscar(self, **params):
+        return self.client.get(reverse('rag-search'), params)
+
+    def test_limit_repassado_ao_retriever(self):
+        response = self.buscar(q='tênis leve', limit=3, categoria='Calçados')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['total'], 1)
+        chamada = self.retriever.retrieve.call_args
+        self.assertEqual(chamada.kwargs['limit'], 3)
+        self.assertEqual(chamada.kwargs['filtros'], {'categoria': 'Calçados'})
+
+    def test_limit_padrao(self):
+        self.assertEqual(self.buscar(q='tênis leve').status_code, 200)
+        self.assertEqual(self.retriever.retrieve.call_args.kwargs['limit'], 5)
+
+    def test_parametros_invalidos_respondem_400(self):
+        for params in ({'q': 'tênis', 'limit': 'abc'}, {'q': 'tênis', 'limit': 100000},
+                       {'q': 'tênis', 'limit': 0}, {'q': ''}, {}):
+            with self.subTest(params=params):
+                response = self.buscar(**params)
+                self.assertEqual(response.status_code, 400)
+        self.retriever.retrieve.assert_not_called()
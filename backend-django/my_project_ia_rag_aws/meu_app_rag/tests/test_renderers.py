@@ -0,0 +1,195 @@
+import datetime
+import pickle
+import threading
+import uuid
+from decimal import Decimal
+from unittest import mock
+import numpy as np
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from config.settings_rag import RAG_RESULT_FIELD_PROFILES
+from meu_app_rag.renderers import ORJSONRenderer
+from meu_app_rag.rag.coalescing import SingleFlight
+from meu_app_rag.rag.fragments import ScoredProduct, product_fragment
+from meu_app_rag.rag.vector_store import InMemoryVectorStore
+from meu_app_rag.serializers import BuscaVetorialSerializer
+from meu_app_rag.tests.utils import IndiceTemporarioMixin, produto_catalogo, publicar, vetor
+
+UTC = datetime.timezone.utc
+
+
+def catalogo():
+    return [
+        produto_catalogo(1, 'Tênis Runner', marca='Veloz', preco=299.9, preco_promocional=249.9,
+                         avaliacao=4.7, num_avaliacoes=120, descricao='Leve – “respirável” ideal'),
+        produto_catalogo(2, 'Camiseta Dry', categoria='Roupas', preco=79.0, estoque=0),
+        produto_catalogo(3, 'Boné Sol', categoria='Acessórios', preco=49.5, cor='Azul'),
+    ]
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def assertMesmoJSON(self, dados):
+        self.assertEqual(ORJSONRenderer().render(dados), JSONRenderer().render(dados))
+
+    def test_bytes_iguais_ao_jsonrenderer_do_drf(self):
+        casos = {
+            'decimal': {'preco': Decimal('299.90'), 'precos': [Decimal('1.5'), Decimal('0')]},
+            'datetime_utc': {'criado': datetime.datetime(2024, 1, 2, 3, 4, 5, 120000, tzinfo=UTC)},
+            'datetime_local': {
+                'criado': datetime.datetime(2024, 1, 2, 3, 4, 5,
+                                            tzinfo=datetime.timezone(datetime.timedelta(hours=-3))),
+                'ingenuo': datetime.datetime(2024, 1, 2, 3, 4, 5, 123456),
+            },
+            'date_time_timedelta': {
+                'dia': datetime.date(2024, 1, 2), 'hora': datetime.time(3, 4, 5),
+                'duracao': datetime.timedelta(seconds=90),
+            },
+            'uuid_lazy': {'id': uuid.UUID(int=5), 'erro': gettext_lazy('Campo obrigatório')},
+            'unicode': {'texto': 'Tênis – “leve”  '},
+            'aninhado': [{'chaves': {1: 2}, 'tupla': (1, 2)}, None, True],
+        }
+        for nome, dados in casos.items():
+            with self.subTest(nome):
+                self.assertMesmoJSON(dados)
+
+    def test_tipos_do_numpy(self):
+        dados = {'score': np.float32(0.5), 'total': np.int64(3), 'vetor': np.arange(3)}
+        self.assertEqual(ORJSONRenderer().render(dados), b'{"score":0.5,"total":3,"vetor":[0,1,2]}')
+
+    def test_resultados_emendados_dos_fragmentos(self):
+        produtos = catalogo()
+        resultados = [
+            ScoredProduct(p, product_fragment(p), score=0.9 - i / 10, score_rerank=1.0)
+            for i, p in enumerate(produtos)
+        ]
+        dados = {'query': 'tênis', 'total': 3, 'produtos': resultados}
+
+        esperado = JSONRenderer().render({**dados, 'produtos': [dict(r) for r in resultados]})
+        self.assertEqual(ORJSONRenderer().render(dados), esperado)
+
+        # Projeção por perfil (fragmento pré-calculado) e lista avulsa (sem fragmento)
+        compacto = RAG_RESULT_FIELD_PROFILES['compacto']
+        for projetados in (
+            [r.project(compacto, product_fragment(r.produto, compacto)) for r in resultados],
+            [r.project(('id', 'nome', 'score'), None) for r in resultados],
+        ):
+            dados['produtos'] = projetados
+            esperado = JSONRenderer().render({**dados, 'produtos': [dict(r) for r in projetados]})
+            self.assertEqual(ORJSONRenderer().render(dados), esperado)
+
+
+class ScoredProductCacheTests(SimpleTestCase):
+
+    def test_pickle_preserva_campos_e_projecao(self):
+        produto = catalogo()[0]
+        original = ScoredProduct(produto, product_fragment(produto), score=0.8).project(
+            ('id', 'nome', 'score'), None
+        )
+
+        copia = pickle.loads(pickle.dumps(original))
+
+        self.assertEqual(dict(copia), {'id': 1, 'nome': 'Tênis Runner', 'score': 0.8})
+        self.assertEqual(copia.to_json(), original.to_json())
+
+    def test_resultado_compartilhado_entre_workers_pelo_cache(self):
+        caches['default'].clear()
+        produto = catalogo()[0]
+        resultados = [ScoredProduct(produto, product_fragment(produto), score=0.9, score_rerank=1.1)]
+        worker_a, worker_b = SingleFlight(cache_alias='default'), SingleFlight(cache_alias='default')
+        iniciou, liberar, saida = threading.Event(), threading.Event(), {}
+
+        def lider():
+            iniciou.set()
+            liberar.wait(5)
+            return resultados
+
+        thread = threading.Thread(target=lambda: saida.setdefault('a', worker_a.do('k', lider)))
+        thread.start()
+        self.assertTrue(iniciou.wait(5))
+        threading.Timer(0.1, liberar.set).start()
+
+        # O cache local em memória também faz pickle: o worker B recebe uma cópia
+        recebidos, coalescido = worker_b.do('k', lambda: [])
+        thread.join(5)
+
+        self.assertTrue(coalescido)
+        self.assertIsInstance(recebidos[0], ScoredProduct)
+        self.assertIsNot(recebidos[0].produto, produto)
+        self.assertEqual(dict(recebidos[0]), dict(resultados[0]))
+        self.assertEqual(
+            ORJSONRenderer().render({'produtos': recebidos}),
+            ORJSONRenderer().render({'produtos': resultados})
+        )
+
+
+class CamposResultadoTests(IndiceTemporarioMixin, APITestCase):
+    """fields= em /rag/search/, com o índice em memória de verdade"""
+
+    def setUp(self):
+        super().setUp()
+        produtos = catalogo()
+        publicar(self.store, produtos, np.stack([vetor(p['nome']) for p in produtos]))
+        self.vector_store = InMemoryVectorStore(self.store)
+
+        retriever = mock.Mock()
+        retriever.retrieve.side_effect = lambda query, limit, **kwargs: self.vector_store.search(
+            vetor(query), limit=limit
+        )
+        retriever.project.side_effect = self.vector_store.project
+        patcher = mock.patch(
+            'meu_app_rag.rag.retriever.get_retriever', mock.Mock(return_value=retriever)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def buscar(self, **params):
+        return self.client.get(reverse('rag-search'), {'q': 'Tênis Runner', **params})
+
+    def test_validacao_de_fields(self):
+        casos = {
+            'compacto': RAG_RESULT_FIELD_PROFILES['compacto'],
+            'completo': None,
+            'nome, score,nome': ('id', 'nome', 'score'),
+            'id,preco': ('id', 'preco'),
+        }
+        for valor, esperado in casos.items():
+            with self.subTest(fields=valor):
+                serializer = BuscaVetorialSerializer(data={'q': 'x', 'fields': valor})
+                self.assertTrue(serializer.is_valid(), serializer.errors)
+                self.assertEqual(serializer.campos, esperado)
+
+        for valor in ('nome,senha', '', ' , '):
+            with self.subTest(fields=valor):
+                serializer = BuscaVetorialSerializer(data={'q': 'x', 'fields': valor})
+                self.assertFalse(serializer.is_valid())
+                self.assertIn('fields', serializer.errors)
+
+    def test_perfil_padrao_e_completo(self):
+        compacto = self.buscar().json()['produtos']
+        self.assertEqual(len(compacto), 3)
+        for produto in compacto:
+            self.assertTrue(set(produto) <= set(RAG_RESULT_FIELD_PROFILES['compacto']))
+            self.assertIn('score', produto)
+
+        completo = self.buscar(fields='completo').json()['produtos']
+        self.assertIn('descricao', completo[0])
+
+    def test_lista_de_campos(self):
+        response = self.buscar(fields='nome,score', limit=1)
+
+        self.assertEqual(response.status_code, 200)
+        produto = response.json()['produtos'][0]
+        self.assertEqual(list(produto), ['id', 'nome', 'score'])
+        self.assertEqual(produto['nome'], 'Tênis Runner')
+
+    def test_campo_desconhecido_responde_400(self):
+        response = self.buscar(fields='nome,senha')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('senha', str(response.json()['fields']))
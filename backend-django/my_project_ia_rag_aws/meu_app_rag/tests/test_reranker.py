@@ -0,0 +1,62 @@
+import math
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag.fragments import ScoredProduct
+from meu_app_rag.rag.reranker import FeatureReranker
+
+PESOS = {'similaridade': 1.0, 'avaliacao': 0.10, 'popularidade': 0.05, 'desconto': 0.10}
+
+
+def candidato(id, score, **campos):
+    produto = {'id': id, 'score': score, 'preco': 100.0, 'preco_promocional': None,
+               'avaliacao': None, 'num_avaliacoes': 0, 'estoque': 5}
+    produto.update(campos)
+    return produto
+
+
+class FeatureRerankerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.reranker = FeatureReranker(weights=PESOS, out_of_stock_penalty=0.25)
+
+    def test_formula(self):
+        produto = candidato(1, 0.8, preco_promocional=80.0, avaliacao=4.0, num_avaliacoes=1000, estoque=0)
+        esperado = 0.8 + 0.10 * (4 / 5) + 0.05 * 1.0 + 0.10 * 0.2 - 0.25
+        self.assertAlmostEqual(self.reranker.score([produto])[0], esperado)
+
+        # Popularidade em escala logarítmica, saturando no limite
+        dez = candidato(2, 0.0, num_avaliacoes=10)
+        muitas = candidato(3, 0.0, num_avaliacoes=50000)
+        features, _ = self.reranker.features([dez, muitas])
+        self.assertAlmostEqual(features['popularidade'][0], math.log1p(10) / math.log1p(1000))
+        self.assertEqual(features['popularidade'][1], 1.0)
+
+    def test_promocao_invalida_nao_conta_como_desconto(self):
+        features, _ = self.reranker.features([
+            candidato(1, 0.5, preco_promocional=120.0),
+            candidato(2, 0.5, preco=0, preco_promocional=10.0),
+        ])
+        self.assertEqual(features['desconto'].tolist(), [0.0, 0.0])
+
+    def test_bem_avaliado_em_promocao_supera_o_mais_similar_e_sem_estoque_cai(self):
+        candidatos = [
+            candidato(1, 0.86, estoque=0, avaliacao=5.0, num_avaliacoes=500),
+            candidato(2, 0.85),
+            candidato(3, 0.83, avaliacao=4.8, num_avaliacoes=800, preco_promocional=70.0),
+        ]
+
+        ordenados = self.reranker.rerank(candidatos)
+
+        self.assertEqual([p['id'] for p in ordenados], [3, 2, 1])
+        # "score" continua sendo a similaridade; o combinado vai em score_rerank
+        self.assertEqual(ordenados[0]['score'], 0.83)
+        self.assertGreater(ordenados[0]['score_rerank'], ordenados[1]['score_rerank'])
+
+    def test_limit_empates_e_vazio(self):
+        candidatos = [candidato(i, 0.7) for i in range(4)]
+        self.assertEqual([p['id'] for p in self.reranker.rerank(candidatos, limit=2)], [0, 1])
+        self.assertEqual(self.reranker.rerank([]), [])
+
+    def test_aceita_resultados_do_indice(self):
+        produto = ScoredProduct(candidato(1, 0.9), score=0.9)
+        self.assertEqual(self.reranker.rerank([produto])[0]['id'], 1)
@@ -0,0 +1,190 @@
+import time
+from unittest import mock
+from botocore.exceptions import ClientError
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag import bedrock_client
+from meu_app_rag.rag.resilience import (
+    BedrockUnavailable,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    is_backend_failure,
+    run_with_deadline,
+)
+
+
+def client_error(status: int, codigo: str = 'ValidationException') -> ClientError:
+    return ClientError(
+        {'Error': {'Code': codigo, 'Message': 'erro'}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+        'InvokeModel',
+    )
+
+
+def encapsulado(erro: Exception) -> ValueError:
+    """Como o ChatBedrock: ValueError lançado dentro do except do ClientError"""
+    try:
+        raise erro
+    except Exception as e:
+        try:
+            raise ValueError(f'Error raised by bedrock service: {e}')
+        except ValueError as v:
+            return v
+
+
+class DeadlineTests(SimpleTestCase):
+
+    def test_remaining_diminui_e_nunca_fica_negativo(self):
+        with mock.patch('meu_app_rag.rag.resilience.time.monotonic', return_value=100.0):
+            deadline = Deadline(2.0)
+        with mock.patch('meu_app_rag.rag.resilience.time.monotonic', return_value=101.5):
+            self.assertAlmostEqual(deadline.remaining(), 0.5)
+            self.assertFalse(deadline.expired())
+            with self.assertRaises(DeadlineExceeded):
+                deadline.check('geração', minimo=1.0)
+        with mock.patch('meu_app_rag.rag.resilience.time.monotonic', return_value=105.0):
+            self.assertEqual(deadline.remaining(), 0.0)
+            self.assertTrue(deadline.expired())
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.agora = 1000.0
+        patcher = mock.patch('meu_app_rag.rag.resilience.time.monotonic', side_effect=lambda: self.agora)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('teste', failure_threshold=2, reset_timeout=10)
+
+    def abrir(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_abre_apos_falhas_seguidas(self):
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.estado, CircuitBreaker.FECHADO)
+
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.estado, CircuitBreaker.ABERTO)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_sucesso_zera_as_falhas(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.estado, CircuitBreaker.FECHADO)
+
+    def test_meio_aberto_libera_uma_chamada_de_teste(self):
+        self.abrir()
+        self.agora += 10
+
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.estado, CircuitBreaker.MEIO_ABERTO)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()  # Só um teste por vez
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.estado, CircuitBreaker.FECHADO)
+        self.breaker.before_call()
+
+    def test_falha_no_teste_reabre(self):
+        self.abrir()
+        self.agora += 10
+        self.breaker.before_call()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.estado, CircuitBreaker.ABERTO)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+
+class BackendFailureTests(SimpleTestCase):
+
+    def test_erros_do_cliente_nao_sao_falha(self):
+        self.assertFalse(is_backend_failure(client_error(400)))
+        self.assertTrue(is_backend_failure(client_error(429, 'ThrottlingException')))
+        self.assertTrue(is_backend_failure(client_error(503, 'ServiceUnavailableException')))
+        self.assertTrue(is_backend_failure(TimeoutError()))
+
+    def test_client_error_encapsulado_pelo_chatbedrock(self):
+        self.assertFalse(is_backend_failure(encapsulado(client_error(400))))
+        self.assertTrue(is_backend_failure(encapsulado(client_error(429, 'ThrottlingException'))))
+
+    def test_run_with_deadline_nao_abre_circuito_com_erro_do_cliente(self):
+        breaker = CircuitBreaker('teste', failure_threshold=1)
+
+        def invalido():
+            raise encapsulado(client_error(400))
+
+        with self.assertRaises(ValueError):
+            run_with_deadline(invalido, breaker=breaker)
+        self.assertEqual(breaker.estado, CircuitBreaker.FECHADO)
+
+        def fora():
+            raise encapsulado(client_error(503))
+
+        with self.assertRaises(ValueError):
+            run_with_deadline(fora, breaker=breaker)
+        self.assertEqual(breaker.estado, CircuitBreaker.ABERTO)
+
+    def test_prazo_esgotado_abandona_a_chamada(self):
+        breaker = CircuitBreaker('teste', failure_threshold=1)
+        inicio = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            run_with_deadline(lambda: time.sleep(1), deadline=Deadline(0.05), breaker=breaker)
+        self.assertLess(time.monotonic() - inicio, 0.5)
+        self.assertEqual(breaker.estado, CircuitBreaker.ABERTO)
+
+
+class ClientConfigTests(SimpleTestCase):
+
+    def test_requisicoes_limitadas_pelo_prazo(self):
+        with mock.patch.multiple(
+            bedrock_client, RAG_REQUEST_DEADLINE=12.0, BEDROCK_READ_TIMEOUT=30.0,
+            BEDROCK_CONNECT_TIMEOUT=3.0, BEDROCK_MAX_ATTEMPTS=3,
+        ):
+            requisicao = bedrock_client.build_config()
+            lote = bedrock_client.build_config(batch=True)
+
+        self.assertEqual(requisicao.read_timeout, 12.0)
+        self.assertEqual(requisicao.retries['total_max_attempts'], 1)
+        self.assertEqual(lote.read_timeout, 30.0)
+        self.assertEqual(lote.retries['total_max_attempts'], 3)
+
+    def test_tentativas_cabem_no_prazo(self):
+        with mock.patch.multiple(
+            bedrock_client, RAG_REQUEST_DEADLINE=20.0, BEDROCK_READ_TIMEOUT=5.0,
+            BEDROCK_CONNECT_TIMEOUT=1.0, BEDROCK_MAX_ATTEMPTS=5,
+        ):
+            config = bedrock_client.build_config()
+        # (5 s de leitura + 1 s de conexão) x 3 tentativas <= 20 s
+        self.assertEqual(config.retries['total_max_attempts'], 3)
+
+
+class GeneratorFailureTests(SimpleTestCase):
+
+    CONTEXTO = 'Produto 1\nID: 3\nNome: Tênis Corrida Pro Run'
+
+    def gerar(self, erro):
+        from meu_app_rag.rag.generator import ResponseGenerator
+
+        generator = ResponseGenerator()
+        modelo = mock.Mock()
+        modelo.invoke.side_effect = erro
+        generator.models = {tier: modelo for tier in generator.models}
+        generator.breakers = {tier: CircuitBreaker(tier) for tier in generator.breakers}
+        return generator.generate('qual o melhor tênis?', self.CONTEXTO, tier='forte')
+
+    def test_indisponibilidade_vira_bedrock_unavailable(self):
+        with self.assertRaises(BedrockUnavailable):
+            self.gerar(encapsulado(client_error(503, 'ServiceUnavailableException')))
+
+    def test_requisicao_invalida_nao_vira_resposta_degradada(self):
+        with self.assertRaises(RuntimeError) as ctx:
+            self.gerar(encapsulado(client_error(400)))
+        self.assertNotIsInstance(ctx.exception, BedrockUnavailable)
@@ -0,0 +1,46 @@
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag.retriever import ProductRetriever, relevance_cutoff
+
+
+class RelevanceCutoffTests(SimpleTestCase):
+
+    def test_threshold(self):
+        self.assertEqual(relevance_cutoff([0.9, 0.8, 0.5, 0.4], threshold=0.6, max_gap=0), 2)
+        self.assertEqual(relevance_cutoff([0.5, 0.4], threshold=0.6, max_gap=0), 0)
+        self.assertEqual(relevance_cutoff([0.6], threshold=0.6, max_gap=0.1), 1)
+        self.assertEqual(relevance_cutoff([], threshold=0.6, max_gap=0.1), 0)
+
+    def test_interrompe_no_primeiro_salto(self):
+        scores = [0.92, 0.90, 0.71, 0.70, 0.50]
+        self.assertEqual(relevance_cutoff(scores, threshold=0.3, max_gap=0.1), 2)
+        self.assertEqual(relevance_cutoff(scores, threshold=0.3, max_gap=0), 5)
+
+    def test_salto_abaixo_do_threshold_nao_conta(self):
+        # O salto 0.70 -> 0.20 fica fora do prefixo acima do threshold
+        self.assertEqual(relevance_cutoff([0.75, 0.70, 0.20], threshold=0.5, max_gap=0.1), 2)
+
+
+class RetrieveCutoffTests(SimpleTestCase):
+
+    def setUp(self):
+        self.store = mock.Mock()
+        self.store.search.return_value = [
+            {'id': i, 'nome': f'P{i}', 'score': s} for i, s in enumerate([0.9, 0.88, 0.6, 0.58])
+        ]
+        with mock.patch('meu_app_rag.rag.retriever.Embeddings'):
+            self.retriever = ProductRetriever(vector_store=self.store)
+        self.retriever.embedding.embed.return_value = np.zeros(4, dtype=np.float32)
+        self.retriever.reranker = None
+        self.retriever.threshold = 0.5
+        self.retriever.max_gap = 0.1
+
+    def test_retrieve_devolve_so_o_prefixo_relevante(self):
+        produtos = self.retriever.retrieve('tenis', limit=4)
+        self.assertEqual([p['id'] for p in produtos], [0, 1])
+
+    def test_retrieve_pode_nao_devolver_nada(self):
+        self.retriever.threshold = 0.95
+        self.assertEqual(self.retriever.retrieve('tenis', limit=4), [])
@@ -0,0 +1,82 @@
+from unittest import mock
+from django.test import SimpleTestCase
+
+from config.settings_rag import BEDROCK_DEFAULT_TIER, RAG_FAST_TIER_MAX_PRODUCTS, RAG_FAST_TIER_MAX_WORDS
+from meu_app_rag.rag import router
+from meu_app_rag.rag.router import QueryRouter, choose_tier
+
+RUNNER = {'id': 1, 'nome': 'Tênis Runner', 'marca': 'Veloz', 'categoria': 'Calçados', 'cor': 'Preto', 'score': 0.82}
+TRILHA = {'id': 2, 'nome': 'Bota Trilha X', 'marca': 'Serra', 'categoria': 'Calçados', 'cor': 'Marrom', 'score': 0.71}
+PRODUTOS = [RUNNER, TRILHA]
+
+
+class QueryRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = QueryRouter(min_score=0.4, max_words=12, name_match=0.6)
+
+    def assertRota(self, query, destino, motivo=None, produtos=PRODUTOS):
+        rota = self.router.route(query, produtos)
+        self.assertEqual((rota.destino, rota.motivo), (destino, motivo), query)
+        return rota
+
+    def test_pedidos_com_tem_ha_vende_vao_para_o_llm(self):
+        for query in ('tem tênis leve e confortável para corrida?', 'há algo para dor nas costas?',
+                      'vende tênis impermeável para trilha?', 'vocês têm bota?', 'possui tênis preto?'):
+            with self.subTest(query=query):
+                rota = self.router.route(query, PRODUTOS)
+                self.assertEqual(rota.destino, 'llm')
+                self.assertNotIn('estoque', rota.intencoes)
+
+    def test_estoque_so_com_palavras_de_estoque(self):
+        for query in ('tem o tênis runner em estoque?', 'tênis runner disponível?',
+                      'o tênis runner está esgotado?'):
+            with self.subTest(query=query):
+                rota = self.assertRota(query, 'template')
+                self.assertEqual(rota.intencoes, ('estoque',))
+                self.assertEqual(rota.produtos, [RUNNER])
+
+    def test_descricao_alem_dos_produtos_vai_para_o_llm(self):
+        for query in ('preço do tênis leve', 'tênis para corrida em estoque?',
+                      'quanto custa a bota com amortecimento?', 'tem desconto no tênis azul?'):
+            with self.subTest(query=query):
+                rota = self.assertRota(query, 'llm', 'descritiva')
+                self.assertTrue(rota.intencoes)
+
+    def test_template_cita_nome_marca_categoria_e_cor(self):
+        self.assertRota('qual o preço do tênis runner?', 'template')
+        self.assertRota('quanto custa a bota trilha x marrom?', 'template')
+        rota = self.assertRota('calçados da veloz em promoção?', 'template')
+        self.assertEqual((rota.intencoes, rota.produtos), (('promocao',), PRODUTOS))
+        rota = self.assertRota('preço e avaliação do tênis runner', 'template')
+        self.assertEqual(rota.intencoes, ('preco', 'avaliacao'))
+
+    def test_outros_motivos(self):
+        self.assertRota('preço do tênis runner', 'llm', 'sem_produtos', produtos=[])
+        self.assertRota('qual o melhor tênis runner?', 'llm', 'aberta')
+        self.assertRota('tênis runner', 'llm', 'sem_intencao')
+        self.assertRota(' '.join(['preço'] * 13), 'llm', 'longa')
+        self.assertRota('preço do tênis runner', 'llm', 'score_baixo', produtos=[{**RUNNER, 'score': 0.2}])
+
+
+class ChooseTierTests(SimpleTestCase):
+
+    def test_consulta_curta_e_simples_usa_o_rapido(self):
+        self.assertEqual(choose_tier('preço do tênis runner', [RUNNER]), 'rapido')
+        self.assertEqual(choose_tier('tênis leve para corrida', PRODUTOS), 'rapido')
+
+    def test_comparacao_consulta_longa_ou_muitos_produtos_usam_o_forte(self):
+        casos = (
+            ('tênis runner ou bota trilha?', [RUNNER]),
+            ('qual a diferença entre os dois?', PRODUTOS),
+            ('vale a pena o tênis runner?', [RUNNER]),
+            (' '.join(['tênis'] * (RAG_FAST_TIER_MAX_WORDS + 1)), [RUNNER]),
+            ('tênis leve', [RUNNER] * (RAG_FAST_TIER_MAX_PRODUCTS + 1)),
+        )
+        for query, produtos in casos:
+            with self.subTest(query=query, produtos=len(produtos)):
+                self.assertEqual(choose_tier(query, produtos), 'forte')
+
+    def test_sem_roteamento_usa_o_nivel_padrao(self):
+        with mock.patch.object(router, 'RAG_MODEL_ROUTING', False):
+            self.assertEqual(choose_tier('preço do tênis runner', [RUNNER]), BEDROCK_DEFAULT_TIER)
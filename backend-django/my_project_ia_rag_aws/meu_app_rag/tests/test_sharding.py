@@ -0,0 +1,150 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+
+from meu_app_rag.rag.resilience import DeadlineExceeded
+from meu_app_rag.rag.sharding import ShardIndex, filter_columns, filter_mask, shard_bounds
+from meu_app_rag.rag.vector_store import InMemoryVectorStore, ShardedVectorStore
+from meu_app_rag.tests.utils import IndiceTemporarioMixin, produto_catalogo, publicar, vetor
+
+CATEGORIAS = ('Calçados', 'Roupas', 'Acessórios')
+
+
+class ShardNaThread:
+    """LocalShard sem processo: a mesma ShardIndex, buscada numa thread"""
+
+    executor = ThreadPoolExecutor(max_workers=4)
+
+    def __init__(self, version_path, shard, shards):
+        self.shard = shard
+        self.index = ShardIndex(version_path, shard, shards)
+        self.ready = Future()
+        self.ready.set_result(len(self.index))
+
+    def submit(self, query_vector, k, filtros):
+        return self.executor.submit(self.index.search, query_vector, k, filtros)
+
+    def close(self):
+        pass
+
+
+class ShardTravado(ShardNaThread):
+    """Shard que nunca responde"""
+
+    def submit(self, query_vector, k, filtros):
+        return Future()
+
+
+class ShardingTests(IndiceTemporarioMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.produtos = [
+            produto_catalogo(
+                i, f'Produto {i}', categoria=CATEGORIAS[i % 3], preco=float(50 + 10 * i),
+                estoque=i % 4
+            )
+            for i in range(1, 24)
+        ]
+        vetores = np.stack([vetor(p['nome']) for p in self.produtos])
+        self.version = publicar(self.store, self.produtos, vetores)
+        self.path = self.store.version_path(self.version)
+
+    def sharded(self, shard_cls=ShardNaThread, shards=3, timeout=5):
+        with mock.patch('meu_app_rag.rag.vector_store.LocalShard', shard_cls):
+            return ShardedVectorStore(self.store, shards=shards, urls=[], timeout=timeout)
+
+    def assertMesmosResultados(self, obtidos, esperados):
+        # Mesma ordem de ids; scores iguais a menos do arredondamento float32
+        self.assertEqual([p['id'] for p in obtidos], [p['id'] for p in esperados])
+        np.testing.assert_allclose(
+            [p['score'] for p in obtidos], [p['score'] for p in esperados], atol=1e-5
+        )
+
+    def test_particoes_contiguas_cobrem_todas_as_linhas(self):
+        for n, shards in ((23, 3), (5, 4), (2, 3)):
+            limites = [shard_bounds(n, s, shards) for s in range(shards)]
+            self.assertEqual(limites[0][0], 0)
+            self.assertEqual(limites[-1][1], n)
+            for (_, fim), (inicio, _) in zip(limites, limites[1:]):
+                self.assertEqual(fim, inicio)
+
+        indices = [ShardIndex(self.path, s, 3) for s in range(3)]
+        self.assertEqual([len(i) for i in indices], [7, 8, 8])
+        self.assertEqual(
+            sorted(int(pid) for i in indices for pid in i.ids),
+            [p['id'] for p in self.produtos]
+        )
+
+    def test_filter_mask(self):
+        colunas = filter_columns(self.produtos[:6])  # ids 1..6
+        casos = {
+            (('categoria', 'calcados'),): [3, 6],
+            (('preco_min', 80.0), ('preco_max', 100.0)): [3, 4, 5],
+            (('em_estoque', True),): [1, 2, 3, 5, 6],
+            (('em_estoque', False),): [4],
+            (): [1, 2, 3, 4, 5, 6],
+        }
+        for filtros, esperados in casos.items():
+            with self.subTest(filtros=filtros):
+                mascara = filter_mask(colunas, dict(filtros))
+                self.assertEqual([p['id'] for p, ok in zip(self.produtos, mascara) if ok], esperados)
+
+    def test_mesmos_resultados_do_indice_em_memoria(self):
+        memoria = InMemoryVectorStore(self.store)
+        sharded = self.sharded()
+
+        for consulta, filtros in (
+            ('tênis', None),
+            ('camiseta', {'categoria': 'roupas'}),
+            ('relógio', {'preco_max': 150.0, 'em_estoque': True}),
+        ):
+            with self.subTest(consulta=consulta, filtros=filtros):
+                q = vetor(consulta)
+                esperado = memoria.search(q, limit=5, filtros=filtros)
+                obtido = sharded.search(q, limit=5, filtros=filtros)
+                self.assertMesmosResultados(obtido, esperado)
+
+        # Merge de todas as linhas dos shards
+        self.assertMesmosResultados(
+            sharded.search(vetor('tênis'), limit=23), memoria.search(vetor('tênis'), limit=23)
+        )
+
+    def test_with_vectors_alinhados_aos_resultados(self):
+        produtos, vetores = self.sharded().search(vetor('tênis'), limit=4, with_vectors=True)
+        esperados = np.stack([vetor(p['nome']) for p in produtos])
+        np.testing.assert_allclose(vetores, esperados)
+
+    def test_shard_que_excede_o_timeout_e_ignorado(self):
+        travado = {}
+
+        def shard(path, i, shards):
+            cls = ShardTravado if i == 1 else ShardNaThread
+            travado[i] = cls(path, i, shards)
+            return travado[i]
+
+        sharded = self.sharded(shard_cls=shard, timeout=0.05)
+        with mock.patch('builtins.print') as aviso:
+            obtidos = sharded.search(vetor('tênis'), limit=30)
+
+        linhas_travadas = set(int(pid) for pid in travado[1].index.ids)
+        self.assertEqual(len(obtidos), 23 - len(linhas_travadas))
+        self.assertFalse({p['id'] for p in obtidos} & linhas_travadas)
+        self.assertIn('excedeu', aviso.call_args_list[0].args[0])
+
+    def test_nenhum_shard_respondeu(self):
+        sharded = self.sharded(shard_cls=ShardTravado, timeout=0.05)
+        with mock.patch('builtins.print'), self.assertRaises(DeadlineExceeded):
+            sharded.search(vetor('tênis'))
+
+    def test_shards_em_processos(self):
+        memoria = InMemoryVectorStore(self.store)
+        sharded = ShardedVectorStore(self.store, shards=2, urls=[], timeout=30)
+        self.addCleanup(sharded.close)
+
+        self.assertTrue(sharded.wait_ready())
+        self.assertMesmosResultados(
+            sharded.search(vetor('tênis'), limit=5, filtros={'em_estoque': True}),
+            memoria.search(vetor('tênis'), limit=5, filtros={'em_estoque': True})
+        )
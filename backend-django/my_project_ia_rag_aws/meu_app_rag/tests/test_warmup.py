@@ -0,0 +1,109 @@
+import importlib.util
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from meu_app_rag.rag import bedrock_client, warmup
+
+
+def carregar_gunicorn_conf():
+    caminho = Path(settings.BASE_DIR) / 'gunicorn.conf.py'
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+class EstadoAquecimentoMixin:
+    """Isola o estado global do aquecimento deste processo"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(warmup._status, {
+            'status': 'pendente', 'iniciado_em': None, 'duracao': None, 'etapas': {}, 'erro': None,
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class ReadyCheckTests(EstadoAquecimentoMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.retriever = mock.Mock(reranker=None)
+        self.retriever.vector_store.describe.return_value = {'dims': 4, 'produtos': 2}
+        self.retriever.vector_store.search.return_value = []
+        for alvo, valor in (
+            ('meu_app_rag.rag.retriever.get_retriever', mock.Mock(return_value=self.retriever)),
+            ('meu_app_rag.rag.generator.ResponseGenerator', mock.Mock()),
+            ('meu_app_rag.rag.augmenter.ContextAugmenter', mock.Mock()),
+            ('meu_app_rag.rag.warmup.BEDROCK_PREWARM', False),
+        ):
+            patcher = mock.patch(alvo, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_503_antes_do_aquecimento_e_200_depois(self):
+        with mock.patch.object(warmup, 'start_warmup') as start:
+            response = self.client.get(reverse('ready_check'))
+        start.assert_called_once_with()
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.data['pronto'])
+
+        estado = warmup.warmup()
+        self.assertEqual(estado['status'], 'pronto')
+        self.assertEqual(set(estado['etapas']), {'indice', 'clientes', 'busca'})
+
+        response = self.client.get(reverse('ready_check'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['indice'], {'dims': 4, 'produtos': 2})
+
+    def test_falha_no_aquecimento_mantem_503(self):
+        self.retriever.vector_store.search.side_effect = RuntimeError('índice corrompido')
+
+        estado = warmup.warmup()
+
+        self.assertEqual((estado['status'], estado['erro']), ('falhou', 'índice corrompido'))
+        with mock.patch.object(warmup, 'start_warmup'):
+            self.assertEqual(self.client.get(reverse('ready_check')).status_code, 503)
+
+
+class PostWorkerInitTests(EstadoAquecimentoMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.worker = mock.Mock()
+        self.post_worker_init = carregar_gunicorn_conf().post_worker_init
+
+    def test_aquecimento_nao_bloqueia_o_worker(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+
+        with mock.patch.object(warmup, 'warmup', side_effect=lambda: liberar.wait(5)), \
+                mock.patch('config.settings_rag.RAG_WARMUP', True):
+            inicio = time.monotonic()
+            self.post_worker_init(self.worker)
+
+            self.assertLess(time.monotonic() - inicio, 1)
+            self.assertEqual(warmup.warmup_status()['status'], 'aquecendo')
+            self.assertTrue(warmup._thread.is_alive())
+        liberar.set()
+        warmup._thread.join(5)
+
+    def test_prewarm_do_bedrock_limitado_pelo_timeout(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+        cliente = mock.Mock()
+        cliente.invoke_model.side_effect = lambda **kwargs: liberar.wait(5)
+
+        with mock.patch.object(bedrock_client, 'get_bedrock_client', return_value=cliente):
+            inicio = time.monotonic()
+            aquecidas = bedrock_client.prewarm_bedrock_client(connections=2, timeout=0.05)
+
+        self.assertEqual(aquecidas, 0)
+        self.assertLess(time.monotonic() - inicio, 1)
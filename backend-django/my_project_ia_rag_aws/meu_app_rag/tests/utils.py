@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+
+from meu_app_rag.rag.index_store import CATALOGO_CAMPOS, IndexStore
+
+DIMS = 4
+
+
+def vetor(texto: str):
+    """Vetor determinístico por texto (no lugar do Bedrock)"""
+    return np.random.default_rng(abs(hash(texto)) % 2**32).random(DIMS).astype(np.float32)
+
+
+def produto_catalogo(id, nome, **campos):
+    """Produto no formato do catálogo do índice (campos ausentes = None)"""
+    produto = dict.fromkeys(CATALOGO_CAMPOS)
+    produto.update(id=id, nome=nome, categoria='Calçados', preco=100.0, estoque=1, num_avaliacoes=0)
+    produto.update(campos)
+    return produto
+
+
+def publicar(store, produtos, vetores, activate=True):
+    """Publica uma versão do índice com esses produtos e vetores; devolve a versão"""
+    build = store.new_build()
+    build.append_catalogo(produtos)
+    build.finish_catalogo()
+    build.append_chunk([p['id'] for p in produtos], vetores)
+    build.assemble()
+    return store.publish(build, model_id='fake', activate=activate)['version']
+
+
+class IndiceTemporarioMixin:
+    """IndexStore num diretório temporário (também para o popular_embeddings)"""
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        patcher = mock.patch('meu_app_rag.rag.index_store.RAG_INDEX_DIR', self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = IndexStore()
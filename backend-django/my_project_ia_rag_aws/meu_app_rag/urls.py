@@ -10,6 +10,7 @@ router.register(r'rag', views.RAGViewSet, basename='rag')
 urlpatterns = [
     # Health check
     path('health/', views.health_check, name='health_check'),
+    path('ready/', views.ready_check, name='ready_check'),
     
     # Rotas dos ViewSets
     path('', include(router.urls)),
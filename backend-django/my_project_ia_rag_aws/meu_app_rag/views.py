@@ -1,20 +1,39 @@
+import os
 import time
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 from django.core.exceptions import ImproperlyConfigured
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from django.views.decorators.http import condition
 
 from .models import Produto
+from .pagination import ProdutoCursorPagination
+from .filters import ProdutoFilter
+from . import caching
+from . import fulltext
 from .serializers import (
     ProdutoSerializer,
     ProdutoListSerializer,
+    BuscaTextualSerializer,
+    BuscaVetorialSerializer,
+    AutocompleteSerializer,
     RAGQuerySerializer,
     RAGResponseSerializer
 )
-from .rag.retriever import ProductRetriever
-from .rag.augmenter import ContextAugmenter
-from .rag.generator import ResponseGenerator
+from .rag.coalescing import single_flight, CoalesceTimeout
+from .rag import warmup
+from .rag import metrics as rag_metrics
+from .rag.fragments import project_results
+from .rag.resilience import (
+    Deadline,
+    DeadlineExceeded,
+    CircuitOpenError,
+    BedrockUnavailable
+)
+from config.settings_rag import RAG_REQUEST_DEADLINE, RAG_ROUTER_ENABLED
 
 
 class ProdutoViewSet(viewsets.ModelViewSet):
@@ -22,15 +41,17 @@ class ProdutoViewSet(viewsets.ModelViewSet):
     ViewSet para operações CRUD de produtos.
     
     Endpoints:
-    - GET /api/produtos/ - Lista todos os produtos
+    - GET /api/produtos/ - Lista produtos (paginação por cursor)
     - POST /api/produtos/ - Cria novo produto
     - GET /api/produtos/{id}/ - Detalhe de um produto
     - PUT /api/produtos/{id}/ - Atualiza produto
     - DELETE /api/produtos/{id}/ - Remove produto
+    - GET /api/produtos/busca/?q= - Busca textual (palavras-chave)
     """
     
     queryset = Produto.objects.all()
     serializer_class = ProdutoSerializer
+    pagination_class = ProdutoCursorPagination
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -38,45 +59,98 @@ class ProdutoViewSet(viewsets.ModelViewSet):
         return ProdutoSerializer
     
     @extend_schema(
-        description="Lista produtos com filtros opcionais",
-        parameters=[
-            OpenApiParameter(
-                name='categoria',
-                description='Filtrar por categoria',
-                required=False,
-                type=str
-            ),
-            OpenApiParameter(
-                name='preco_min',
-                description='Preço mínimo',
-                required=False,
-                type=float
-            ),
-            OpenApiParameter(
-                name='preco_max',
-                description='Preço máximo',
-                required=False,
-                type=float
-            ),
-        ]
+        description="Lista produtos com filtros opcionais (colunas indexadas)",
+        parameters=ProdutoFilter.parameters
     )
+    @method_decorator(condition(
+        etag_func=caching.list_etag,
+        last_modified_func=caching.list_last_modified
+    ))
     def list(self, request, *args, **kwargs):
+        """
+        Listagem paginada por cursor.
+        
+        Busca apenas as colunas do ProdutoListSerializer via `.values()` e
+        serializa pelo caminho enxuto (ProdutoListSerializer.lean), então
+        memória e latência não crescem com o tamanho do catálogo.
+        
+        Responde 304 se o catálogo não mudou (ETag/Last-Modified) e guarda
+        cada página em cache até o próximo save/delete de Produto.
+        """
+        cached = caching.get_cached_list(request)
+        if cached is not None:
+            return Response(cached)
+        
         queryset = self.get_queryset()
         
-        # Filtros
-        categoria = request.query_params.get('categoria')
-        preco_min = request.query_params.get('preco_min')
-        preco_max = request.query_params.get('preco_max')
+        # Filtros (igualdade nas colunas normalizadas e indexadas)
+        queryset = ProdutoFilter(request.query_params).filter_queryset(queryset)
+        
+        # Projeção: colunas do serializer + coluna do cursor
+        queryset = queryset.values(*ProdutoListSerializer.Meta.fields, 'data_cadastro')
         
-        if categoria:
-            queryset = queryset.filter(categoria__icontains=categoria)
-        if preco_min:
-            queryset = queryset.filter(preco__gte=preco_min)
-        if preco_max:
-            queryset = queryset.filter(preco__lte=preco_max)
+        page = self.paginate_queryset(queryset)
+        dados = [ProdutoListSerializer.lean(row) for row in page]
+        response = self.get_paginated_response(dados)
+        caching.set_cached_list(request, response.data)
+        return response
+    
+    @method_decorator(condition(
+        etag_func=caching.detail_etag,
+        last_modified_func=caching.detail_last_modified
+    ))
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhe do produto; 304 se data_atualizacao não mudou"""
+        return super().retrieve(request, *args, **kwargs)
+    
+    @extend_schema(
+        description="Busca textual por palavras-chave (BM25 no SQLite, ts_rank no PostgreSQL), com trecho destacado",
+        parameters=[
+            OpenApiParameter(name='q', description='Palavras-chave', required=True, type=str),
+            OpenApiParameter(name='limit', description='Número de resultados (1 a 50)', required=False, type=int),
+            OpenApiParameter(name='categoria', description='Filtrar por categoria', required=False, type=str),
+            OpenApiParameter(name='preco_min', description='Preço mínimo', required=False, type=float),
+            OpenApiParameter(name='preco_max', description='Preço máximo', required=False, type=float),
+            OpenApiParameter(name='em_estoque', description='Apenas produtos com estoque (true/false)', required=False, type=bool),
+            OpenApiParameter(name='fields', description='Campos dos produtos: compacto (padrão), completo ou lista separada por vírgula', required=False, type=str),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def busca(self, request):
+        """
+        Busca textual no índice de texto do banco (migração 0006).
+        
+        Não usa embeddings nem o índice vetorial: funciona sem Bedrock e
+        reflete na hora os produtos criados/alterados. Cada produto traz
+        "score" (maior = mais relevante) e "trecho" com os termos entre <mark>.
+        """
+        serializer = BuscaTextualSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        query_text = serializer.validated_data['q']
+        try:
+            produtos = fulltext.search(
+                query_text,
+                limit=serializer.validated_data['limit'],
+                filtros=serializer.filtros
+            )
+        except NotImplementedError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response({
+            'query': query_text,
+            'total': len(produtos),
+            'produtos': project_results(produtos, serializer.campos)
+        })
 
 
 class RAGViewSet(viewsets.ViewSet):
@@ -90,13 +164,34 @@ class RAGViewSet(viewsets.ViewSet):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         try:
-            self.retriever = ProductRetriever()
-            self.augmenter = ContextAugmenter()
-            self.generator = ResponseGenerator()
+            # Imports sob demanda: generator.py carrega langchain_aws/langchain_core
+            # e boto3 (centenas de ms), que CRUD, health e comandos do
+            # manage.py não usam. Só a primeira requisição RAG paga o custo
+            # (ou o aquecimento do worker, ver rag/warmup.py).
+            from .rag.retriever import get_retriever
+            
+            self.retriever = get_retriever()
         except ImproperlyConfigured as e:
             self.retriever = None
             self.error_message = str(e)
     
+    # Criados só pelas ações que geram resposta (query): search, stats e
+    # autocomplete não pagam a montagem do cliente do LLM a cada requisição
+    @cached_property
+    def augmenter(self):
+        from .rag.augmenter import ContextAugmenter
+        return ContextAugmenter()
+    
+    @cached_property
+    def generator(self):
+        from .rag.generator import ResponseGenerator
+        return ResponseGenerator()
+    
+    @cached_property
+    def router(self):
+        from .rag.router import QueryRouter
+        return QueryRouter()
+    
     @extend_schema(
         request=RAGQuerySerializer,
         responses={200: RAGResponseSerializer},
@@ -139,30 +234,124 @@ class RAGViewSet(viewsets.ViewSet):
         
         query_text = serializer.validated_data['query']
         limit = serializer.validated_data.get('limit', 5)
+        filtros = serializer.filtros
+        mmr_lambda = serializer.validated_data.get('mmr_lambda')
+        campos = serializer.campos
+        modelo = serializer.validated_data.get('modelo')
+        max_tokens = serializer.validated_data.get('max_tokens')
         
         # Medir tempo de processamento
         start_time = time.time()
+        deadline = Deadline(RAG_REQUEST_DEADLINE)
         
-        try:
+        def pipeline():
             # 1. Buscar produtos relevantes
-            produtos = self.retriever.retrieve(query_text, limit=limit)
+            produtos = self.retriever.retrieve(
+                query_text, limit=limit, deadline=deadline, filtros=filtros,
+                mmr_lambda=mmr_lambda
+            )
             
-            # 2. Gerar contexto
+            # Nada acima do threshold de similaridade: responder sem o LLM
+            if not produtos:
+                from .rag.generator import RESPOSTA_SEM_PRODUTOS
+
+                return {
+                    'resposta': RESPOSTA_SEM_PRODUTOS,
+                    'produtos': [],
+                    'degradado': False,
+                    'rota': 'sem_produtos',
+                    'modelo': None,
+                }
+            
+            # 2. Consultas diretas (preço, estoque, avaliação, promoção):
+            #    resposta em template, sem chamar o LLM
+            rota = None
+            if RAG_ROUTER_ENABLED:
+                inicio = time.perf_counter()
+                rota = self.router.route(query_text, produtos)
+                if rota.destino == 'template':
+                    resposta = self.augmenter.answer(rota.intencoes, rota.produtos, query_text)
+                    rag_metrics.observe('rota.template', time.perf_counter() - inicio)
+                    return {
+                        'resposta': resposta,
+                        'produtos': rota.produtos,
+                        'degradado': False,
+                        'rota': 'template:' + '+'.join(rota.intencoes),
+                        'modelo': None,
+                    }
+                rag_metrics.increment('rota_motivo.' + rota.motivo)
+            
+            # 3. Gerar contexto
             contexto = self.augmenter.augment(produtos, query_text)
             
-            # 3. Gerar resposta
-            resposta = self.generator.generate(query_text, contexto)
+            # 4. Gerar resposta com o modelo do nível da consulta (degrada
+            #    para resumo em template se o LLM estourar o prazo ou
+            #    estiver indisponível)
+            from .rag.router import choose_tier
             
-            tempo_processamento = time.time() - start_time
+            tier = modelo or choose_tier(query_text, produtos)
+            inicio = time.perf_counter()
+            try:
+                resposta = self.generator.generate(
+                    query_text, contexto, deadline=deadline, tier=tier, max_tokens=max_tokens
+                )
+            except BedrockUnavailable:
+                # Nenhum modelo respondeu: resumo em template
+                rag_metrics.increment('resposta.degradada')
+                return {
+                    'resposta': self.augmenter.summarize(produtos, query_text),
+                    'produtos': produtos,
+                    'degradado': True,
+                    'rota': 'degradado',
+                    'modelo': None,
+                }
             
-            return Response({
-                'query': query_text,
+            if rota is not None:
+                rag_metrics.observe('rota.llm', time.perf_counter() - inicio)
+            return {
                 'resposta': resposta,
-                'produtos_encontrados': len(produtos),
                 'produtos': produtos,
+                'degradado': False,
+                'rota': 'llm',
+                'modelo': tier,
+            }
+        
+        try:
+            # Requisições idênticas simultâneas compartilham a mesma execução
+            chave = single_flight.make_key(
+                'query', query_text, limit, mmr_lambda=mmr_lambda,
+                modelo=modelo, max_tokens=max_tokens, **filtros
+            )
+            resultado, coalescido = single_flight.do(
+                chave, pipeline, timeout=deadline.remaining()
+            )
+            
+            tempo_processamento = time.time() - start_time
+            
+            response = Response({
+                'query': query_text,
+                'resposta': resultado['resposta'],
+                'produtos_encontrados': len(resultado['produtos']),
+                # fields=: só os campos pedidos (o contexto do LLM usa todos)
+                'produtos': self.retriever.project(resultado['produtos'], campos),
+                'degradado': resultado['degradado'],
+                'rota': resultado['rota'],
+                'modelo': resultado['modelo'],
                 'tempo_processamento': round(tempo_processamento, 3)
             })
+            response['X-RAG-Coalesced'] = '1' if coalescido else '0'
+            return response
             
+        except (DeadlineExceeded, CoalesceTimeout) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except CircuitOpenError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {'error': f'Erro ao processar consulta: {str(e)}'},
@@ -173,7 +362,13 @@ class RAGViewSet(viewsets.ViewSet):
         description="Busca produtos por similaridade vetorial",
         parameters=[
             OpenApiParameter(name='q', description='Texto da busca', required=True, type=str),
-            OpenApiParameter(name='limit', description='Número de resultados', required=False, type=int),
+            OpenApiParameter(name='limit', description='Número de resultados (1 a 20)', required=False, type=int),
+            OpenApiParameter(name='categoria', description='Filtrar por categoria', required=False, type=str),
+            OpenApiParameter(name='preco_min', description='Preço mínimo', required=False, type=float),
+            OpenApiParameter(name='preco_max', description='Preço máximo', required=False, type=float),
+            OpenApiParameter(name='em_estoque', description='Apenas produtos com estoque (true/false)', required=False, type=bool),
+            OpenApiParameter(name='mmr_lambda', description='Diversificação MMR (0 a 1; 1 = só relevância)', required=False, type=float),
+            OpenApiParameter(name='fields', description='Campos dos produtos: compacto (padrão), completo ou lista separada por vírgula', required=False, type=str),
         ]
     )
     @action(detail=False, methods=['get'])
@@ -189,28 +384,111 @@ class RAGViewSet(viewsets.ViewSet):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        query_text = request.query_params.get('q', '')
-        limit = int(request.query_params.get('limit', 5))
-        
-        if not query_text:
+        serializer = BuscaVetorialSerializer(data=request.query_params)
+        if not serializer.is_valid():
             return Response(
-                {'error': 'Parâmetro "q" é obrigatório'},
+                serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST
             )
+        query_text = serializer.validated_data['q']
+        limit = serializer.validated_data['limit']
+        filtros = serializer.filtros
+        mmr_lambda = serializer.validated_data.get('mmr_lambda')
+        campos = serializer.campos
+        
+        deadline = Deadline(RAG_REQUEST_DEADLINE)
         
         try:
-            produtos = self.retriever.retrieve(query_text, limit=limit)
-            return Response({
+            chave = single_flight.make_key(
+                'search', query_text, limit, mmr_lambda=mmr_lambda, **filtros
+            )
+            produtos, coalescido = single_flight.do(
+                chave,
+                lambda: self.retriever.retrieve(
+                    query_text, limit=limit, deadline=deadline, filtros=filtros,
+                    mmr_lambda=mmr_lambda
+                ),
+                timeout=deadline.remaining()
+            )
+            response = Response({
                 'query': query_text,
                 'total': len(produtos),
-                'produtos': produtos
+                'produtos': self.retriever.project(produtos, campos)
             })
+            response['X-RAG-Coalesced'] = '1' if coalescido else '0'
+            return response
+        except (DeadlineExceeded, CoalesceTimeout) as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except CircuitOpenError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @extend_schema(
+        description="Sugestões de autocomplete (nomes, marcas e categorias) para o texto digitado",
+        parameters=[
+            OpenApiParameter(name='q', description='Texto digitado até agora', required=True, type=str),
+            OpenApiParameter(name='limit', description='Número de sugestões', required=False, type=int),
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Sugestões por prefixo, sem embedding nem Bedrock.
+        
+        Servidas do índice de prefixos montado na carga do índice vetorial
+        (rag/autocomplete.py), ordenadas por popularidade/avaliação.
+        """
+        if not self.retriever:
+            return Response(
+                {'error': self.error_message},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        serializer = AutocompleteSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        query_text = serializer.validated_data['q']
+        try:
+            sugestoes = self.retriever.suggest(query_text, limit=serializer.validated_data['limit'])
+        except Exception as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({'query': query_text, 'sugestoes': sugestoes})
+    
+    @extend_schema(description="Métricas do worker: roteamento template x LLM e latências")
+    @action(detail=False, methods=['get'])
+    def metrics(self, request):
+        """
+        Métricas deste processo (cada worker do gunicorn responde as suas).
+        
+        - roteamento: parcela das consultas respondidas por template e
+          tempo economizado estimado em relação à geração pelo LLM
+        - modelos: latência, tokens e custo estimado por nível de modelo
+        - respostas_degradadas: respostas em template porque o LLM não
+          respondeu (rota "degradado")
+        """
+        from .rag.router import routing_report, tier_report
+        
+        return Response({
+            'pid': os.getpid(),
+            'roteamento': routing_report(),
+            'modelos': tier_report(),
+            'respostas_degradadas': rag_metrics.get_counter('resposta.degradada').total,
+        })
+    
     @extend_schema(description="Estatísticas do catálogo")
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -242,4 +520,44 @@ def health_check(request):
         'status': 'ok',
         'message': 'API RAG funcionando!',
         'version': '1.0.0'
-    })
\ No newline at end of file
+    })
+
+
+@extend_schema(
+    description="Readiness do worker: 200 só depois do aquecimento (índice, clientes e busca fictícia)",
+    responses={
+        200: {'description': 'Worker aquecido'},
+        503: {'description': 'Worker aquecendo ou com falha no aquecimento'}
+    }
+)
+@api_view(['GET'])
+def ready_check(request):
+    """
+    Readiness check para o load balancer.
+    
+    Diferente de /api/health/, só responde 200 quando este worker já
+    carregou o índice e aqueceu os clientes. Se o aquecimento ainda não
+    começou (ex.: runserver --noreload), é iniciado em segundo plano.
+    """
+    warmup.start_warmup()
+    estado = warmup.warmup_status()
+    
+    dados = {
+        'pronto': warmup.is_warm(),
+        'pid': os.getpid(),
+        'aquecimento': estado,
+        'memoria': warmup.process_memory(),
+        'indice': None,
+    }
+    if dados['pronto']:
+        from .rag.retriever import get_retriever
+        try:
+            dados['indice'] = get_retriever().vector_store.describe()
+        except Exception as e:
+            dados['pronto'] = False
+            dados['aquecimento']['erro'] = str(e)
+    
+    return Response(
+        dados,
+        status=status.HTTP_200_OK if dados['pronto'] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
@@ -1,7 +1,9 @@
 import { Component } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { FormsModule } from '@angular/forms'; 
-import { Produto, RAGResponse, RagService } from '../services/rag/rag.service';
+import { takeUntilDestroyed } from '@angular/core/rxjs-interop';
+import { Subject, catchError, debounceTime, distinctUntilChanged, map, of, switchMap } from 'rxjs';
+import { Produto, RAGResponse, RagService, Sugestao } from '../services/rag/rag.service';
 
 interface Message {
   id: number;
@@ -30,7 +32,28 @@ export class AppComponent {
     'Produtos até 100 reais'
   ];
 
-  constructor(private ragService: RagService) {}
+  // Autocomplete do campo de mensagem (GET /rag/autocomplete/, sem LLM)
+  autocomplete: Sugestao[] = [];
+  private digitado = new Subject<string>();
+
+  constructor(private ragService: RagService) {
+    this.digitado.pipe(
+      map(texto => texto.trim()),
+      debounceTime(120),
+      distinctUntilChanged(),
+      switchMap(texto => texto.length < 2
+        ? of([])
+        : this.ragService.autocomplete(texto).pipe(
+            map(response => response.sugestoes),
+            catchError(() => of([]))
+          )),
+      takeUntilDestroyed()
+    ).subscribe(sugestoes => this.autocomplete = sugestoes);
+  }
+
+  onInput(texto: string) {
+    this.digitado.next(texto);
+  }
 
   sendMessage(message?: string) {
     const text = message || this.inputMessage.trim();
@@ -46,6 +69,7 @@ export class AppComponent {
     });
 
     this.inputMessage = '';
+    this.autocomplete = [];
     this.isLoading = true;
 
     // Chamar API
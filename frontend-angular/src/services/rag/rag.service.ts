@@ -21,6 +21,24 @@ export interface Produto {
   score: number;
 }
 
+export interface ProdutoPage {
+  next: string | null;
+  previous: string | null;
+  results: Produto[];
+}
+
+export interface Sugestao {
+  texto: string;
+  tipo: 'produto' | 'marca' | 'categoria';
+  id?: number;
+  produtos?: number;
+}
+
+export interface AutocompleteResponse {
+  query: string;
+  sugestoes: Sugestao[];
+}
+
 export interface RAGResponse {
   query: string;
   resposta: string;
@@ -43,8 +61,14 @@ export class RagService {
     return this.http.post<RAGResponse>(`${this.apiUrl}/rag/query/`, data);
   }
 
-  getProducts(): Observable<Produto[]> {
-    return this.http.get<Produto[]>(`${this.apiUrl}/produtos/`);
+  getProducts(cursorUrl?: string): Observable<ProdutoPage> {
+    return this.http.get<ProdutoPage>(cursorUrl ?? `${this.apiUrl}/produtos/`);
+  }
+
+  autocomplete(q: string, limit = 8): Observable<AutocompleteResponse> {
+    return this.http.get<AutocompleteResponse>(`${this.apiUrl}/rag/autocomplete/`, {
+      params: { q, limit }
+    });
   }
 
   getStats(): Observable<any> {